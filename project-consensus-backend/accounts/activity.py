@@ -0,0 +1,100 @@
+"""
+"My activity": the current user's posts, comments, liked posts and course reviews.
+
+- `GET /api/accounts/me/posts/`, `.../me/comments/`, `.../me/likes/`,
+  `.../me/reviews/`; login required.
+- Cursor pagination, newest first (`?cursor=` from `next`/`previous`,
+  `?page_size=` up to 100). No COUNT(*), and each page is an index range
+  scan on `(author, -created_at)` / `(user, -created_at)` however deep the
+  user scrolls, unlike OFFSET paging.
+- Rows use the same serializers as the forum/course lists; reads accept
+  `?fields=` (core/sparse.py). Liked posts carry `likedAt`.
+"""
+
+from __future__ import annotations
+
+from rest_framework import generics, permissions, serializers
+from rest_framework.pagination import CursorPagination
+
+from core.sparse import SparseFieldsetViewMixin
+from courses.models import CourseReview
+from courses.serializers import CourseReviewSerializer
+from forum.models import ForumPost, ForumPostComment, ForumPostLike
+from forum.serializers import ForumPostCommentSerializer, ForumPostListSerializer
+from forum.views import annotate_posts, replies_count
+
+
+class ActivityCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-created_at"
+
+
+class ActivityListView(SparseFieldsetViewMixin, generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ActivityCursorPagination
+
+
+class MyPostsView(ActivityListView):
+    """GET /api/accounts/me/posts/ — posts written by the current user."""
+
+    serializer_class = ForumPostListSerializer
+
+    def get_queryset(self):  # type: ignore[override]
+        user = self.request.user
+        qs = self.prune_queryset(ForumPost.objects.filter(author=user).select_related("author__profile"))
+        return annotate_posts(qs, user, comments=self.wants("comments"), is_liked=self.wants("isLiked"))
+
+
+class MyCommentsView(ActivityListView):
+    """GET /api/accounts/me/comments/ — the current user's comments (not deleted)."""
+
+    serializer_class = ForumPostCommentSerializer
+
+    def get_queryset(self):  # type: ignore[override]
+        qs = ForumPostComment.objects.filter(author=self.request.user, is_deleted=False).select_related(
+            "author__profile", "reply_to_user__profile"
+        )
+        qs = self.prune_queryset(qs)
+        if self.wants("repliesCount"):
+            qs = qs.annotate(replies_count_main=replies_count())
+        return qs
+
+
+class MyReviewsView(ActivityListView):
+    """GET /api/accounts/me/reviews/ — course reviews by the current user."""
+
+    serializer_class = CourseReviewSerializer
+
+    def get_queryset(self):  # type: ignore[override]
+        return self.prune_queryset(
+            CourseReview.objects.filter(author=self.request.user).select_related("course", "author__profile")
+        )
+
+
+class MyLikesView(ActivityListView):
+    """GET /api/accounts/me/likes/ — posts the current user liked, most recent like first.
+
+    Pages through the user's likes, then loads that page's posts in one
+    query (list shape plus `likedAt`).
+    """
+
+    serializer_class = ForumPostListSerializer
+
+    def get_queryset(self):  # type: ignore[override]
+        return ForumPostLike.objects.filter(user=self.request.user).only("post_id", "created_at")
+
+    def list(self, request, *args, **kwargs):
+        likes = self.paginate_queryset(self.get_queryset())
+        posts = self.prune_queryset(ForumPost.objects.filter(pk__in=[like.post_id for like in likes]))
+        posts = annotate_posts(posts, request.user, comments=self.wants("comments"), is_liked=False)
+        by_id = {post.pk: post for post in posts}
+        # Posts deleted since the likes were read drop out of the page
+        pairs = [(like, by_id[like.post_id]) for like in likes if like.post_id in by_id]
+        for _, post in pairs:
+            post.is_liked = True
+        data = self.get_serializer([post for _, post in pairs], many=True).data
+        liked_at = serializers.DateTimeField()
+        rows = [{**row, "likedAt": liked_at.to_representation(like.created_at)} for (like, _), row in zip(pairs, data)]
+        return self.get_paginated_response(rows)
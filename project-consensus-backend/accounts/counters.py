@@ -0,0 +1,77 @@
+"""
+Per-user activity counters on `Profile` (posts, comments, reviews, likes received).
+
+- Writers call `bump()` in the same transaction as the write: one UPDATE with
+  `F()` expressions, so concurrent writes never lose an increment and the
+  profile header reads four columns instead of running four COUNTs.
+- Counters never go below zero; paths that bypass the API (admin, shell,
+  bulk scripts) can leave them off, which `recount()`
+  (`python manage.py recount_profile_counters`) repairs.
+"""
+
+from __future__ import annotations
+
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Profile
+
+
+COUNTERS = {
+    "posts": "posts_count",
+    "comments": "comments_count",
+    "reviews": "reviews_count",
+    "likes_received": "likes_received_count",
+}
+
+
+def bump(user_id, **deltas: int) -> None:
+    """Add `deltas` (e.g. `posts=1`, `likes_received=-3`) to one user's counters."""
+
+    changes = {
+        COUNTERS[name]: Greatest(F(COUNTERS[name]) + delta, Value(0)) for name, delta in deltas.items() if delta
+    }
+    if changes and user_id is not None:
+        Profile.objects.filter(user_id=user_id).update(**changes)
+
+
+def uncount_comments(comments) -> None:
+    """Take live comments in `comments` (a queryset) off their authors' counters.
+
+    For bulk removals (a post's comments, purged threads): one UPDATE for
+    every author involved.
+    """
+
+    live = comments.filter(is_deleted=False).order_by()
+    per_author = Coalesce(
+        Subquery(live.filter(author=OuterRef("user")).values("author").annotate(n=Count("*")).values("n")), 0
+    )
+    Profile.objects.filter(user__in=live.values("author")).update(
+        comments_count=Greatest(F("comments_count") - per_author, Value(0))
+    )
+
+
+def recount(profiles=None) -> int:
+    """Recompute every counter from the source tables; returns the profiles updated."""
+
+    from courses.models import CourseReview
+    from forum.models import ForumPost, ForumPostComment
+
+    def count(queryset, field: str = "author"):
+        rows = queryset.filter(**{field: OuterRef("user")}).order_by().values(field).annotate(n=Count("*")).values("n")
+        return Coalesce(Subquery(rows), 0)
+
+    likes = (
+        ForumPost.objects.filter(author=OuterRef("user"))
+        .order_by()
+        .values("author")
+        .annotate(n=Sum("likes_count"))
+        .values("n")
+    )
+    profiles = Profile.objects.all() if profiles is None else profiles
+    return profiles.update(
+        posts_count=count(ForumPost.objects.all()),
+        comments_count=count(ForumPostComment.objects.filter(is_deleted=False)),
+        reviews_count=count(CourseReview.objects.all()),
+        likes_received_count=Coalesce(Subquery(likes), 0),
+    )
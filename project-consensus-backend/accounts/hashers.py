@@ -0,0 +1,67 @@
+"""
+Password hasher that runs PBKDF2 on a bounded executor.
+
+`authenticate()` (login) and `create_user()` (register) hash in the request
+thread by default, so a login burst can keep every worker thread busy with
+PBKDF2. Registering `BoundedPBKDF2PasswordHasher` in `PASSWORD_HASHERS` sends
+every encode/verify through a shared `BoundedExecutor` instead: at most
+`PASSWORD_HASHING_MAX_WORKERS` hashes run at once, and a request that waits
+longer than `PASSWORD_HASHING_QUEUE_TIMEOUT` seconds gets `ExecutorSaturated`,
+which API views answer with HTTP 503 (core/exceptions.py). Other callers (admin
+login, `createsuperuser`, `changepassword`) see the plain exception; a
+management command has its own process and so an idle executor.
+
+Database access stays in the request thread; only the hash moves. The request
+thread still waits for its hash (see core/executors.py): the executor caps how
+many threads are hashing, not how many are waiting.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from core.executors import BoundedExecutor
+
+
+EXECUTOR_NAME = "password_hashing"
+
+_executor: BoundedExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_password_executor() -> BoundedExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = BoundedExecutor(
+                    EXECUTOR_NAME,
+                    max_workers=settings.PASSWORD_HASHING_MAX_WORKERS,
+                    max_queue=settings.PASSWORD_HASHING_MAX_QUEUE,
+                    queue_timeout=settings.PASSWORD_HASHING_QUEUE_TIMEOUT,
+                )
+    return _executor
+
+
+@receiver(setting_changed)
+def _reset_executor(*, setting, **kwargs):
+    global _executor
+    if setting.startswith("PASSWORD_HASHING_") and _executor is not None:
+        with _executor_lock:
+            _executor.shutdown()
+            _executor = None
+
+
+class BoundedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """Drop-in replacement for Django's PBKDF2 hasher (same `pbkdf2_sha256` format)."""
+
+    def encode(self, password, salt, iterations=None):
+        return get_password_executor().run(super().encode, password, salt, iterations)
+
+    def verify(self, password, encoded):
+        return get_password_executor().run(super().verify, password, encoded)
@@ -0,0 +1,31 @@
+"""Background tasks of the accounts app (core/jobs.py)."""
+
+from __future__ import annotations
+
+from django.core.mail import get_connection
+
+from core.jobs import task
+from .counters import recount
+from .outbox import deliver_due
+
+
+@task("accounts.send_outbox_emails")
+def send_outbox_emails() -> int:
+    """Deliver every due outbox email, batch by batch, over one mail connection."""
+
+    connection = get_connection()
+    connection.open()
+    sent = 0
+    try:
+        while True:
+            report = deliver_due(connection)
+            sent += report.sent
+            if not report.claimed:
+                return sent
+    finally:
+        connection.close()
+
+
+@task("accounts.recount_profile_counters", lease_seconds=60 * 60)
+def recount_profile_counters() -> int:
+    return recount()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+from accounts.hashers import get_password_executor
+
+
+DEMO_EMAIL = "demo@connect.polyu.hk"
+DEMO_PASSWORD = "Demo1234!"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure forum read latency while a login storm runs, with the password hashing "
+        "executor uncapped vs capped (PASSWORD_HASHING_* settings)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per phase (default 10)")
+        parser.add_argument("--storm-threads", type=int, default=32, help="Concurrent login loops (default 32)")
+        parser.add_argument("--readers", type=int, default=4, help="Concurrent forum readers (default 4)")
+        parser.add_argument("--read-path", default="/api/forum/posts/?page_size=12")
+        parser.add_argument("--email", default=DEMO_EMAIL)
+        parser.add_argument("--password", default=DEMO_PASSWORD)
+
+    def handle(self, *args, **options):
+        # Throttles would reject the storm long before hashing matters
+        unthrottled = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                scope: "1000000/min" for scope in settings.REST_FRAMEWORK.get("DEFAULT_THROTTLE_RATES", {})
+            },
+        }
+        storm = options["storm_threads"]
+        phases = [
+            ("idle (no logins)", 0, {}),
+            (
+                f"storm, uncapped ({storm} hashing threads)",
+                storm,
+                {"PASSWORD_HASHING_MAX_WORKERS": storm, "PASSWORD_HASHING_MAX_QUEUE": storm},
+            ),
+            (
+                f"storm, capped ({settings.PASSWORD_HASHING_MAX_WORKERS} hashing threads)",
+                storm,
+                {},
+            ),
+        ]
+        with override_settings(REST_FRAMEWORK=unthrottled):
+            for label, logins, overrides in phases:
+                with override_settings(**overrides):
+                    result = self._run_phase(logins, options)
+                self._report(label, result)
+
+    def _run_phase(self, login_threads: int, options) -> dict:
+        stop = threading.Event()
+        read_latencies: list[float] = []
+        login_codes: list[int] = []
+        lock = threading.Lock()
+
+        def reader():
+            client = Client()
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    client.get(options["read_path"])
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        read_latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        def login_loop():
+            client = Client()
+            body = {"email": options["email"], "password": options["password"]}
+            try:
+                while not stop.is_set():
+                    response = client.post("/api/accounts/login/", body, content_type="application/json")
+                    with lock:
+                        login_codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(options["readers"])]
+        threads += [threading.Thread(target=login_loop) for _ in range(login_threads)]
+        for thread in threads:
+            thread.start()
+        time.sleep(options["duration"])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        return {
+            "reads": read_latencies,
+            "logins_ok": login_codes.count(200),
+            "logins_503": login_codes.count(503),
+            "executor": get_password_executor().stats(),
+            "duration": options["duration"],
+        }
+
+    def _report(self, label: str, result: dict) -> None:
+        reads = sorted(result["reads"])
+        if not reads:
+            self.stdout.write(f"{label}: no reads completed")
+            return
+        p95 = reads[min(len(reads) - 1, int(len(reads) * 0.95))]
+        self.stdout.write(
+            f"{label:<38} reads={len(reads):<6} p50={statistics.median(reads):7.1f}ms "
+            f"p95={p95:7.1f}ms max={reads[-1]:7.1f}ms | "
+            f"logins/s={result['logins_ok'] / result['duration']:6.1f} 503s={result['logins_503']} "
+            f"max_running={result['executor']['max_running']}"
+        )
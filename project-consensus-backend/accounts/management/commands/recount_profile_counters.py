@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from accounts.counters import recount
+
+
+class Command(BaseCommand):
+    help = "Recompute the profile activity counters (posts, comments, reviews, likes received) from the source tables."
+
+    def handle(self, *args, **options):
+        updated = recount()
+        self.stdout.write(f"Recounted {updated} profiles.")
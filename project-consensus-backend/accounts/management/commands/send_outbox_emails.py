@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import statistics
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.models import OutboxEmail
+from accounts.outbox import deliver_due
+
+
+class Command(BaseCommand):
+    help = "Deliver pending OutboxEmail rows in batches over a persistent mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain due emails, then exit")
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per batch (EMAIL_OUTBOX_BATCH_SIZE)")
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=None,
+            help="Seconds to sleep when the queue is empty (EMAIL_OUTBOX_POLL_INTERVAL)",
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = options["poll_interval"] or settings.EMAIL_OUTBOX_POLL_INTERVAL
+        connection = get_connection()
+        connection.open()
+        started = time.perf_counter()
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        latencies: list[float] = []
+        try:
+            while True:
+                close_old_connections()
+                report = deliver_due(connection, options["batch_size"])
+                for key in totals:
+                    totals[key] += getattr(report, key)
+                latencies.extend(report.queue_latencies)
+                if report.claimed:
+                    self._log_batch(report)
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+            self._log_summary(totals, latencies, time.perf_counter() - started)
+
+    def _log_batch(self, report) -> None:
+        latency = f"{statistics.median(report.queue_latencies):.2f}s" if report.queue_latencies else "-"
+        depth = OutboxEmail.objects.filter(status=OutboxEmail.Status.PENDING).count()
+        self.stdout.write(
+            f"batch sent={report.sent} retried={report.retried} failed={report.failed} "
+            f"queue_latency_p50={latency} pending={depth}"
+        )
+
+    def _log_summary(self, totals: dict, latencies: list[float], elapsed: float) -> None:
+        throughput = totals["sent"] / elapsed if elapsed else 0.0
+        summary = (
+            f"sent={totals['sent']} retried={totals['retried']} failed={totals['failed']} "
+            f"elapsed={elapsed:.1f}s throughput={throughput:.1f}/s"
+        )
+        if latencies:
+            ordered = sorted(latencies)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            summary += f" queue_latency_p50={statistics.median(ordered):.2f}s p95={p95:.2f}s max={ordered[-1]:.2f}s"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    # Same as accounts.counters.recount(), on the historical models
+    Profile = apps.get_model("accounts", "Profile")
+    ForumPost = apps.get_model("forum", "ForumPost")
+    ForumPostComment = apps.get_model("forum", "ForumPostComment")
+    CourseReview = apps.get_model("courses", "CourseReview")
+
+    def total(queryset, aggregate):
+        rows = queryset.filter(author=OuterRef("user")).order_by().values("author").annotate(n=aggregate).values("n")
+        return Coalesce(Subquery(rows), 0)
+
+    Profile.objects.update(
+        posts_count=total(ForumPost.objects.all(), Count("*")),
+        comments_count=total(ForumPostComment.objects.filter(is_deleted=False), Count("*")),
+        reviews_count=total(CourseReview.objects.all(), Count("*")),
+        likes_received_count=total(ForumPost.objects.all(), Sum("likes_count")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_outboxemail"),
+        ("courses", "0001_initial"),
+        ("forum", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="likes_received_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="posts_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="reviews_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -16,11 +16,17 @@ class Profile(models.Model):
     - One-to-one with the built-in Django User; adds display name and avatar;
     - The frontend "Author" type (id/name/avatar) can be produced from this
       model or the related user.
+    - *_count: activity counters for the profile header, maintained on write
+      (accounts/counters.py) instead of counted per request.
     """
 
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="profile")
     display_name = models.CharField(max_length=100, blank=True, help_text="展示昵称（不唯一）")
     avatar_url = models.URLField(blank=True, help_text="头像 URL，可为空")
+    posts_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)  # not deleted
+    reviews_count = models.PositiveIntegerField(default=0)
+    likes_received_count = models.PositiveIntegerField(default=0)  # on the user's posts
 
     class Meta:
         verbose_name = "Profile"
@@ -43,3 +49,44 @@ class Profile(models.Model):
             "name": self.display_name or self.user.get_username(),
             "avatar": self.avatar_url or None,
         }
+
+
+class OutboxEmail(models.Model):
+    """Transactional outbox for emails (e.g. verification codes).
+
+    Notes:
+    - Requests only insert a row; the `send_outbox_emails` worker delivers it
+      over a persistent SMTP connection, so no request waits on the mail server.
+    - Failed sends are retried with exponential backoff until
+      `EMAIL_OUTBOX_MAX_ATTEMPTS`, then marked failed.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "pending"
+        SENT = "sent", "sent"
+        FAILED = "failed", "failed"
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker scan: due pending rows only
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="accounts_outbox_due_idx",
+            ),
+        ]
+        verbose_name = "Outbox email"
+        verbose_name_plural = "Outbox emails"
+
+    def __str__(self) -> str:  # pragma: no cover - simple text representation
+        return f"{self.to_email}: {self.subject} ({self.status})"
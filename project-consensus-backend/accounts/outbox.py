@@ -0,0 +1,122 @@
+"""
+Email outbox: enqueue inside the request transaction, deliver from a worker.
+
+- `enqueue_email()` only inserts an `OutboxEmail` row.
+- `deliver_due()` claims a batch of due rows in a short transaction
+  (`SELECT ... FOR UPDATE SKIP LOCKED`, then a lease on `next_attempt_at`, so
+  several workers never send the same row), sends them over one open mail
+  connection outside any transaction, then records success or schedules a
+  retry in a second short one. A worker that dies mid-batch leaves its rows
+  to be retried when the lease (EMAIL_OUTBOX_LEASE_SECONDS) runs out.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(to_email: str, subject: str, body: str) -> OutboxEmail:
+    return OutboxEmail.objects.create(to_email=to_email, subject=subject, body=body)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: base * 2^(attempts-1), capped at one hour."""
+
+    base = getattr(settings, "EMAIL_OUTBOX_BACKOFF_SECONDS", 30)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 60 * 60))
+
+
+@dataclass
+class DeliveryReport:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    # Seconds between enqueue and successful send, one entry per sent email
+    queue_latencies: list[float] = field(default_factory=list)
+
+    @property
+    def claimed(self) -> int:
+        return self.sent + self.retried + self.failed
+
+
+def claim_due(batch_size: int) -> list[OutboxEmail]:
+    """Lease up to `batch_size` due emails to this worker; short transaction, no I/O.
+
+    The lease pushes `next_attempt_at` EMAIL_OUTBOX_LEASE_SECONDS ahead, so other
+    workers skip the rows while they are being sent, and a worker that dies
+    mid-batch leaves them to be retried once the lease runs out.
+    """
+
+    lease = timedelta(seconds=getattr(settings, "EMAIL_OUTBOX_LEASE_SECONDS", 300))
+    with transaction.atomic():
+        now = timezone.now()
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        for email in batch:
+            email.attempts += 1
+            email.next_attempt_at = now + lease
+        OutboxEmail.objects.bulk_update(batch, ["attempts", "next_attempt_at"])
+    return batch
+
+
+def deliver_due(connection, batch_size: int | None = None) -> DeliveryReport:
+    """Send one batch of due emails through an already-open mail `connection`.
+
+    Claiming and recording are two short transactions; the SMTP round trips
+    happen between them, holding no row locks.
+    """
+
+    batch_size = batch_size or getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+    max_attempts = getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+    from_email = settings.DEFAULT_FROM_EMAIL
+    report = DeliveryReport()
+
+    batch = claim_due(batch_size)
+    for email in batch:
+        try:
+            EmailMessage(email.subject, email.body, from_email, [email.to_email], connection=connection).send()
+        except Exception as exc:  # SMTP errors, refused recipients, dropped connections
+            email.last_error = f"{type(exc).__name__}: {exc}"
+            _reconnect(connection)
+            if email.attempts >= max_attempts:
+                email.status = OutboxEmail.Status.FAILED
+                report.failed += 1
+                logger.error("Outbox email %s to %s failed permanently: %s", email.pk, email.to_email, exc)
+            else:
+                email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+                report.retried += 1
+            continue
+        email.status = OutboxEmail.Status.SENT
+        email.sent_at = timezone.now()
+        email.last_error = ""
+        report.sent += 1
+        report.queue_latencies.append((email.sent_at - email.created_at).total_seconds())
+
+    with transaction.atomic():
+        OutboxEmail.objects.bulk_update(batch, ["status", "next_attempt_at", "last_error", "sent_at"])
+    return report
+
+
+def _reconnect(connection) -> None:
+    """Replace a possibly broken mail connection; the next send retries opening it."""
+
+    try:
+        connection.close()
+        connection.open()
+    except Exception:
+        logger.warning("Could not reopen mail connection", exc_info=True)
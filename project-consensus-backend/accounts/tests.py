@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import io
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.db import connection as db_connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from core import jobs
+from core.executors import ExecutorSaturated
+from core.testing import QueryBudgetTestCase
+from courses.models import Course, CourseReview
+from forum.models import ForumPost
+from .hashers import get_password_executor
+from .models import OutboxEmail, Profile
+from .outbox import claim_due, deliver_due
+
+
+User = get_user_model()
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_send_verification_code_only_enqueues(self):
+        response = self.client.post(
+            "/api/accounts/send_verification_code/",
+            {"email": "Outbox@connect.polyu.hk"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        row = OutboxEmail.objects.get()
+        self.assertEqual(row.to_email, "outbox@connect.polyu.hk")
+        self.assertEqual(row.status, OutboxEmail.Status.PENDING)
+        self.assertIn(cache.get("accounts:verify:code:outbox@connect.polyu.hk"), row.body)
+        self.assertEqual(mail.outbox, [])
+
+    def test_worker_delivers_batch(self):
+        for i in range(3):
+            OutboxEmail.objects.create(to_email=f"user{i}@connect.polyu.hk", subject="s", body="b")
+        report = deliver_due(get_connection(), batch_size=10)
+        self.assertEqual(report.sent, 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.Status.SENT).exists())
+
+    def test_sends_outside_the_claiming_transaction(self):
+        OutboxEmail.objects.create(to_email="user@connect.polyu.hk", subject="s", body="b")
+        depth = len(db_connection.atomic_blocks)  # the TestCase's own blocks
+        depths = []
+
+        def send(message):
+            depths.append(len(db_connection.atomic_blocks))
+            # Leased while sending: another worker would not pick it up
+            self.assertFalse(OutboxEmail.objects.filter(next_attempt_at__lte=timezone.now()).exists())
+            return 1
+
+        with mock.patch("accounts.outbox.EmailMessage.send", autospec=True, side_effect=send):
+            self.assertEqual(deliver_due(get_connection()).sent, 1)
+        self.assertEqual(depths, [depth])
+
+    def test_expired_lease_is_claimed_again(self):
+        row = OutboxEmail.objects.create(to_email="user@connect.polyu.hk", subject="s", body="b")
+        def claim_then_die(batch_size):
+            claim_due(batch_size)
+            return []
+
+        with mock.patch("accounts.outbox.claim_due", side_effect=claim_then_die):
+            deliver_due(get_connection())
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (OutboxEmail.Status.PENDING, 1))
+        self.assertEqual(deliver_due(get_connection()).claimed, 0)
+
+        OutboxEmail.objects.filter(pk=row.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_due(get_connection()).sent, 1)
+        row.refresh_from_db()
+        self.assertEqual(row.attempts, 2)
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_fail(self):
+        row = OutboxEmail.objects.create(to_email="user@connect.polyu.hk", subject="s", body="b")
+        with mock.patch("accounts.outbox.EmailMessage.send", side_effect=OSError("connection refused")):
+            self.assertEqual(deliver_due(get_connection()).retried, 1)
+            row.refresh_from_db()
+            self.assertEqual(row.status, OutboxEmail.Status.PENDING)
+            self.assertGreater(row.next_attempt_at, timezone.now())
+            # Not due yet: nothing claimed
+            self.assertEqual(deliver_due(get_connection()).claimed, 0)
+
+            OutboxEmail.objects.filter(pk=row.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_due(get_connection()).failed, 1)
+        row.refresh_from_db()
+        self.assertEqual(row.status, OutboxEmail.Status.FAILED)
+        self.assertIn("connection refused", row.last_error)
+
+
+@override_settings(PASSWORD_HASHING_MAX_WORKERS=1, PASSWORD_HASHING_MAX_QUEUE=0, PASSWORD_HASHING_QUEUE_TIMEOUT=0.05)
+class PasswordHashingExecutorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("busy@connect.polyu.hk", "busy@connect.polyu.hk", "S3cure-pass!")
+
+    def login(self):
+        return self.client.post(
+            "/api/accounts/login/",
+            {"email": "busy@connect.polyu.hk", "password": "S3cure-pass!"},
+            content_type="application/json",
+        )
+
+    def test_saturated_executor_answers_503_with_retry_after(self):
+        executor = get_password_executor()
+        before = executor.stats()
+        started, release = threading.Event(), threading.Event()
+
+        def occupy():
+            started.set()
+            release.wait(5)
+
+        holder = threading.Thread(target=executor.run, args=(occupy,))
+        holder.start()
+        try:
+            self.assertTrue(started.wait(5))
+            response = self.login()
+            # Outside DRF (admin login, changepassword) it stays a plain exception
+            with self.assertRaises(ExecutorSaturated) as caught:
+                self.user.check_password("S3cure-pass!")
+            self.assertNotIsInstance(caught.exception, APIException)
+        finally:
+            release.set()
+            holder.join()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(response.json()["detail"], "Server is busy, please retry shortly.")
+        self.assertEqual(self.login().status_code, 200)
+
+        stats = executor.stats()
+        delta = {key: stats[key] - before[key] for key in ("rejected", "submitted", "completed", "failed")}
+        # Rejected: the login and the check; submitted: the blocker and the successful login
+        self.assertEqual(delta, {"rejected": 2, "submitted": 2, "completed": 2, "failed": 0})
+        self.assertEqual((stats["in_flight"], stats["running"], stats["max_running"]), (0, 0, 1))
+        self.assertGreater(stats["run_ms"], 0)
+
+
+class AccountEndpointQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_register_login_me_logout(self):
+        email = "budget@connect.polyu.hk"
+        self.assertEqual(self.client.get("/api/accounts/csrf/").status_code, 200)
+        self.client.post("/api/accounts/send_verification_code/", {"email": email}, content_type="application/json")
+        code = cache.get(f"accounts:verify:code:{email}")
+        registered = self.client.post(
+            "/api/accounts/register/",
+            {"nickname": "Budget", "email": email, "verification_code": code, "password": "S3cure-pass!"},
+            content_type="application/json",
+        )
+        self.assertEqual(registered.status_code, 201)
+        self.assertEqual(self.client.get("/api/accounts/me/").json()["name"], "Budget")
+        self.assertEqual(self.client.post("/api/accounts/logout/").status_code, 200)
+        logged_in = self.client.post(
+            "/api/accounts/login/", {"email": email, "password": "S3cure-pass!"}, content_type="application/json"
+        )
+        self.assertEqual(logged_in.status_code, 200)
+
+
+class ActivityEndpointTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="me@connect.polyu.hk", email="me@connect.polyu.hk", password="pw")
+        Profile.objects.create(user=cls.user, display_name="Me")
+        cls.fan = User.objects.create_user(username="fan@connect.polyu.hk", email="fan@connect.polyu.hk", password="pw")
+        Profile.objects.create(user=cls.fan, display_name="Fan")
+        cls.course = Course.objects.create(
+            subject_id="C-1", subject_code="COMP1001", title="Intro", term_year=2025, term_semester=Course.Semester.FALL
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def collect(self, url: str) -> list[dict]:
+        rows: list[dict] = []
+        while url:
+            page = self.client.get(url).json()
+            rows.extend(page["results"])
+            url = page["next"]
+        return rows
+
+    def test_counters_follow_writes_and_lists_page_by_cursor(self):
+        self.client.force_login(self.user)
+        posts = [
+            self.client.post(
+                "/api/forum/posts/", {"title": f"P{i}", "content": "<p>x</p>"}, content_type="application/json"
+            ).json()["id"]
+            for i in range(5)
+        ]
+        comments = [
+            self.client.post(
+                "/api/forum/comments/", {"content": f"C{i}", "postId": posts[0]}, content_type="application/json"
+            ).json()["id"]
+            for i in range(3)
+        ]
+        CourseReview.objects.create(course=self.course, author=self.user, content="Good")
+        self.client.force_login(self.fan)
+        for post_id in posts[:3]:
+            self.client.post(f"/api/forum/posts/{post_id}/like/")
+        self.client.post(f"/api/forum/posts/{posts[2]}/unlike/")
+        self.client.post("/api/forum/comments/", {"content": "Fan", "postId": posts[4]}, content_type="application/json")
+
+        self.client.force_login(self.user)
+        self.client.delete(f"/api/forum/comments/{comments[0]}/")
+        self.client.delete(f"/api/forum/posts/{posts[4]}/")
+        jobs.run(jobs.claim("test"))
+        stats = self.client.get("/api/accounts/me/").json()["stats"]
+        self.assertEqual(stats, {"posts": 4, "comments": 2, "reviews": 0, "likesReceived": 2})
+        self.assertEqual(Profile.objects.get(user=self.fan).comments_count, 0)
+
+        self.assertEqual([p["id"] for p in self.collect("/api/accounts/me/posts/?page_size=2")], posts[3::-1])
+        self.assertEqual([c["id"] for c in self.collect("/api/accounts/me/comments/")], comments[:0:-1])
+        self.assertEqual(len(self.collect("/api/accounts/me/reviews/")), 1)
+
+        # Review counters are kept by the review viewset; recount repairs writes made around it
+        call_command("recount_profile_counters", stdout=io.StringIO())
+        self.assertEqual(Profile.objects.get(user=self.user).reviews_count, 1)
+        self.assertEqual(Profile.objects.get(user=self.user).likes_received_count, 2)
+
+    def test_liked_posts_newest_like_first(self):
+        posts = [ForumPost.objects.create(title=f"P{i}", content="x", author=self.user) for i in range(3)]
+        self.client.force_login(self.fan)
+        for post in (posts[1], posts[0], posts[2]):
+            self.client.post(f"/api/forum/posts/{post.pk}/like/")
+        rows = self.collect("/api/accounts/me/likes/?page_size=2")
+        self.assertEqual([row["id"] for row in rows], [str(posts[2].pk), str(posts[0].pk), str(posts[1].pk)])
+        self.assertTrue(all(row["isLiked"] and row["likedAt"] for row in rows))
+        sparse = self.client.get("/api/accounts/me/likes/?fields=id,title").json()["results"][0]
+        self.assertEqual(set(sparse), {"id", "title", "likedAt"})
+
+    def test_login_required(self):
+        for name in ("posts", "comments", "likes", "reviews"):
+            with self.subTest(name=name):
+                self.assertIn(self.client.get(f"/api/accounts/me/{name}/").status_code, (401, 403))
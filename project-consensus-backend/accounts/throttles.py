@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from core.ratelimit import EmailRateThrottle, IPRateThrottle
+
+
+class VerificationEmailThrottle(EmailRateThrottle):
+    """One verification code per email per `AUTH_VERIFICATION_REQUEST_INTERVAL_SECONDS`."""
+
+    scope = "verification_email"
+
+
+class VerificationIPThrottle(IPRateThrottle):
+    """Stop one client from requesting codes for many different emails."""
+
+    scope = "verification_ip"
+
+
+class RegisterIPThrottle(IPRateThrottle):
+    scope = "register_ip"
+
+
+class LoginIPThrottle(IPRateThrottle):
+    scope = "login_ip"
+
+
+class LoginEmailThrottle(EmailRateThrottle):
+    """Per-account limit against password guessing from many addresses."""
+
+    scope = "login_email"
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import activity, views
 
 
 urlpatterns = [
@@ -15,4 +15,9 @@ urlpatterns = [
     path("logout/", views.logout_view, name="logout"),
     # Current user info
     path("me/", views.me, name="me"),
+    # Current user's activity, cursor-paginated (accounts/activity.py)
+    path("me/posts/", activity.MyPostsView.as_view(), name="me-posts"),
+    path("me/comments/", activity.MyCommentsView.as_view(), name="me-comments"),
+    path("me/likes/", activity.MyLikesView.as_view(), name="me-likes"),
+    path("me/reviews/", activity.MyReviewsView.as_view(), name="me-reviews"),
 ]
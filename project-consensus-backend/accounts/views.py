@@ -8,13 +8,21 @@ from django.conf import settings
 import logging
 from django.db import transaction
 from django.core.cache import cache
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.response import Response
 from rest_framework import status
 from django.views.decorators.csrf import ensure_csrf_cookie
 
 from .models import Profile
+from .outbox import enqueue_email
 from .serializers import SendCodeSerializer, RegisterSerializer, LoginSerializer
+from .throttles import (
+    LoginEmailThrottle,
+    LoginIPThrottle,
+    RegisterIPThrottle,
+    VerificationEmailThrottle,
+    VerificationIPThrottle,
+)
 
 
 User = get_user_model()
@@ -22,35 +30,35 @@ logger = logging.getLogger(__name__)
 
 
 @api_view(["POST"])
+@throttle_classes([VerificationEmailThrottle, VerificationIPThrottle])
 def send_verification_code(request):
     """
-    Generate a verification code and store it in cache (TTL), then (in real life) send email.
+    Generate a verification code, store it in cache (TTL) and queue the email.
 
     Body: { "email": string }
+    Throttled per email (one per AUTH_VERIFICATION_REQUEST_INTERVAL_SECONDS) and per IP.
     """
     serializer = SendCodeSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     email = serializer.validated_data["email"].lower()
 
-    # throttle: allow only one request per configured window per email
-    request_interval = getattr(settings, "AUTH_VERIFICATION_REQUEST_INTERVAL_SECONDS", 60)
-    throttle_key = f"accounts:verify:throttle:{email}"
-    if cache.get(throttle_key):
-        return Response({"message": "Please wait before requesting another code."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
-
     code = f"{secrets.randbelow(999999):06d}"  # 6-digit numeric
     ttl_seconds = getattr(settings, "AUTH_VERIFICATION_CODE_TTL_SECONDS", 60 * 15)
     code_key = f"accounts:verify:code:{email}"
     cache.set(code_key, code, timeout=ttl_seconds)
-    cache.set(throttle_key, True, timeout=request_interval)
-
-    logger.warning("[PLEASE REMOVE THIS WHEN DONE WITH DEVELOPMENT] Email verification code for %s: %s", email, code)
 
-    # TODO: integrate email provider; for now return ok without exposing code
+    # Queue the email; the send_outbox_emails worker delivers it after commit
+    with transaction.atomic():
+        enqueue_email(
+            email,
+            "Your verification code",
+            f"Your verification code is {code}. It expires in {ttl_seconds // 60} minutes.",
+        )
     return Response({"success": True}, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
+@throttle_classes([RegisterIPThrottle])
 @transaction.atomic
 def register(request):
     """
@@ -99,6 +107,7 @@ def csrf(request):
 
 
 @api_view(["POST"])
+@throttle_classes([LoginIPThrottle, LoginEmailThrottle])
 def login_view(request):
     """
     Simple username/password login returning a demo token.
@@ -135,10 +144,18 @@ def logout_view(request):
 def me(request):
     if not request.user.is_authenticated:
         return Response({"message": "Not authenticated"}, status=status.HTTP_401_UNAUTHORIZED)
-    display_name = getattr(getattr(request.user, "profile", None), "display_name", None) or request.user.get_username()
+    profile = getattr(request.user, "profile", None)
+    display_name = getattr(profile, "display_name", None) or request.user.get_username()
+    # Counters are kept on the profile (accounts/counters.py): no COUNT queries here
     return Response({
         "id": str(request.user.pk),
         "email": request.user.email,
         "name": display_name,
+        "stats": {
+            "posts": getattr(profile, "posts_count", 0),
+            "comments": getattr(profile, "comments_count", 0),
+            "reviews": getattr(profile, "reviews_count", 0),
+            "likesReceived": getattr(profile, "likes_received_count", 0),
+        },
     })
 
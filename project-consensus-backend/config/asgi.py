@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# SSE streams of forum posts are served in front of Django (see forum/live.py)
+from forum.live import live_asgi  # noqa: E402  (needs the app registry)
+
+application = live_asgi(django_application)
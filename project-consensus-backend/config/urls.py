@@ -16,11 +16,17 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from core.views import health
+from core.batch import batch
+from core.views import health, db_pool_metrics, executor_metrics, prometheus_metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/health/", health),
+    path("api/metrics/", prometheus_metrics),
+    path("api/metrics/db-pool/", db_pool_metrics),
+    path("api/metrics/executors/", executor_metrics),
+    path("api/batch/", batch, name="batch"),
     path("api/accounts/", include("accounts.urls")),
     path("api/forum/", include("forum.urls")),
+    path("api/", include("courses.urls")),
 ]
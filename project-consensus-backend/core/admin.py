@@ -1,3 +1,82 @@
+from __future__ import annotations
+
 from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Read-only list of captured request profiles (see core/profiling.py)."""
+
+    list_display = ["created_at", "method", "path", "status_code", "duration_ms", "cpu_ms", "sql_count", "sql_ms", "trigger", "user"]
+    list_filter = ["trigger", "method", "status_code", "route"]
+    search_fields = ["path", "route", "view_name"]
+    date_hierarchy = "created_at"
+    list_select_related = ["user"]
+    fields = [
+        "created_at",
+        "method",
+        "path",
+        "route",
+        "view_name",
+        "status_code",
+        "trigger",
+        "user",
+        "duration_ms",
+        "cpu_ms",
+        "sql_count",
+        "sql_ms",
+        "download",
+        "profile",
+        "sql",
+    ]
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        # Keep the list page light: the blobs are only needed on the detail page
+        return super().get_queryset(request).defer("stats", "profile_text", "sql_timeline")
+
+    def get_urls(self):
+        return [
+            path(
+                "<uuid:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="core_requestprofile_download",
+            ),
+            *super().get_urls(),
+        ]
+
+    def download_view(self, request, pk):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(bytes(profile.stats), content_type="application/octet-stream")
+        response["Content-Disposition"] = f'attachment; filename="request-{profile.pk}.prof"'
+        return response
+
+    @admin.display(description="pstats file")
+    def download(self, obj):
+        url = reverse("admin:core_requestprofile_download", args=[obj.pk])
+        return format_html('<a href="{}">request-{}.prof</a> (open with snakeviz or python -m pstats)', url, obj.pk)
+
+    @admin.display(description="Profile (cumulative)")
+    def profile(self, obj):
+        return format_html("<pre style='white-space: pre; overflow-x: auto'>{}</pre>", obj.profile_text)
 
-# Register your models here.
+    @admin.display(description="SQL timeline")
+    def sql(self, obj):
+        rows = format_html_join(
+            "",
+            "<tr><td>{}</td><td>{}</td><td><code>{}</code></td></tr>",
+            ((entry["start_ms"], entry["duration_ms"], entry["sql"]) for entry in obj.sql_timeline),
+        )
+        return format_html("<table><tr><th>start ms</th><th>ms</th><th>SQL</th></tr>{}</table>", rows)
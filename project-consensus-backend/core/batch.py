@@ -0,0 +1,167 @@
+"""
+`POST /api/batch/`: several GET requests in one round trip.
+
+- Body: `{"requests": [{"id": "me", "path": "/api/accounts/me/"},
+  {"path": "/api/forum/comments/?mainCommentId=..."}]}`; `method` may be
+  given but must be "GET". Answer: `{"responses": [{"id", "status",
+  "headers", "body"}]}` in request order (`id` defaults to the position).
+- Sub-requests are resolved through the URL conf and call the views in this
+  process, one after another. The middleware chain (session, CSRF,
+  authentication, metrics) runs once for the batch: every sub-request shares
+  its session and the user DRF authenticated for it, so the session row, the
+  user and `user.profile` are loaded at most once and credentials are checked
+  once. View permissions and throttles still apply per sub-request.
+- Limits: BATCH_MAX_REQUESTS sub-requests per batch (else 400); once the
+  batch has run BATCH_TIMEOUT_SECONDS, the remaining ones answer 504 without
+  running; a response that does not fit in what is left of
+  BATCH_MAX_RESPONSE_BYTES answers 413. Streaming responses answer 400.
+  Clients retry those on their own.
+- Query budgets and N+1 checks apply per sub-request (its own url name);
+  `http_batch_subrequests_total` counts them by route and status.
+- Cookies and headers set by sub-responses are dropped, except `Retry-After`.
+- A read: the POST does not pin the client to the primary database.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, get_script_prefix, resolve
+from rest_framework import serializers, status
+from rest_framework.decorators import api_view
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from . import metrics
+from .querybudget import QueryBudgetExceeded, QueryRecorder, report
+
+
+logger = logging.getLogger(__name__)
+
+# Sub-response headers worth passing on; the rest describe the transport
+FORWARDED_HEADERS = ("Content-Type", "Retry-After")
+# Request headers that describe the batch POST itself, not the GETs
+_BODY_META = ("CONTENT_LENGTH", "CONTENT_TYPE", "HTTP_CONTENT_LENGTH", "HTTP_CONTENT_TYPE")
+
+
+class SubRequestSerializer(serializers.Serializer):
+    id = serializers.CharField(required=False, max_length=64)
+    method = serializers.ChoiceField(choices=["GET"], default="GET")
+    path = serializers.CharField(max_length=2048)
+
+    def validate_path(self, value: str) -> str:
+        url = urlsplit(value)
+        if url.scheme or url.netloc or not url.path.startswith("/api/"):
+            raise serializers.ValidationError("Expected a path under /api/.")
+        if url.path.rstrip("/") == "/api/batch":
+            raise serializers.ValidationError("Batches cannot be nested.")
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value: list) -> list:
+        limit = settings.BATCH_MAX_REQUESTS
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} requests per batch.")
+        return value
+
+
+def _subrequest(request: Request, path: str) -> HttpRequest:
+    """A GET for `path` carrying the batch request's session, user and headers."""
+
+    parent = request._request
+    url = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = "GET"
+    sub.path = url.path
+    prefix = get_script_prefix()
+    sub.path_info = "/" + url.path[len(prefix) :] if url.path.startswith(prefix) else url.path
+    sub.META = {key: value for key, value in parent.META.items() if key not in _BODY_META}
+    sub.META.update(REQUEST_METHOD="GET", PATH_INFO=sub.path_info, QUERY_STRING=url.query)
+    sub.GET = QueryDict(url.query)
+    sub.COOKIES = parent.COOKIES
+    # Shared, not copied: loaded once (by the middleware) for the whole batch
+    sub.session = parent.session
+    sub.user = parent.user
+    if request.user.is_authenticated:
+        # DRF's hook for a pre-authenticated request: its views skip their
+        # authentication classes (no second password check for Basic auth)
+        sub._force_auth_user, sub._force_auth_token = request.user, request.auth
+    return sub
+
+
+def _error(message: str, code: int) -> tuple[int, dict, object, int]:
+    return code, {"Content-Type": "application/json"}, {"detail": message}, 0
+
+
+def _run(request: Request, path: str, room: int) -> tuple[int, dict, object, int, str | None]:
+    """(status, headers, body, body size, route) of one GET sub-request."""
+
+    sub = _subrequest(request, path)
+    try:
+        match = resolve(sub.path_info, urlconf=getattr(request._request, "urlconf", None))
+    except Resolver404:
+        return (*_error("Not found.", status.HTTP_404_NOT_FOUND), None)
+    sub.resolver_match = match
+    route = match.route.rstrip("$")
+
+    recorder = QueryRecorder()
+    try:
+        with recorder.capture():
+            response = match.func(sub, *match.args, **match.kwargs)
+            if hasattr(response, "render"):
+                response.render()
+    except Http404:
+        return (*_error("Not found.", status.HTTP_404_NOT_FOUND), route)
+    except PermissionDenied:
+        return (*_error("Forbidden.", status.HTTP_403_FORBIDDEN), route)
+    except QueryBudgetExceeded:
+        raise
+    except Exception:
+        logger.exception("Batch sub-request GET %s failed", path)
+        return (*_error("Server error.", status.HTTP_500_INTERNAL_SERVER_ERROR), route)
+    report(recorder, "GET", sub.path, match.view_name)
+
+    if response.streaming:
+        response.close()
+        return (*_error("Streaming responses cannot be batched.", status.HTTP_400_BAD_REQUEST), route)
+    size = len(response.content)
+    if size > room:
+        return (*_error("Response too large for this batch; request it separately.", 413), route)
+    headers = {name: response[name] for name in FORWARDED_HEADERS if response.has_header(name)}
+    body = response.content.decode(response.charset or "utf-8")
+    if headers.get("Content-Type", "").startswith("application/json") and body:
+        body = json.loads(body)
+    return response.status_code, headers, body, size, route
+
+
+@api_view(["POST"])
+def batch(request: Request):
+    """Run up to BATCH_MAX_REQUESTS GET requests and return their responses together."""
+
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    request._request.query_budget_checked = True
+
+    deadline = time.monotonic() + settings.BATCH_TIMEOUT_SECONDS
+    room = settings.BATCH_MAX_RESPONSE_BYTES
+    responses = []
+    for position, item in enumerate(serializer.validated_data["requests"]):
+        if time.monotonic() > deadline:
+            code, headers, body, size = _error("Batch time limit reached; request it separately.", 504)
+            route = None
+        else:
+            code, headers, body, size, route = _run(request, item["path"], room)
+            room -= size
+        if settings.METRICS_ENABLED:
+            metrics.BATCH_SUBREQUESTS.labels(route or "<unmatched>", str(code)).inc()
+        responses.append({"id": item.get("id", str(position)), "status": code, "headers": headers, "body": body})
+    return Response({"responses": responses})
@@ -0,0 +1,50 @@
+"""
+System checks for settings that only work with a cache shared by every worker.
+"""
+
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+
+# Backends whose entries live in one process (or nowhere)
+PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_shared_cache(alias: str = "default") -> bool:
+    """Whether the cache `alias` is visible to every worker process."""
+
+    return settings.CACHES[alias]["BACKEND"] not in PER_PROCESS_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if is_shared_cache(getattr(settings, "RATELIMIT_CACHE_ALIAS", "default")):
+        return []
+    return [
+        Warning(
+            "The default cache is per process: rate limits, cached sessions and live "
+            "event fan-out only hold within one worker.",
+            hint="Set CACHE_URL to a shared cache, e.g. redis://localhost:6379/0.",
+            id="core.W001",
+        )
+    ]
+
+
+@register(Tags.caches)
+def check_post_views_cache(app_configs, **kwargs):
+    # The flush job runs in another process than the workers buffering views
+    if not getattr(settings, "FORUM_VIEWS_ENABLED", False) or is_shared_cache():
+        return []
+    return [
+        Error(
+            "FORUM_VIEWS_ENABLED needs a shared cache: with a per-process cache the "
+            "flush_post_views job never sees the workers' views.",
+            hint="Set CACHE_URL to a shared cache, e.g. redis://localhost:6379/0, or FORUM_VIEWS_ENABLED=False.",
+            id="core.E001",
+        )
+    ]
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from django.db import connections
+
+
+def pool_stats() -> dict[str, dict]:
+    """Return psycopg pool statistics for every pooled database alias.
+
+    Counters are cumulative since the pool was opened and local to the current
+    worker process. Aliases without pooling (or not on PostgreSQL) are skipped.
+    """
+
+    result: dict[str, dict] = {}
+    for conn in connections.all():
+        pool = getattr(conn, "pool", None)
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        size = stats.get("pool_size", 0)
+        idle = stats.get("pool_available", 0)
+        result[conn.alias] = {
+            "min_size": stats.get("pool_min", 0),
+            "max_size": stats.get("pool_max", 0),
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": stats.get("requests_waiting", 0),
+            "requests": stats.get("requests_num", 0),
+            "waits": stats.get("requests_queued", 0),
+            "wait_ms": stats.get("requests_wait_ms", 0),
+            "wait_errors": stats.get("requests_errors", 0),
+            "connections_opened": stats.get("connections_num", 0),
+            "connections_lost": stats.get("connections_lost", 0),
+            "returns_bad": stats.get("returns_bad", 0),
+        }
+    return result
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Whether reads in the current request/task may go to a replica. Off unless a
+# request opts in, so commands, jobs and other code read their own writes.
+# A ContextVar keeps the flag isolated per thread (WSGI) and per task (ASGI).
+_replica_reads: ContextVar[bool] = ContextVar("core_replica_reads", default=False)
+
+
+def replica_aliases() -> list[str]:
+    """Return the configured replica aliases (empty when replicas are disabled)."""
+
+    return getattr(settings, "DATABASE_REPLICA_ALIASES", [])
+
+
+def replica_reads_allowed() -> bool:
+    return _replica_reads.get()
+
+
+@contextmanager
+def replica_reads(allowed: bool = True):
+    """Let reads in the enclosed block go to a replica (or keep them on the primary).
+
+    Used by `ReadYourWritesMiddleware` for the scope of a safe request from a
+    client without a live pin.
+    """
+
+    token = _replica_reads.set(allowed)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Send reads to a replica and writes to `default`.
+
+    Rules:
+    - Writes always go to `default` (the primary).
+    - Reads go to `default` too unless the code runs under `replica_reads()`
+      (safe requests, see `ReadYourWritesMiddleware`); then to a random
+      replica, unless a transaction is open on `default`.
+    - Reads through an instance that was loaded from a given alias stay there,
+      so related lookups see a consistent snapshot.
+    - Only `default` receives migrations; replicas follow via replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see its uncommitted writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # All aliases hold the same data, so cross-alias relations are fine
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
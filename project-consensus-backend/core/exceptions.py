@@ -0,0 +1,30 @@
+"""
+DRF exception handler (`REST_FRAMEWORK["EXCEPTION_HANDLER"]`).
+
+Maps the plain exceptions raised below the API layer to HTTP responses and
+leaves everything else to DRF's default handler:
+
+- `ExecutorSaturated` (core/executors.py) -> 503 with `Retry-After`.
+"""
+
+from __future__ import annotations
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from .executors import ExecutorSaturated
+
+
+class ServiceBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Server is busy, please retry shortly."
+    default_code = "executor_saturated"
+
+
+def exception_handler(exc, context):
+    if isinstance(exc, ExecutorSaturated):
+        busy = ServiceBusy()
+        busy.wait = exc.retry_after  # DRF sends it as Retry-After
+        exc = busy
+    return drf_exception_handler(exc, context)
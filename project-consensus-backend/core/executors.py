@@ -0,0 +1,128 @@
+"""
+Bounded thread-pool executors for CPU-heavy work done on behalf of requests.
+
+A `BoundedExecutor` runs at most `max_workers` tasks at once and admits at
+most `max_queue` more waiting behind them. A caller that cannot be admitted
+within `queue_timeout` seconds gets `ExecutorSaturated` instead of piling up
+(HTTP 503 through DRF, see core/exceptions.py), so a burst of expensive work cannot occupy every CPU core.
+
+Limitation: `run()` blocks the calling (WSGI request) thread until the task
+is done, i.e. for up to `queue_timeout` waiting for admission, then the wait
+behind the tasks ahead of it (at most `max_queue / max_workers` task
+durations) plus its own run. The pool bounds CPU concurrency and sheds load
+past `max_workers + max_queue` callers; it does not free request threads.
+Keep `max_queue` and `queue_timeout` small so waiting callers stay few and
+short; `stats()["queue_wait_ms"]` shows how long they actually wait.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorSaturated(Exception):
+    """No executor slot freed up in time.
+
+    A plain exception so callers outside DRF (admin login, `createsuperuser`)
+    do not depend on the API layer; DRF views answer it with HTTP 503.
+    """
+
+    retry_after = 1  # seconds
+
+    def __init__(self, name: str):
+        super().__init__(f"Executor {name!r} is saturated.")
+        self.name = name
+
+
+# name -> executor, for metrics endpoints
+_registry: dict[str, "BoundedExecutor"] = {}
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._admission = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "in_flight": 0,  # admitted: running + queued
+            "running": 0,
+            "max_running": 0,
+            "queue_wait_ms": 0.0,
+            "run_ms": 0.0,
+        }
+        _registry[name] = self
+
+    def run(self, fn, *args, **kwargs):
+        """Run `fn` on the pool and return its result (blocking the caller).
+
+        Raises `ExecutorSaturated` when no slot frees up within `queue_timeout`.
+        Nested calls from a pool thread run inline instead of deadlocking.
+        """
+
+        if getattr(self._local, "on_worker", False):
+            return fn(*args, **kwargs)
+        requested_at = time.perf_counter()
+        if not self._admission.acquire(timeout=self.queue_timeout):
+            self._bump(rejected=1)
+            raise ExecutorSaturated(self.name)
+        self._bump(submitted=1, in_flight=1)
+        try:
+            future = self._pool.submit(self._timed, requested_at, fn, args, kwargs)
+            result = future.result()
+        except Exception:
+            self._bump(failed=1)
+            raise
+        finally:
+            self._bump(in_flight=-1)
+            self._admission.release()
+        self._bump(completed=1)
+        return result
+
+    def _timed(self, requested_at: float, fn, args, kwargs):
+        started_at = time.perf_counter()
+        self._local.on_worker = True
+        self._bump(running=1)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._local.on_worker = False
+            finished_at = time.perf_counter()
+            self._bump(running=-1, queue_wait_ms=(started_at - requested_at) * 1000, run_ms=(finished_at - started_at) * 1000)
+
+    def _bump(self, **deltas) -> None:
+        with self._lock:
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+            self._stats["max_running"] = max(self._stats["max_running"], self._stats["running"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot.update(
+            max_workers=self.max_workers,
+            max_queue=self.max_queue,
+            queue_timeout=self.queue_timeout,
+        )
+        return snapshot
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+        if _registry.get(self.name) is self:
+            del _registry[self.name]
+
+
+def executor_stats() -> dict[str, dict]:
+    """Return stats of every live executor in this process."""
+
+    return {name: executor.stats() for name, executor in list(_registry.items())}
@@ -0,0 +1,312 @@
+"""
+Background jobs on the database: no broker, `python manage.py run_worker`.
+
+- Tasks are functions registered with `@task("app.name")` in an app's
+  `jobs.py` (loaded by `discover()`); `enqueue()` / `Task.enqueue()` insert a
+  `Job` row, inside the caller's transaction, so a job never starts before
+  the write that asked for it has committed (and is gone if it rolled back).
+  `run_at` schedules it for later; `key` keeps one pending/running job per key.
+- Workers claim the oldest due pending row with `SELECT ... FOR UPDATE SKIP
+  LOCKED` in a short transaction, mark it running under a lease
+  (JOBS_LEASE_SECONDS, or the task's own) and run the task outside any
+  transaction, so several workers (and JOBS_CONCURRENCY threads each) never
+  take the same job and a long job holds no row locks. Running rows whose
+  lease expired (a crashed worker) go back to pending.
+- Success deletes the row; an exception retries it with exponential backoff
+  (JOBS_BACKOFF_SECONDS * 2**(attempts - 1), capped at an hour) until
+  `max_attempts`, then leaves it `failed` with its `last_error`.
+- Periodic jobs (JOBS_PERIODIC: task name -> seconds, 0 turns one off) are
+  one row each, created by `ensure_periodic()` when a worker starts and
+  re-armed for the next interval after every run, failed or not.
+- Metrics: `jobs_processed_total` (task, outcome), `job_queue_latency_seconds`
+  (due time to start) and `job_duration_seconds` from the workers
+  (`run_worker --metrics-port`); queue depth and the age of the oldest due
+  job per task are read from the table at scrape time (`/api/metrics/`).
+- Claims use a guarded UPDATE as well, so the queue also works (serially)
+  on SQLite, which has no row locks.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from . import metrics
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: Callable[..., object]
+    max_attempts: int | None = None
+    lease_seconds: int | None = None
+
+    def __call__(self, **payload):
+        """Run inline, in this process."""
+
+        return self.func(**payload)
+
+    def enqueue(self, run_at: datetime | None = None, key: str | None = None, **payload) -> Job:
+        return enqueue(self.name, payload, run_at=run_at, key=key)
+
+
+# name -> task, filled by `@task` when the apps' jobs.py modules are imported
+TASKS: dict[str, Task] = {}
+
+
+def task(name: str, max_attempts: int | None = None, lease_seconds: int | None = None):
+    """Register a function as the task `name`; the decorated name becomes a `Task`."""
+
+    def register(func: Callable[..., object]) -> Task:
+        if name in TASKS and TASKS[name].func is not func:
+            raise ValueError(f"Task {name!r} is already registered")
+        TASKS[name] = Task(name, func, max_attempts, lease_seconds)
+        return TASKS[name]
+
+    return register
+
+
+def discover() -> None:
+    """Import every installed app's `jobs` module."""
+
+    autodiscover_modules("jobs")
+
+
+def enqueue(name: str, payload: dict | None = None, run_at: datetime | None = None, key: str | None = None) -> Job:
+    """Insert a job; with `key`, return the pending/running job of that key instead when there is one."""
+
+    task = TASKS.get(name)
+    job = Job(
+        name=name,
+        payload=payload or {},
+        key=key,
+        run_at=run_at or timezone.now(),
+        max_attempts=(task and task.max_attempts) or settings.JOBS_MAX_ATTEMPTS,
+    )
+    if key is None:
+        job.save()
+        return job
+    while True:
+        try:
+            with transaction.atomic():
+                job.save()
+            return job
+        except IntegrityError:
+            existing = Job.objects.filter(key=key, status__in=[Job.Status.PENDING, Job.Status.RUNNING]).first()
+            if existing is not None:
+                return existing
+            # The job holding the key finished in between: the key is free again
+
+
+def ensure_periodic(schedule: dict[str, int] | None = None) -> int:
+    """Create the rows of periodic jobs that have none; returns how many were created.
+
+    Intervals follow the schedule; pending periodic jobs no longer in it, or
+    with an interval of 0 (off), are deleted.
+    """
+
+    schedule = settings.JOBS_PERIODIC if schedule is None else schedule
+    schedule = {name: seconds for name, seconds in schedule.items() if seconds > 0}
+    Job.objects.filter(key__startswith="periodic:", status=Job.Status.PENDING).exclude(
+        key__in=[f"periodic:{name}" for name in schedule]
+    ).delete()
+    created = 0
+    for name, seconds in schedule.items():
+        key = f"periodic:{name}"
+        updated = Job.objects.filter(key=key, status__in=[Job.Status.PENDING, Job.Status.RUNNING]).update(
+            periodic_seconds=seconds
+        )
+        if not updated:
+            job = enqueue(name, key=key)
+            created += Job.objects.filter(pk=job.pk, periodic_seconds=None).update(periodic_seconds=seconds)
+    return created
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: base * 2^(attempts-1), capped at one hour."""
+
+    return timedelta(seconds=min(settings.JOBS_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), 60 * 60))
+
+
+def requeue_expired() -> int:
+    """Put running jobs whose lease expired back to pending; returns how many."""
+
+    return Job.objects.filter(status=Job.Status.RUNNING, lease_expires_at__lt=timezone.now()).update(
+        status=Job.Status.PENDING, locked_by="", lease_expires_at=None
+    )
+
+
+def claim(worker: str) -> Job | None:
+    """Take the oldest due pending job for `worker`, or None when there is none."""
+
+    while True:
+        with transaction.atomic():
+            now = timezone.now()
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status=Job.Status.PENDING, run_at__lte=now)
+                .order_by("run_at", "pk")
+                .first()
+            )
+            if job is None:
+                return None
+            task = TASKS.get(job.name)
+            lease = (task and task.lease_seconds) or settings.JOBS_LEASE_SECONDS
+            job.status, job.locked_by, job.started_at = Job.Status.RUNNING, worker, now
+            job.lease_expires_at = now + timedelta(seconds=lease)
+            job.attempts += 1
+            # Guarded: without row locks (SQLite) another worker may have won
+            if Job.objects.filter(pk=job.pk, status=Job.Status.PENDING).update(
+                status=job.status,
+                locked_by=worker,
+                started_at=now,
+                lease_expires_at=job.lease_expires_at,
+                attempts=job.attempts,
+            ):
+                return job
+
+
+def _finish(job: Job, **fields) -> None:
+    # Only while it is still ours: after a lost lease another worker owns the row
+    mine = Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, locked_by=job.locked_by)
+    if fields.pop("delete", False):
+        mine.delete()
+    else:
+        mine.update(locked_by="", lease_expires_at=None, **fields)
+
+
+def _rearm(job: Job, last_error: str) -> None:
+    now = timezone.now()
+    # run() treats an interval of 0 as a one-off job; never divide by it here either
+    interval = timedelta(seconds=max(job.periodic_seconds, 1))
+    # Next slot after now, on the job's own grid
+    run_at = job.run_at + interval * max(1, (now - job.run_at) // interval + 1)
+    _finish(job, status=Job.Status.PENDING, run_at=run_at, attempts=0, last_error=last_error)
+
+
+def run(job: Job) -> str:
+    """Run a claimed job and record the outcome: "done", "retried" or "failed"."""
+
+    started = time.perf_counter()
+    error = ""
+    try:
+        task = TASKS.get(job.name)
+        if task is None:
+            raise LookupError(f"No task registered as {job.name!r}")
+        task.func(**job.payload)
+    except Exception as exc:
+        logger.exception("Job %s #%s failed (attempt %d)", job.name, job.pk, job.attempts)
+        error = f"{type(exc).__name__}: {exc}"
+    duration = time.perf_counter() - started
+
+    if job.periodic_seconds:
+        if error and job.attempts < job.max_attempts:
+            outcome = "retried"
+            _finish(job, status=Job.Status.PENDING, run_at=timezone.now() + retry_delay(job.attempts), last_error=error)
+        else:
+            outcome = "failed" if error else "done"
+            _rearm(job, error)
+    elif not error:
+        outcome = "done"
+        _finish(job, delete=True)
+    elif job.attempts < job.max_attempts:
+        outcome = "retried"
+        _finish(job, status=Job.Status.PENDING, run_at=timezone.now() + retry_delay(job.attempts), last_error=error)
+    else:
+        outcome = "failed"
+        _finish(job, status=Job.Status.FAILED, last_error=error)
+
+    if settings.METRICS_ENABLED:
+        metrics.JOBS_PROCESSED.labels(job.name, outcome).inc()
+        metrics.JOB_QUEUE_LATENCY.labels(job.name).observe(max((job.started_at - job.run_at).total_seconds(), 0))
+        metrics.JOB_DURATION.labels(job.name).observe(duration)
+    return outcome
+
+
+def queue_stats() -> list[tuple[str, str, int, float]]:
+    """(task, status, jobs, oldest due age in seconds) per task and status; one query."""
+
+    now = timezone.now()
+    rows = Job.objects.order_by().values_list("name", "status").annotate(n=Count("pk"), oldest=Min("run_at"))
+    return [(name, status, n, max((now - oldest).total_seconds(), 0.0)) for name, status, n, oldest in rows]
+
+
+@dataclass
+class WorkerReport:
+    outcomes: dict[str, int] = field(default_factory=lambda: {"done": 0, "retried": 0, "failed": 0})
+
+
+class Worker:
+    """JOBS_CONCURRENCY threads claiming and running jobs until stopped."""
+
+    def __init__(self, concurrency: int | None = None, poll_interval: float | None = None, once: bool = False):
+        self.concurrency = concurrency or settings.JOBS_CONCURRENCY
+        self.poll_interval = settings.JOBS_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.once = once
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stop = threading.Event()
+        self.report = WorkerReport()
+        self._lock = threading.Lock()
+
+    def _loop(self, thread: int) -> None:
+        worker = f"{self.name}:{thread}"
+        try:
+            while not self.stop.is_set():
+                try:
+                    close_old_connections()
+                    job = claim(worker)
+                    if job is None:
+                        if self.once:
+                            return
+                        requeue_expired()
+                        self.stop.wait(self.poll_interval)
+                        continue
+                    outcome = run(job)
+                except Exception:
+                    # E.g. the database restarting: keep the thread, retry after a pause.
+                    # A job claimed before the error goes back to pending when its lease expires
+                    logger.exception("Job worker %s failed; retrying in %.1fs", worker, self.poll_interval)
+                    connections.close_all()
+                    self.stop.wait(self.poll_interval)
+                    continue
+                with self._lock:
+                    self.report.outcomes[outcome] += 1
+        finally:
+            connections.close_all()
+
+    def run(self) -> WorkerReport:
+        """Block until `stop` is set (or, with `once`, until no job is due)."""
+
+        requeue_expired()
+        threads = [
+            threading.Thread(target=self._loop, args=(i,), name=f"job-worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            # Running jobs finish; nothing new is claimed
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+        return self.report
@@ -0,0 +1,578 @@
+"""
+HTTP load benchmark against a real server process.
+
+- Starts the app (`runserver` by default, or `--server-cmd`, e.g. gunicorn)
+  on a free local port against the configured database, or targets an
+  already running server with `--url` (it must use the same database).
+- `--concurrency` virtual users each loop over a weighted traffic mix:
+  anonymous feed browsing, thread reading, course browsing, and logged-in
+  liking, commenting and logging in.
+- Reports per endpoint (Django route pattern): requests, throughput,
+  p50/p95/p99 latency, status codes, and SQL queries per request (read
+  from the server's /api/metrics/ histograms) as JSON.
+- `--compare old.json` prints throughput/p95 changes against an earlier run.
+- Not in the default mix: `page` and `page_batch` load the same SPA page
+  (me, feed, a thread with its busiest reply lists, course list) as
+  separate GETs or as two `POST /api/batch/` calls; each page load is also
+  reported as a whole ("PAGE separate" / "PAGE batch"), e.g.
+  `--mix page=1,page_batch=1`. Latencies exclude TLS and network round
+  trips, which each separate call pays on top.
+
+Seed the database first, e.g. `python manage.py generate_dataset --scale 10`;
+logged-in scenarios use those users (`--prefix`, `--password`).
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import math
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import Resolver404, resolve
+from prometheus_client.parser import text_string_to_metric_families
+
+from courses.models import Course
+from forum.models import ForumPost
+
+
+DEFAULT_MIX = "browse=40,thread=25,courses=15,like=10,comment=5,login=5"
+SCENARIOS = ("browse", "thread", "courses", "like", "comment", "login", "page", "page_batch")
+# A page load: independent GETs first, then up to PAGE_REPLY_LISTS reply lists
+PAGE_REPLY_LISTS = 3
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Spawned servers run without throttles: the benchmark comes from one address
+UNTHROTTLED_ENV = {
+    "THROTTLE_VERIFICATION_IP": "1000000/min",
+    "THROTTLE_REGISTER_IP": "1000000/min",
+    "THROTTLE_LOGIN_IP": "1000000/min",
+    "THROTTLE_LOGIN_EMAIL": "1000000/min",
+    "THROTTLE_FORUM_WRITE": "1000000/min",
+}
+
+
+def parse_mix(raw: str) -> dict[str, float]:
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise CommandError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of an ascending list."""
+
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def route_label(method: str, path: str) -> str:
+    """"GET api/forum/posts/<pk>/"-style label, matching MetricsMiddleware's route label."""
+
+    try:
+        route = resolve(urlsplit(path).path).route.rstrip("$")
+    except Resolver404:
+        route = "<unmatched>"
+    return f"{method} {route}"
+
+
+class HttpSession:
+    """Keep-alive HTTP/1.1 connection with its own cookie jar.
+
+    Cookies are kept regardless of the Secure flag, because the benchmark
+    talks plain HTTP to a server that may run with DEBUG=False.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 30.0):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.cookies: dict[str, str] = {}
+        self.conn: http.client.HTTPConnection | None = None
+
+    def request(self, method: str, path: str, body: dict | None = None) -> tuple[int, bytes]:
+        headers = {"Accept": "application/json"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        if method in UNSAFE_METHODS and "csrftoken" in self.cookies:
+            headers["X-CSRFToken"] = self.cookies["csrftoken"]
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=payload, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, ConnectionError, socket.timeout):
+                # The server closed an idle keep-alive connection: reconnect once
+                self.close()
+                if attempt == 2:
+                    raise
+                continue
+            for header in response.headers.get_all("Set-Cookie") or []:
+                jar = SimpleCookie()
+                jar.load(header)
+                for name, morsel in jar.items():
+                    if morsel["max-age"] == "0" or not morsel.value:
+                        self.cookies.pop(name, None)
+                    else:
+                        self.cookies[name] = morsel.value
+            if response.getheader("Connection", "").lower() == "close":
+                self.close()
+            return response.status, data
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class Stats:
+    """Thread-safe latency/status collection per endpoint label."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.recording = False
+
+    def add(self, label: str, status: int, ms: float) -> None:
+        if not self.recording:
+            return
+        with self.lock:
+            self.latencies[label].append(ms)
+            self.statuses[label][status] += 1
+
+
+class VirtualUser:
+    """One simulated client looping over the traffic mix."""
+
+    def __init__(self, index: int, bench: "Command", credentials: tuple[str, str] | None):
+        self.bench = bench
+        self.rng = random.Random(bench.seed * 1_000 + index)
+        self.session = HttpSession(bench.host, bench.port)
+        self.credentials = credentials
+        self.logged_in = False
+
+    # --- plumbing ------------------------------------------------------------
+
+    def call(self, method: str, path: str, body: dict | None = None, session: HttpSession | None = None):
+        started = time.perf_counter()
+        try:
+            status, data = (session or self.session).request(method, path, body)
+        except OSError:
+            status, data = 599, b""
+        self.bench.stats.add(route_label(method, path), status, (time.perf_counter() - started) * 1000)
+        if status >= 400 or not data:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def ensure_login(self) -> bool:
+        if self.logged_in:
+            return True
+        if self.credentials is None:
+            return False
+        email, password = self.credentials
+        self.session.request("GET", "/api/accounts/csrf/")
+        status, _ = self.session.request("POST", "/api/accounts/login/", {"email": email, "password": password})
+        self.logged_in = status == 200
+        return self.logged_in
+
+    def post_id(self) -> str:
+        return str(self.rng.choice(self.bench.post_ids))
+
+    @staticmethod
+    def results(data) -> list:
+        if isinstance(data, dict):
+            return data.get("results") or []
+        return data or []
+
+    # --- scenarios -----------------------------------------------------------
+
+    def browse(self):
+        page = min(int(self.rng.paretovariate(1.2)), self.bench.max_page)
+        self.call("GET", f"/api/forum/posts/?page={page}")
+
+    def thread(self):
+        post_id = self.post_id()
+        self.call("GET", f"/api/forum/posts/{post_id}/")
+        mains = self.results(self.call("GET", f"/api/forum/comments/?postId={post_id}&isMain=1"))
+        busy = [c for c in mains if c.get("repliesCount")]
+        if busy:
+            self.call("GET", f"/api/forum/comments/?mainCommentId={self.rng.choice(busy)['id']}")
+
+    def courses(self):
+        self.call("GET", "/api/courses/")
+        if not self.bench.course_ids:
+            return
+        reviews = self.results(self.call("GET", f"/api/reviews/?course={self.rng.choice(self.bench.course_ids)}"))
+        if reviews:
+            self.call("GET", f"/api/replies/?review={self.rng.choice(reviews)['id']}")
+
+    def like(self):
+        if not self.ensure_login():
+            return self.browse()
+        post_id = self.post_id()
+        self.call("POST", f"/api/forum/posts/{post_id}/like/")
+        self.call("POST", f"/api/forum/posts/{post_id}/unlike/")
+
+    def comment(self):
+        if not self.ensure_login():
+            return self.thread()
+        post_id = self.post_id()
+        mains = self.results(self.call("GET", f"/api/forum/comments/?postId={post_id}&isMain=1"))
+        body = {"postId": post_id, "content": f"Benchmark comment {self.rng.getrandbits(32):08x}"}
+        if mains and self.rng.random() < 0.6:
+            body["parentId"] = self.rng.choice(mains)["id"]
+        self.call("POST", "/api/forum/comments/", body)
+
+    def login(self):
+        if self.credentials is None:
+            return self.browse()
+        email, password = self.rng.choice(self.bench.credentials)
+        fresh = HttpSession(self.bench.host, self.bench.port)
+        try:
+            if self.call("POST", "/api/accounts/login/", {"email": email, "password": password}, session=fresh):
+                self.call("GET", "/api/accounts/me/", session=fresh)
+        finally:
+            fresh.close()
+
+    def _page_paths(self, post_id: str) -> dict[str, str]:
+        return {
+            "me": "/api/accounts/me/",
+            "feed": "/api/forum/posts/",
+            "post": f"/api/forum/posts/{post_id}/",
+            "mains": f"/api/forum/comments/?postId={post_id}&isMain=1",
+            "courses": "/api/courses/",
+        }
+
+    @staticmethod
+    def _reply_paths(mains: list) -> list[str]:
+        busy = [c for c in mains if c.get("repliesCount")][:PAGE_REPLY_LISTS]
+        return [f"/api/forum/comments/?mainCommentId={c['id']}" for c in busy]
+
+    def page(self):
+        self.ensure_login()
+        started = time.perf_counter()
+        mains = []
+        for key, path in self._page_paths(self.post_id()).items():
+            data = self.call("GET", path)
+            if key == "mains":
+                mains = self.results(data)
+        for path in self._reply_paths(mains):
+            self.call("GET", path)
+        self.bench.stats.add("PAGE separate", 200, (time.perf_counter() - started) * 1000)
+
+    def page_batch(self):
+        self.ensure_login()
+        started = time.perf_counter()
+        paths = self._page_paths(self.post_id())
+        data = self.call("POST", "/api/batch/", {"requests": [{"id": k, "path": p} for k, p in paths.items()]})
+        responses = {r["id"]: r for r in (data or {}).get("responses", [])}
+        replies = self._reply_paths(self.results(responses.get("mains", {}).get("body")))
+        if replies:
+            self.call("POST", "/api/batch/", {"requests": [{"path": path} for path in replies]})
+        status = 200 if data is not None else 599
+        self.bench.stats.add("PAGE batch", status, (time.perf_counter() - started) * 1000)
+
+    def run(self, deadline: float) -> None:
+        names = list(self.bench.mix)
+        weights = list(self.bench.mix.values())
+        try:
+            while time.monotonic() < deadline:
+                getattr(self, self.rng.choices(names, weights)[0])()
+        finally:
+            self.session.close()
+
+
+class Command(BaseCommand):
+    help = "Drive a realistic HTTP traffic mix at a server and report throughput, latency percentiles and queries/request as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Benchmark a running server (same database) instead of starting one")
+        parser.add_argument(
+            "--server-cmd",
+            help="Command to start the server, '{bind}' is replaced by host:port "
+            "(default: manage.py runserver), e.g. \"gunicorn config.wsgi -w 4 -b {bind}\"",
+        )
+        parser.add_argument("--concurrency", type=int, default=8, help="Virtual users (default 8)")
+        parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds (default 30)")
+        parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before (default 5)")
+        parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default {DEFAULT_MIX})")
+        parser.add_argument("--prefix", default="load", help="generate_dataset prefix of the users to log in as")
+        parser.add_argument("--password", default="Load1234!")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+        parser.add_argument("--compare", help="Earlier JSON report to compare against")
+
+    def handle(self, *args, **options):
+        self.mix = parse_mix(options["mix"])
+        self.seed = options["seed"]
+        self.stats = Stats()
+        self._load_pools(options)
+
+        server = None
+        try:
+            if options["url"]:
+                parts = urlsplit(options["url"])
+                self.host, self.port = parts.hostname, parts.port or 80
+                server_label = options["url"]
+            else:
+                server, server_label = self._start_server(options["server_cmd"])
+            report = self._run(options, server_label)
+        finally:
+            if server is not None:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            Path(options["output"]).write_text(text + "\n")
+        else:
+            self.stdout.write(text)
+        self._print_summary(report)
+        if options["compare"]:
+            self._print_comparison(json.loads(Path(options["compare"]).read_text()), report)
+
+    # --- setup ---------------------------------------------------------------
+
+    def _load_pools(self, options) -> None:
+        recent = ForumPost.objects.order_by("-created_at").values_list("pk", flat=True)[:500]
+        popular = ForumPost.objects.order_by("-likes_count").values_list("pk", flat=True)[:500]
+        self.post_ids = list(dict.fromkeys([*recent, *popular]))
+        if not self.post_ids:
+            raise CommandError("No forum posts; seed the database first (python manage.py generate_dataset).")
+        self.max_page = max(1, min(50, ForumPost.objects.count() // 12))
+        self.course_ids = list(Course.objects.order_by("-rating_reviews_count").values_list("pk", flat=True)[:500])
+        usernames = (
+            get_user_model()
+            .objects.filter(username__startswith=f"{options['prefix']}-")
+            .order_by("pk")
+            .values_list("username", flat=True)[: max(options["concurrency"] * 4, 100)]
+        )
+        self.credentials = [(name, options["password"]) for name in usernames]
+        if not self.credentials and any(self.mix.get(name) for name in ("like", "comment", "login")):
+            self.stderr.write(
+                f"No '{options['prefix']}-*' users: like/comment/login fall back to anonymous scenarios."
+            )
+        # Worker threads resolve routes but never query; free this connection
+        connection.close()
+
+    def _start_server(self, server_cmd: str | None):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.host, self.port = "127.0.0.1", sock.getsockname()[1]
+        bind = f"{self.host}:{self.port}"
+        if server_cmd:
+            command = shlex.split(server_cmd.format(bind=bind))
+        else:
+            command = [sys.executable, str(Path(settings.BASE_DIR) / "manage.py"), "runserver", bind, "--noreload"]
+
+        env = {**os.environ, **UNTHROTTLED_ENV}
+        hosts = [h for h in env.get("ALLOWED_HOSTS", "").split(",") if h]
+        env["ALLOWED_HOSTS"] = ",".join(dict.fromkeys([*hosts, "127.0.0.1", "localhost"]))
+        # Query totals are scraped from /api/metrics/ over loopback
+        internal = [ip for ip in env.get("INTERNAL_IPS", "").split(",") if ip]
+        env["INTERNAL_IPS"] = ",".join(dict.fromkeys([*internal, "127.0.0.1"]))
+        if server_cmd and "PROMETHEUS_MULTIPROC_DIR" not in env:
+            # Aggregate query metrics across worker processes
+            env["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="bench-metrics-")
+
+        server = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        probe = HttpSession(self.host, self.port, timeout=2)
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server exited with code {server.returncode}: {' '.join(command)}")
+            try:
+                if probe.request("GET", "/api/health/")[0] == 200:
+                    probe.close()
+                    return server, " ".join(command)
+            except OSError:
+                pass
+            time.sleep(0.25)
+        server.kill()
+        raise CommandError(f"Server did not become healthy within 60s: {' '.join(command)}")
+
+    # --- run -----------------------------------------------------------------
+
+    def _scrape_queries(self) -> dict[str, tuple[float, float]] | None:
+        """{"GET route": (query sum, request count)} from the server's histograms."""
+
+        session = HttpSession(self.host, self.port)
+        try:
+            status, body = session.request("GET", "/api/metrics/")
+        except OSError:
+            return None
+        finally:
+            session.close()
+        if status != 200:
+            return None
+        totals: dict[str, list[float]] = defaultdict(lambda: [0.0, 0.0])
+        for family in text_string_to_metric_families(body.decode()):
+            if family.name != "http_request_db_queries":
+                continue
+            for sample in family.samples:
+                label = f"{sample.labels['method']} {sample.labels['route']}"
+                if sample.name.endswith("_sum"):
+                    totals[label][0] += sample.value
+                elif sample.name.endswith("_count"):
+                    totals[label][1] += sample.value
+        return {label: (s, c) for label, (s, c) in totals.items()}
+
+    def _run(self, options, server_label: str) -> dict:
+        concurrency = options["concurrency"]
+        users = [
+            VirtualUser(i, self, self.credentials[i % len(self.credentials)] if self.credentials else None)
+            for i in range(concurrency)
+        ]
+        self.stderr.write(
+            f"{concurrency} virtual users, {options['warmup']}s warmup + {options['duration']}s measured against {server_label}"
+        )
+        started_at = datetime.now(dt_timezone.utc)
+        deadline = time.monotonic() + options["warmup"] + options["duration"]
+        threads = [threading.Thread(target=user.run, args=(deadline,), daemon=True) for user in users]
+        for thread in threads:
+            thread.start()
+
+        time.sleep(options["warmup"])
+        before = self._scrape_queries()
+        self.stats.recording = True
+        measure_started = time.monotonic()
+        for thread in threads:
+            thread.join()
+        self.stats.recording = False
+        measured = time.monotonic() - measure_started
+        after = self._scrape_queries()
+
+        return self._build_report(options, server_label, started_at, measured, before, after)
+
+    def _build_report(self, options, server_label, started_at, measured, before, after) -> dict:
+        endpoints = {}
+        everything: list[float] = []
+        total_errors = 0
+        for label in sorted(self.stats.latencies):
+            latencies = sorted(self.stats.latencies[label])
+            statuses = self.stats.statuses[label]
+            errors = sum(count for status, count in statuses.items() if status >= 400)
+            if not label.startswith("PAGE "):  # whole page loads, already counted per request
+                everything.extend(latencies)
+                total_errors += errors
+            queries = None
+            if before is not None and after is not None and label in after:
+                query_sum, count = after[label]
+                old_sum, old_count = before.get(label, (0.0, 0.0))
+                if count > old_count:
+                    queries = round((query_sum - old_sum) / (count - old_count), 2)
+            endpoints[label] = {
+                "requests": len(latencies),
+                "throughput_rps": round(len(latencies) / measured, 2),
+                "errors": errors,
+                "statuses": {str(status): count for status, count in sorted(statuses.items())},
+                "mean_ms": round(sum(latencies) / len(latencies), 2),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(latencies[-1], 2),
+                "queries_per_request": queries,
+            }
+        everything.sort()
+        return {
+            "meta": {
+                "started_at": started_at.isoformat(),
+                "commit": self._git_commit(),
+                "server": server_label,
+                "database": connection.vendor,
+                "concurrency": options["concurrency"],
+                "warmup_s": options["warmup"],
+                "duration_s": round(measured, 2),
+                "mix": self.mix,
+            },
+            "totals": {
+                "requests": len(everything),
+                "errors": total_errors,
+                "throughput_rps": round(len(everything) / measured, 2),
+                "p50_ms": round(percentile(everything, 50) or 0, 2),
+                "p95_ms": round(percentile(everything, 95) or 0, 2),
+                "p99_ms": round(percentile(everything, 99) or 0, 2),
+            },
+            "endpoints": endpoints,
+        }
+
+    @staticmethod
+    def _git_commit() -> str | None:
+        try:
+            result = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+            )
+        except OSError:
+            return None
+        return result.stdout.strip() or None
+
+    # --- output --------------------------------------------------------------
+
+    def _print_summary(self, report: dict) -> None:
+        self.stderr.write(f"{'endpoint':<52} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6} {'err':>5}")
+        for label, row in report["endpoints"].items():
+            queries = "-" if row["queries_per_request"] is None else f"{row['queries_per_request']:.1f}"
+            self.stderr.write(
+                f"{label[:52]:<52} {row['throughput_rps']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                f"{row['p99_ms']:>8.1f} {queries:>6} {row['errors']:>5}"
+            )
+        totals = report["totals"]
+        self.stderr.write(
+            f"{'total':<52} {totals['throughput_rps']:>8.1f} {totals['p50_ms']:>8.1f} {totals['p95_ms']:>8.1f} "
+            f"{totals['p99_ms']:>8.1f} {'':>6} {totals['errors']:>5}"
+        )
+
+    def _print_comparison(self, old: dict, new: dict) -> None:
+        def change(before, after):
+            if not before or after is None:
+                return "     n/a"
+            return f"{(after - before) / before * 100:+7.1f}%"
+
+        baseline = "vs " + (old["meta"].get("commit") or "baseline")
+        self.stderr.write(f"\n{baseline:<52} {'req/s':>8} {'p95':>8}")
+        rows = {"total": (old["totals"], new["totals"])}
+        rows.update(
+            {label: (old["endpoints"][label], row) for label, row in new["endpoints"].items() if label in old["endpoints"]}
+        )
+        for label, (before, after) in rows.items():
+            self.stderr.write(
+                f"{label[:52]:<52} {change(before['throughput_rps'], after['throughput_rps'])} "
+                f"{change(before['p95_ms'], after['p95_ms'])}"
+            )
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+
+ENGINES = [
+    "django.contrib.sessions.backends.db",
+    "django.contrib.sessions.backends.cached_db",
+    "core.sessions",
+]
+
+
+class Command(BaseCommand):
+    help = "Count django_session writes per N authenticated requests for each session engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000, help="Requests per engine (default 1000)")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Simulated seconds between requests (default 5, i.e. a client polling every 5s)",
+        )
+        parser.add_argument("--path", default="/api/accounts/me/", help="Endpoint to request")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.order_by("pk").first()
+        if user is None:
+            raise CommandError("No user found; run migrations (demo user) first.")
+
+        total = options["requests"]
+        self.stdout.write(
+            f"{total} GET {options['path']} as {user.get_username()}, one every {options['interval']}s (simulated)"
+        )
+        baseline = None
+        for engine in ENGINES:
+            writes = self._count_writes(engine, user, total, options["interval"], options["path"])
+            baseline = writes if baseline is None else baseline
+            saved = baseline - writes
+            self.stdout.write(
+                f"{engine:<42} writes={writes:<6} per 1k={writes * 1000 / total:<8.1f} "
+                f"saved vs db per 1k={saved * 1000 / total:.1f}"
+            )
+
+    def _count_writes(self, engine: str, user, total: int, interval: float, path: str) -> int:
+        real_now = timezone.now
+        start = real_now()
+        clock = {"offset": 0.0}
+
+        def fake_now():
+            return start + timedelta(seconds=clock["offset"])
+
+        with override_settings(SESSION_ENGINE=engine), mock.patch("django.utils.timezone.now", fake_now):
+            client = Client()
+            client.force_login(user)
+            session_key = client.session.session_key
+            counter = {"writes": 0}
+
+            def count_session_writes(execute, sql, params, many, context):
+                if sql.lstrip()[:6].upper() in {"INSERT", "UPDATE"} and "django_session" in sql:
+                    counter["writes"] += 1
+                return execute(sql, params, many, context)
+
+            try:
+                with connection.execute_wrapper(count_session_writes):
+                    for _ in range(total):
+                        clock["offset"] += interval
+                        client.get(path)
+            finally:
+                client.session.delete(session_key)
+        return counter["writes"]
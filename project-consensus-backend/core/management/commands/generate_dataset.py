@@ -0,0 +1,402 @@
+"""
+Deterministic synthetic data for load testing.
+
+- Users + profiles, forum posts, comment trees (main comments, replies and
+  replies-to-replies with `main_comment` / `reply_to_user` set), post likes,
+  courses, reviews and review replies.
+- Rows are streamed into `bulk_create` in batches; memory stays bounded by
+  the batch size plus one id per user/post/course.
+- Activity is Zipf-skewed: a few power users write most posts/comments and
+  a few hot posts/courses collect most comments, likes and reviews.
+- The same `--seed` and sizes produce the same rows (UUIDs, timestamps and
+  text included). `--prefix` namespaces usernames/subject ids and the UUIDs
+  (uuid5 of prefix, seed and a counter) so several datasets can coexist.
+- Denormalized counters (`likes_count`, `replies_count`, course ratings,
+  profile activity counters) are recomputed from the generated rows at the end.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate, count, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Avg, Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from accounts.counters import recount
+from accounts.models import Profile
+from courses.models import Course, CourseReview, CourseReviewReply
+from forum.models import ForumPost, ForumPostComment, ForumPostLike
+
+
+User = get_user_model()
+
+# Row counts at --scale 1; each can be overridden individually.
+DEFAULT_SIZES = {
+    "users": 1_000,
+    "posts": 2_000,
+    "comments": 20_000,
+    "likes": 30_000,
+    "courses": 200,
+    "reviews": 2_000,
+    "review_replies": 4_000,
+}
+
+# Row UUIDs are uuid5(ID_NAMESPACE, "<prefix>:<seed>:<n>")
+ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "project-consensus:generate_dataset")
+
+# Fixed "now" so timestamps are reproducible
+ANCHOR = datetime(2025, 9, 1, tzinfo=dt_timezone.utc)
+
+LANGUAGES = ["English", "简体中文（普通话）", "繁體中文（粵語）", "繁體中文（國語）", "Not Specified", "Others"]
+TAGS = ["COMP", "AMA", "LGT", "exam", "internship", "housing", "canteen", "library", "hall", "club", "GUR", "CAR"]
+DEPARTMENTS = ["COMP", "AMA", "EIE", "LGT", "ME", "BSE", "APSS", "ENGL"]
+WORDS = (
+    "the a course exam lecture tutorial assignment project group deadline grade midterm final quiz lab "
+    "professor tutor library hall canteen campus semester credit workload difficult easy useful boring "
+    "interesting recommend avoid notes slides question answer help anyone know how when where why good "
+    "bad great terrible python java data system network design theory practice week hour late early"
+).split()
+
+
+def zipf_cum_weights(n: int, exponent: float) -> list[float]:
+    """Cumulative Zipf weights for ranks 1..n (exponent 0 = uniform)."""
+
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic, skewed synthetic dataset (users, forum, courses) with bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0, help="Multiply all default sizes (1000 ≈ millions of rows)")
+        for name, default in DEFAULT_SIZES.items():
+            flag = "--" + name.replace("_", "-")
+            parser.add_argument(flag, type=int, dest=name, help=f"Rows to create (default {default} x scale)")
+        parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for hot posts/power users (0 = uniform)")
+        parser.add_argument("--reply-ratio", type=float, default=0.6, help="Share of comments that are replies (default 0.6)")
+        parser.add_argument("--days", type=int, default=365, help="Spread post creation over this many days")
+        parser.add_argument("--batch-size", type=int, default=5_000, help="Rows per bulk INSERT (default 5000)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="load", help="Namespace for usernames and course subject ids")
+
+    def handle(self, *args, **options):
+        sizes = {
+            name: options[name] if options[name] is not None else int(default * options["scale"])
+            for name, default in DEFAULT_SIZES.items()
+        }
+        if sizes["users"] < 1:
+            raise CommandError("At least one user is required.")
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Users with prefix '{prefix}-' already exist; pick another --prefix.")
+
+        self.rng = random.Random(options["seed"])
+        self.id_scope = f"{prefix}:{options['seed']}"
+        self.id_counter = count()
+        self.skew = options["skew"]
+        self.batch_size = options["batch_size"]
+        self.days = options["days"]
+        self.prefix = prefix
+        self.totals: list[tuple[str, int, float]] = []
+        self.stdout.write(
+            "Generating " + ", ".join(f"{name}={count}" for name, count in sizes.items()) + f" (skew={self.skew})"
+        )
+
+        started = time.perf_counter()
+        user_ids = self._users(sizes["users"])
+        post_ids = self._posts(sizes["posts"], user_ids)
+        if post_ids:
+            self._comments(sizes["comments"], post_ids, user_ids, options["reply_ratio"])
+            self._likes(sizes["likes"], post_ids, user_ids)
+        course_ids = self._courses(sizes["courses"])
+        if course_ids:
+            review_ids = self._reviews(sizes["reviews"], course_ids, user_ids)
+            if review_ids:
+                self._review_replies(sizes["review_replies"], review_ids, user_ids)
+        started_counters = time.perf_counter()
+        self._recompute_counters()
+        self.stdout.write(f"{'counters':<16} {'':>10}      {time.perf_counter() - started_counters:>8.2f}s")
+        elapsed = time.perf_counter() - started
+
+        rows = sum(count for _, count, _ in self.totals)
+        self.stdout.write(self.style.SUCCESS(f"{rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s overall)"))
+
+    # --- helpers -------------------------------------------------------------
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.uuid5(ID_NAMESPACE, f"{self.id_scope}:{next(self.id_counter)}")
+
+    def _text(self, mean_words: float) -> str:
+        words = max(1, int(self.rng.lognormvariate(math.log(mean_words), 0.8)))
+        return " ".join(self.rng.choices(WORDS, k=words))
+
+    def _pick(self, items: list, cum_weights: list[float], k: int = 1) -> list:
+        return self.rng.choices(items, cum_weights=cum_weights, k=k)
+
+    def _insert(self, label: str, model, rows, total: int, **bulk_options) -> int:
+        """Stream `rows` into `bulk_create` batches and report throughput."""
+
+        created = 0
+        started = time.perf_counter()
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size, **bulk_options)
+            created += len(batch)
+            if total >= self.batch_size * 10 and created % (self.batch_size * 10) == 0:
+                self.stdout.write(f"  {label}: {created}/{total}")
+        self._report(label, created, time.perf_counter() - started)
+        return created
+
+    def _report(self, label: str, count: int, elapsed: float) -> None:
+        self.totals.append((label, count, elapsed))
+        rate = count / elapsed if elapsed else 0.0
+        self.stdout.write(f"{label:<16} {count:>10} rows {elapsed:>8.2f}s {rate:>12,.0f} rows/s")
+
+    def _timestamp(self, after: datetime | None = None, within_days: float | None = None) -> datetime:
+        if after is None:
+            return ANCHOR - timedelta(seconds=self.rng.uniform(0, self.days * 86_400))
+        span = (ANCHOR - after).total_seconds()
+        if within_days is not None:
+            span = min(span, within_days * 86_400)
+        return after + timedelta(seconds=self.rng.uniform(0, max(span, 1)))
+
+    # --- tables --------------------------------------------------------------
+
+    def _users(self, count: int) -> list[int]:
+        # One shared hash: hashing millions of passwords would dominate the run
+        password = make_password("Load1234!")
+        prefix = self.prefix
+
+        def rows():
+            for i in range(count):
+                email = f"{prefix}-{i}@example.test"
+                yield User(username=email, email=email, password=password, date_joined=self._timestamp())
+
+        self._insert("users", User, rows(), count)
+        user_ids = list(
+            User.objects.filter(username__startswith=f"{prefix}-").order_by("pk").values_list("pk", flat=True)
+        )
+
+        def profiles():
+            for i, user_id in enumerate(user_ids):
+                yield Profile(user_id=user_id, display_name=f"{prefix.title()} User {i}")
+
+        self._insert("profiles", Profile, profiles(), count)
+        # Power users first: rank order == id order
+        self.user_weights = zipf_cum_weights(len(user_ids), self.skew)
+        return user_ids
+
+    def _posts(self, count: int, user_ids: list[int]) -> list[uuid.UUID]:
+        post_ids = [self._uuid() for _ in range(count)]
+        self.post_created: dict[uuid.UUID, datetime] = {}
+        authors = self._pick(user_ids, self.user_weights, count)
+
+        def rows():
+            for post_id, author_id in zip(post_ids, authors):
+                created_at = self._timestamp()
+                self.post_created[post_id] = created_at
+                paragraphs = "".join(f"<p>{self._text(40)}</p>" for _ in range(self.rng.randint(1, 6)))
+                post = ForumPost(
+                    id=post_id,
+                    title=self._text(6)[:200],
+                    content=paragraphs,
+                    author_id=author_id,
+                    created_at=created_at,
+                    updated_at=created_at,
+                    tags=self.rng.sample(TAGS, self.rng.randint(0, 3)),
+                    language=self.rng.choice(LANGUAGES),
+                )
+                # bulk_create skips save(), which derives these
+                post.refresh_text_fields()
+                yield post
+
+        self._insert("posts", ForumPost, rows(), count)
+        # Hot posts: a random (but seeded) subset gets the head of the Zipf curve
+        self.hot_posts = post_ids[:]
+        self.rng.shuffle(self.hot_posts)
+        self.post_weights = zipf_cum_weights(len(post_ids), self.skew)
+        return post_ids
+
+    def _comments(self, count: int, post_ids: list, user_ids: list[int], reply_ratio: float) -> None:
+        per_post: dict = {}
+        for start in range(0, count, 100_000):
+            for post_id in self._pick(self.hot_posts, self.post_weights, min(100_000, count - start)):
+                per_post[post_id] = per_post.get(post_id, 0) + 1
+
+        def rows():
+            for post_id in post_ids:
+                total = per_post.get(post_id, 0)
+                if not total:
+                    continue
+                mains = max(1, round(total * (1 - reply_ratio)))
+                post_created = self.post_created[post_id]
+                threads: list[list[tuple[uuid.UUID, int, datetime]]] = []
+                authors = self._pick(user_ids, self.user_weights, total)
+                for author_id in authors[:mains]:
+                    comment = (self._uuid(), author_id, self._timestamp(post_created, within_days=30))
+                    threads.append([comment])
+                    yield ForumPostComment(
+                        id=comment[0],
+                        post_id=post_id,
+                        content=self._text(25),
+                        author_id=author_id,
+                        created_at=comment[2],
+                        updated_at=comment[2],
+                        likes_count=int(self.rng.paretovariate(2.0)) - 1,
+                    )
+                # Hot threads inside a post collect most replies
+                thread_weights = zipf_cum_weights(len(threads), self.skew)
+                for author_id in authors[mains:]:
+                    thread = self._pick(threads, thread_weights)[0]
+                    main = thread[0]
+                    # Half the replies answer the main comment, half an earlier reply
+                    parent = main if len(thread) == 1 or self.rng.random() < 0.5 else self.rng.choice(thread[1:])
+                    reply = (self._uuid(), author_id, self._timestamp(parent[2], within_days=7))
+                    thread.append(reply)
+                    yield ForumPostComment(
+                        id=reply[0],
+                        post_id=post_id,
+                        parent_id=parent[0],
+                        main_comment_id=main[0],
+                        content=self._text(15),
+                        author_id=author_id,
+                        reply_to_user_id=parent[1],
+                        created_at=reply[2],
+                        updated_at=reply[2],
+                        likes_count=int(self.rng.paretovariate(3.0)) - 1,
+                    )
+
+        # Parents precede their replies in the stream, so FKs hold per batch
+        self._insert("comments", ForumPostComment, rows(), count)
+
+    def _likes(self, count: int, post_ids: list, user_ids: list[int]) -> None:
+        def rows():
+            for _ in range(count):
+                post_id = self._pick(self.hot_posts, self.post_weights)[0]
+                user_id = self._pick(user_ids, self.user_weights)[0]
+                yield ForumPostLike(
+                    post_id=post_id,
+                    user_id=user_id,
+                    created_at=self._timestamp(self.post_created[post_id], within_days=14),
+                )
+
+        # Skewed sampling repeats (post, user) pairs; the unique constraint drops them
+        sampled = self._insert("likes", ForumPostLike, rows(), count, ignore_conflicts=True)
+        stored = ForumPostLike.objects.filter(user__username__startswith=f"{self.prefix}-").count()
+        label, _, elapsed = self.totals.pop()
+        self.totals.append((label, stored, elapsed))
+        self.stdout.write(f"{'':<16} {stored:>10} unique (post, user) pairs kept of {sampled} sampled")
+
+    def _courses(self, count: int) -> list[int]:
+        prefix = self.prefix.upper()
+
+        def rows():
+            for i in range(count):
+                department = self.rng.choice(DEPARTMENTS)
+                yield Course(
+                    subject_id=f"{prefix}-{i:06d}",
+                    subject_code=f"{department}{1000 + i % 9000}",
+                    title=self._text(4).title()[:200],
+                    term_year=self.rng.randint(2019, 2025),
+                    term_semester=self.rng.choice(Course.Semester.values),
+                    attr_difficulty=self.rng.choice(Course.Difficulty.values),
+                    attr_workload=self.rng.choice(Course.Workload.values),
+                    attr_grading=self.rng.choice(Course.Grading.values),
+                    attr_gain=self.rng.choice(Course.Gain.values),
+                    teachers=[f"Teacher {self.rng.randint(1, 400)}" for _ in range(self.rng.randint(1, 3))],
+                    department=department,
+                    last_updated=ANCHOR,
+                )
+
+        self._insert("courses", Course, rows(), count)
+        course_ids = list(
+            Course.objects.filter(subject_id__startswith=f"{prefix}-").order_by("pk").values_list("pk", flat=True)
+        )
+        self.course_weights = zipf_cum_weights(len(course_ids), self.skew)
+        return course_ids
+
+    def _reviews(self, count: int, course_ids: list[int], user_ids: list[int]) -> list[uuid.UUID]:
+        review_ids = []
+        self.review_created: dict[uuid.UUID, datetime] = {}
+
+        def rows():
+            for course_id in self._pick(course_ids, self.course_weights, count):
+                review_id = self._uuid()
+                created_at = self._timestamp()
+                review_ids.append(review_id)
+                self.review_created[review_id] = created_at
+                yield CourseReview(
+                    id=review_id,
+                    course_id=course_id,
+                    author_id=self._pick(user_ids, self.user_weights)[0],
+                    overall_rating=round(min(10.0, max(0.0, self.rng.gauss(7, 2))), 1),
+                    attr_difficulty=self.rng.choice(Course.Difficulty.values),
+                    attr_workload=self.rng.choice(Course.Workload.values),
+                    attr_grading=self.rng.choice(Course.Grading.values),
+                    attr_gain=self.rng.choice(Course.Gain.values),
+                    content=self._text(60),
+                    created_at=created_at,
+                    term_year=self.rng.randint(2019, 2025),
+                    term_semester=self.rng.choice(Course.Semester.values),
+                )
+
+        self._insert("reviews", CourseReview, rows(), count)
+        return review_ids
+
+    def _review_replies(self, count: int, review_ids: list, user_ids: list[int]) -> None:
+        weights = zipf_cum_weights(len(review_ids), self.skew)
+
+        def rows():
+            for review_id in self._pick(review_ids, weights, count):
+                yield CourseReviewReply(
+                    id=self._uuid(),
+                    review_id=review_id,
+                    author_id=self._pick(user_ids, self.user_weights)[0],
+                    content=self._text(15),
+                    created_at=self._timestamp(self.review_created[review_id], within_days=30),
+                )
+
+        self._insert("review replies", CourseReviewReply, rows(), count)
+
+    def _recompute_counters(self) -> None:
+        def count_of(model, fk: str):
+            return Coalesce(
+                Subquery(
+                    model.objects.filter(**{fk: OuterRef("pk")})
+                    .order_by()
+                    .values(fk)
+                    .annotate(n=Count("*"))
+                    .values("n"),
+                    output_field=IntegerField(),
+                ),
+                0,
+            )
+
+        courses = Course.objects.filter(subject_id__startswith=f"{self.prefix.upper()}-")
+        with transaction.atomic():
+            ForumPost.objects.filter(author__username__startswith=f"{self.prefix}-").update(
+                likes_count=count_of(ForumPostLike, "post")
+            )
+            CourseReview.objects.filter(course__in=courses).update(replies_count=count_of(CourseReviewReply, "review"))
+            average = (
+                CourseReview.objects.filter(course=OuterRef("pk"))
+                .order_by()
+                .values("course")
+                .annotate(avg=Avg("overall_rating"))
+                .values("avg")
+            )
+            courses.update(
+                rating_reviews_count=count_of(CourseReview, "course"),
+                rating_score=Coalesce(Subquery(average), 0.0),
+            )
+            recount(Profile.objects.filter(user__username__startswith=f"{self.prefix}-"))
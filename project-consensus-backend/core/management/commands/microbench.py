@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+
+from core import microbench
+
+
+class Command(BaseCommand):
+    help = (
+        "Time serializers and viewset querysets on fixed 100-row pages (queries, tracemalloc peak) "
+        "in a throwaway test database and fail on regressions against the baseline file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=25, help="Timed runs per case (default 25)")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed runs per case (default 3)")
+        parser.add_argument(
+            "--baseline", help="Baseline file (default core/microbench_baselines/<database vendor>.json)"
+        )
+        parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+        parser.add_argument(
+            "--time-threshold",
+            type=float,
+            default=0.5,
+            help="Allowed relative slowdown (default 0.5 = 50%%; tighten on a quiet machine)",
+        )
+        parser.add_argument(
+            "--alloc-threshold", type=float, default=0.15, help="Allowed peak allocation growth (default 0.15)"
+        )
+        parser.add_argument("--output", help="Also write the results as JSON to this path")
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(
+            verbosity=0, interactive=False, aliases=set(connections), serialized_aliases=set()
+        )
+        try:
+            microbench.seed_fixture()
+            report = microbench.run_suite(repeat=options["repeat"], warmup=options["warmup"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        baseline_path = Path(options["baseline"]) if options["baseline"] else microbench.baseline_path()
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+        self._print(report, baseline)
+        text = json.dumps(report, indent=2) + "\n"
+        if options["output"]:
+            Path(options["output"]).write_text(text)
+
+        if options["update_baseline"]:
+            baseline_path.write_text(text)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+            return
+        if baseline is None:
+            raise CommandError(
+                f"No baseline at {baseline_path}; record one on this database with --update-baseline first."
+            )
+        if baseline["meta"].get("database") != report["meta"]["database"]:
+            self.stderr.write(
+                f"Baseline was recorded on {baseline['meta'].get('database')}; comparing queries and allocations only."
+            )
+        regressions = microbench.compare(baseline, report, options["time_threshold"], options["alloc_threshold"])
+        if regressions:
+            raise CommandError("Regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions."))
+
+    def _print(self, report: dict, baseline: dict | None) -> None:
+        self.stdout.write(f"calibration {report['meta']['calibration_ms']:.1f} ms ({report['meta']['database']})")
+        self.stdout.write(f"{'case':<38} {'median ms':>10} {'min ms':>8} {'x calib':>8} {'queries':>8} {'peak KiB':>9} {'vs base':>8}")
+        for name, row in report["cases"].items():
+            before = (baseline or {}).get("cases", {}).get(name)
+            delta = f"{(row['relative'] / before['relative'] - 1) * 100:+7.1f}%" if before and before["relative"] else "       -"
+            self.stdout.write(
+                f"{name:<38} {row['median_ms']:>10.2f} {row['min_ms']:>8.2f} {row['relative']:>8.3f} {row['queries']:>8} "
+                f"{row['peak_kib']:>9.1f} {delta:>8}"
+            )
@@ -0,0 +1,54 @@
+"""
+Run background jobs from the database queue (core/jobs.py).
+
+Start one or more per deployment, e.g. under systemd or as a separate
+container: `python manage.py run_worker --concurrency 4 --metrics-port 9101`.
+SIGTERM / Ctrl-C stop claiming new jobs and let the running ones finish.
+"""
+
+from __future__ import annotations
+
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = "Claim and run due background jobs (SELECT ... FOR UPDATE SKIP LOCKED) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, help="Worker threads (default JOBS_CONCURRENCY)")
+        parser.add_argument(
+            "--poll-interval", type=float, help="Seconds to sleep when no job is due (default JOBS_POLL_INTERVAL)"
+        )
+        parser.add_argument("--once", action="store_true", help="Run the jobs that are due, then exit")
+        parser.add_argument(
+            "--no-periodic", action="store_true", help="Do not create the JOBS_PERIODIC rows on start"
+        )
+        parser.add_argument("--metrics-port", type=int, help="Serve this worker's Prometheus metrics on this port")
+
+    def handle(self, *args, **options):
+        jobs.discover()
+        if not options["no_periodic"]:
+            created = jobs.ensure_periodic()
+            if created:
+                self.stdout.write(f"Scheduled {created} periodic jobs.")
+        if options["metrics_port"] and settings.METRICS_ENABLED:
+            from prometheus_client import start_http_server
+
+            start_http_server(options["metrics_port"])
+
+        worker = jobs.Worker(options["concurrency"], options["poll_interval"], once=options["once"])
+        previous = signal.signal(signal.SIGTERM, lambda *_: worker.stop.set())
+        self.stdout.write(f"Worker {worker.name}: {worker.concurrency} threads, tasks: {', '.join(sorted(jobs.TASKS))}")
+        try:
+            report = worker.run()
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        outcomes = report.outcomes
+        self.stdout.write(
+            self.style.SUCCESS(f"done={outcomes['done']} retried={outcomes['retried']} failed={outcomes['failed']}")
+        )
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import WARMERS, warm
+
+
+class Command(BaseCommand):
+    help = "Pre-load the hot working set after a deploy (sessions, feed, hot threads, course catalog); see core/warmup.py."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", help=f"Comma-separated warmers (default all: {', '.join(WARMERS)})")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.WARM_CACHES_CONCURRENCY,
+            help=f"Warmers running at once (default WARM_CACHES_CONCURRENCY={settings.WARM_CACHES_CONCURRENCY})",
+        )
+        parser.add_argument("--timeout", type=float, default=None, help="Give up on warmers still running after this many seconds")
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options["only"].split(",")] if options["only"] else list(WARMERS)
+        unknown = [name for name in names if name not in WARMERS]
+        if unknown:
+            raise CommandError(f"Unknown warmer(s) {', '.join(unknown)}; choose from {', '.join(WARMERS)}")
+
+        started = time.perf_counter()
+        results = warm(names, concurrency=options["concurrency"], timeout=options["timeout"])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{'warmer':<12} {'items':>8} {'seconds':>8}")
+        for result in results:
+            line = f"{result.name:<12} {result.items:>8} {result.seconds:>8.2f}"
+            self.stdout.write(line + (f"  {result.error}" if result.error else ""))
+        self.stdout.write(f"{'total':<12} {sum(r.items for r in results):>8} {elapsed:>8.2f}")
+        failed = [result.name for result in results if result.error]
+        if failed:
+            raise CommandError(f"Failed: {', '.join(failed)}")
@@ -0,0 +1,168 @@
+"""
+Prometheus metrics for HTTP requests, DB usage and worker runtime stats.
+
+- `MetricsMiddleware` (core/middleware.py) feeds the request metrics below.
+- `render_metrics()` returns the text exposition for `/api/metrics/`.
+- Background jobs (core/jobs.py): `run_worker` feeds the job counters and
+  histograms; queue depth gauges are read from the database at scrape time.
+- Multi-process servers (gunicorn/uwsgi workers): set `PROMETHEUS_MULTIPROC_DIR`
+  to an empty, writable directory before the server starts. Each worker then
+  writes its samples to mmap files there and any worker can serve the
+  aggregate. Call `prometheus_client.multiprocess.mark_process_dead(pid)` from
+  the server's child-exit hook to drop live gauges of dead workers.
+"""
+
+from __future__ import annotations
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from .db_pool import pool_stats
+from .executors import executor_stats
+
+
+LABELS = ["method", "route"]
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route, method and status code.",
+    LABELS + ["status"],
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling the request (middleware + view).",
+    LABELS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size (0 for streaming responses).",
+    LABELS,
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL queries executed per request.",
+    LABELS,
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+DB_TIME = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in SQL per request.",
+    LABELS,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+BATCH_SUBREQUESTS = Counter(
+    "http_batch_subrequests_total",
+    "GET sub-requests run inside POST /api/batch/, by route and status code.",
+    ["route", "status"],
+)
+
+
+JOBS_PROCESSED = Counter(
+    "jobs_processed_total",
+    "Background jobs run by `run_worker`, by task and outcome (done, retried, failed).",
+    ["task", "outcome"],
+)
+JOB_QUEUE_LATENCY = Histogram(
+    "job_queue_latency_seconds",
+    "Time from a job's due time (run_at) to a worker starting it.",
+    ["task"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600),
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Time spent running a job.",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+
+
+class RuntimeStatsCollector:
+    """Per-process gauges for DB connection pools and bounded executors.
+
+    Evaluated at scrape time; carries a `pid` label because these numbers
+    are local to the worker answering the scrape.
+    """
+
+    def collect(self):
+        pid = str(os.getpid())
+
+        pool = GaugeMetricFamily("db_pool_connections", "Pool connections by state.", labels=["pid", "alias", "state"])
+        waits = GaugeMetricFamily("db_pool_waits", "Requests that had to wait for a connection.", labels=["pid", "alias"])
+        wait_ms = GaugeMetricFamily("db_pool_wait_ms", "Total time spent waiting for a connection.", labels=["pid", "alias"])
+        for alias, stats in pool_stats().items():
+            pool.add_metric([pid, alias, "in_use"], stats["in_use"])
+            pool.add_metric([pid, alias, "idle"], stats["idle"])
+            pool.add_metric([pid, alias, "waiting"], stats["waiting"])
+            waits.add_metric([pid, alias], stats["waits"])
+            wait_ms.add_metric([pid, alias], stats["wait_ms"])
+
+        executor = GaugeMetricFamily("executor_stat", "Bounded executor counters.", labels=["pid", "executor", "stat"])
+        for name, stats in executor_stats().items():
+            for key in ("submitted", "completed", "failed", "rejected", "running", "in_flight", "queue_wait_ms", "run_ms"):
+                executor.add_metric([pid, name, key], stats[key])
+
+        yield from (pool, waits, wait_ms, executor)
+
+
+class JobQueueCollector:
+    """Job queue depth and age of the oldest due job per task and status (core/jobs.py).
+
+    Read from the `Job` table at scrape time (one GROUP BY query): the same
+    numbers whichever process answers.
+    """
+
+    def describe(self):
+        return []  # no query when the collector is registered
+
+    def collect(self):
+        from django.db import DatabaseError
+
+        from .jobs import queue_stats
+
+        depth = GaugeMetricFamily("job_queue_depth", "Jobs in the queue by task and status.", labels=["task", "status"])
+        oldest = GaugeMetricFamily(
+            "job_queue_oldest_seconds",
+            "How long the oldest job of a task and status has been due (0: none due yet).",
+            labels=["task", "status"],
+        )
+        try:
+            stats = queue_stats()
+        except DatabaseError:
+            return
+        for task, status, jobs, age in stats:
+            depth.add_metric([task, status], jobs)
+            oldest.add_metric([task, status], age)
+        yield from (depth, oldest)
+
+
+_runtime_collector = RuntimeStatsCollector()
+_job_queue_collector = JobQueueCollector()
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    REGISTRY.register(_runtime_collector)
+    REGISTRY.register(_job_queue_collector)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Return (body, content type) of the Prometheus text exposition."""
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_runtime_collector)
+        registry.register(_job_queue_collector)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,227 @@
+"""
+Serializer and queryset micro-benchmarks on fixed 100-row pages.
+
+- Each case is either a viewset `get_queryset()` chain evaluated for one
+  page, or a serializer rendering an already-fetched page, so query time
+  and Python rendering time show up separately.
+- Per case we record the median and best wall time, the SQL query count
+  and the peak memory allocated while it runs (`tracemalloc`).
+- Times are also expressed relative to a fixed pure-Python calibration
+  workload timed right before each case, so a baseline recorded on another
+  (or a momentarily slower) machine stays comparable. Timed runs execute
+  with the garbage collector paused, like `timeit`.
+- `python manage.py microbench` runs the suite in a throwaway test database
+  and compares it with the baseline recorded on the same database vendor,
+  `core/microbench_baselines/<vendor>.json`; see that command.
+"""
+
+from __future__ import annotations
+
+import gc
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory
+
+from courses.serializers import CourseReviewSerializer, CourseSerializer
+from courses.views import CourseReviewViewSet, CourseViewSet
+from forum.models import ForumPost
+from forum.serializers import ForumPostCommentSerializer, ForumPostListSerializer, ForumPostSerializer
+from forum.views import ForumPostCommentViewSet, ForumPostViewSet
+from .querybudget import QueryRecorder
+
+
+PAGE_SIZE = 100
+BASELINE_DIR = Path(__file__).resolve().parent / "microbench_baselines"
+FIXTURE_PREFIX = "microbench"
+FIXTURE = {
+    "users": 40,
+    "posts": PAGE_SIZE + 20,
+    "comments": 1_000,
+    "likes": 600,
+    "courses": PAGE_SIZE + 20,
+    "reviews": 300,
+    "review_replies": 0,
+}
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], object]
+
+
+@dataclass
+class Measurement:
+    name: str
+    median_ms: float
+    min_ms: float
+    relative: float  # min / calibration time; the min is the least noisy statistic
+    queries: int
+    peak_kib: float
+
+
+def seed_fixture() -> None:
+    """Create the deterministic benchmark rows (see generate_dataset)."""
+
+    call_command(
+        "generate_dataset", prefix=FIXTURE_PREFIX, seed=7, batch_size=500, stdout=io.StringIO(), **FIXTURE
+    )
+
+
+def _view(viewset_cls, action: str, user=None, **query):
+    request = RequestFactory().get("/", query)
+    request.user = user or AnonymousUser()
+    view = viewset_cls(action=action, action_map={"get": action}, format_kwarg=None, args=(), kwargs={})
+    view.request = view.initialize_request(request)
+    view.request.user = request.user
+    return view
+
+
+def _queryset_case(name: str, view) -> Case:
+    return Case(name, lambda: list(view.get_queryset()[:PAGE_SIZE]))
+
+
+def _serializer_case(name: str, serializer_cls, view) -> Case:
+    rows = list(view.get_queryset()[:PAGE_SIZE])
+    if len(rows) < PAGE_SIZE:
+        raise RuntimeError(f"{name}: fixture yields {len(rows)} rows, expected {PAGE_SIZE}")
+    context = {"request": view.request, "view": view}
+    return Case(name, lambda: serializer_cls(rows, many=True, context=context).data)
+
+
+def build_cases() -> list[Case]:
+    user = get_user_model().objects.filter(username__startswith=f"{FIXTURE_PREFIX}-").order_by("pk").first()
+    hot_post = (
+        ForumPost.objects.filter(author__username__startswith=f"{FIXTURE_PREFIX}-")
+        .annotate(n=Count("comments"))
+        .order_by("-n", "pk")
+        .first()
+    )
+
+    posts_anon = _view(ForumPostViewSet, "list")
+    posts_user = _view(ForumPostViewSet, "list", user=user)
+    # The detail queryset loads `content`: the full HTML body the feed skips
+    posts_detail = _view(ForumPostViewSet, "retrieve", user=user)
+    comments = _view(ForumPostCommentViewSet, "list", postId=str(hot_post.pk))
+    courses = _view(CourseViewSet, "list")
+    reviews = _view(CourseReviewViewSet, "list")
+    return [
+        _queryset_case("forum.posts.queryset.anonymous", posts_anon),
+        _queryset_case("forum.posts.queryset.authenticated", posts_user),
+        _serializer_case("forum.posts.serializer", ForumPostListSerializer, posts_user),
+        _serializer_case("forum.posts.detail.serializer", ForumPostSerializer, posts_detail),
+        _queryset_case("forum.comments.queryset", comments),
+        _serializer_case("forum.comments.serializer", ForumPostCommentSerializer, comments),
+        _queryset_case("courses.courses.queryset", courses),
+        _serializer_case("courses.courses.serializer", CourseSerializer, courses),
+        _queryset_case("courses.reviews.queryset", reviews),
+        _serializer_case("courses.reviews.serializer", CourseReviewSerializer, reviews),
+    ]
+
+
+def _best_of(func: Callable[[], object], rounds: int) -> list[float]:
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(max(1, rounds)):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        gc.enable()
+    return timings
+
+
+def _calibration_workload() -> None:
+    rows = [{"id": i, "name": f"row {i}", "tags": [str(i % 7), str(i % 11)], "score": i / 3} for i in range(5_000)]
+    json.dumps(sorted(rows, key=lambda row: (row["tags"][0], -row["score"])))
+
+
+def calibrate(rounds: int = 7) -> float:
+    """Best-of-`rounds` ms of a fixed pure-Python workload (dict building + JSON)."""
+
+    return min(_best_of(_calibration_workload, rounds))
+
+
+def measure(case: Case, repeat: int = 25, warmup: int = 3) -> Measurement:
+    for _ in range(warmup):
+        case.run()
+
+    recorder = QueryRecorder()
+    with recorder.capture():
+        case.run()
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        case.run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    calibration_ms = calibrate()
+    timings = _best_of(case.run, repeat)
+    return Measurement(
+        name=case.name,
+        median_ms=round(statistics.median(timings), 3),
+        min_ms=round(min(timings), 3),
+        relative=round(min(timings) / calibration_ms, 4),
+        queries=recorder.count,
+        peak_kib=round(peak / 1024, 1),
+    )
+
+
+def baseline_path(vendor: str | None = None) -> Path:
+    """Baseline file for `vendor` (default: the current connection's), e.g. `postgresql.json`."""
+
+    return BASELINE_DIR / f"{vendor or connection.vendor}.json"
+
+
+def run_suite(repeat: int = 25, warmup: int = 3) -> dict:
+    """Run every case against the current database (fixture must be seeded)."""
+
+    results = [measure(case, repeat, warmup) for case in build_cases()]
+    return {
+        "meta": {"database": connection.vendor, "page_size": PAGE_SIZE, "calibration_ms": round(calibrate(), 3)},
+        "cases": {result.name: asdict(result) for result in results},
+    }
+
+
+def compare(baseline: dict, current: dict, time_threshold: float, alloc_threshold: float) -> list[str]:
+    """Regressions of `current` against `baseline` (empty when within thresholds).
+
+    - queries: any increase
+    - peak allocations: more than `alloc_threshold` (fraction) higher
+    - time: calibration-relative best time more than `time_threshold` higher;
+      skipped when the baseline came from another database vendor
+    """
+
+    compare_time = baseline["meta"].get("database") == current["meta"]["database"]
+    regressions = []
+    for name, now in current["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            continue
+        if now["queries"] > before["queries"]:
+            regressions.append(f"{name}: {now['queries']} queries (baseline {before['queries']})")
+        if before["peak_kib"] and now["peak_kib"] > before["peak_kib"] * (1 + alloc_threshold):
+            regressions.append(f"{name}: peak {now['peak_kib']} KiB (baseline {before['peak_kib']} KiB)")
+        if compare_time and before["relative"] and now["relative"] > before["relative"] * (1 + time_threshold):
+            regressions.append(
+                f"{name}: {now['relative']:.3f}x calibration, {now['median_ms']} ms "
+                f"(baseline {before['relative']:.3f}x, {before['median_ms']} ms)"
+            )
+    return regressions
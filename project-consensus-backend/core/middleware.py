@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.urls import reverse
+
+from . import metrics, profiling
+from .db_router import replica_aliases, replica_reads
+from .querybudget import QueryRecorder, report
+
+
+logger = logging.getLogger(__name__)
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+KNOWN_METHODS = {"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"}
+
+
+class ReadYourWritesMiddleware:
+    """Pin a client's reads to the primary for a short window after it writes.
+
+    - Unsafe requests (POST/PUT/PATCH/DELETE) always read from the primary,
+      except `POST /api/batch/`, which only runs GET sub-requests.
+    - A successful unsafe request sets a cookie holding the pin deadline
+      (`DATABASE_REPLICA_PIN_SECONDS` from now); while the deadline has not
+      passed, the client's GETs also read from the primary, so a new post,
+      comment, like or login is visible despite replication lag.
+    - Other requests may read from a replica (`core.db_router.replica_reads`);
+      code outside a request (commands, jobs) always reads the primary.
+    - Disabled entirely (removed from the chain) when no replica is configured.
+    """
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cookie_name = settings.DATABASE_REPLICA_PIN_COOKIE_NAME
+        self.pin_seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+
+    def __call__(self, request):
+        is_write = request.method not in SAFE_METHODS and request.path_info != reverse("batch")
+        with replica_reads(not is_write and not self._has_live_pin(request)):
+            response = self.get_response(request)
+
+        if is_write and response.status_code < 400:
+            response.set_cookie(
+                self.cookie_name,
+                str(int(time.time()) + self.pin_seconds),
+                max_age=self.pin_seconds,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
+
+    def _has_live_pin(self, request) -> bool:
+        raw = request.COOKIES.get(self.cookie_name)
+        if not raw:
+            return False
+        try:
+            return int(raw) >= time.time()
+        except ValueError:
+            return False
+
+
+class _QueryCounter:
+    """`execute_wrapper` hook counting queries and their wall time."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Record per-route Prometheus metrics (see core/metrics.py).
+
+    Labels use the URL pattern (`api/forum/posts/<pk>/`), not the raw path, to
+    keep cardinality bounded. Disable with `METRICS_ENABLED=False`.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = _QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        route = match.route.rstrip("$") if match is not None else "<unmatched>"
+        method = request.method if request.method in KNOWN_METHODS else "other"
+        size = 0 if response.streaming else len(response.content)
+
+        metrics.REQUESTS.labels(method, route, str(response.status_code)).inc()
+        metrics.LATENCY.labels(method, route).observe(elapsed)
+        metrics.RESPONSE_SIZE.labels(method, route).observe(size)
+        metrics.DB_QUERIES.labels(method, route).observe(queries.count)
+        metrics.DB_TIME.labels(method, route).observe(queries.seconds)
+        return response
+
+
+class QueryBudgetMiddleware:
+    """Record each request's SQL and report N+1 patterns and budget overruns.
+
+    Violations are logged as warnings; with `QUERY_BUDGET_RAISE=True` (tests)
+    they raise `QueryBudgetExceeded`. Disable with `QUERY_BUDGET_ENABLED=False`.
+    Views that check their own parts (`/api/batch/`, per sub-request) set
+    `request.query_budget_checked`.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.capture():
+            response = self.get_response(request)
+
+        if getattr(request, "query_budget_checked", False):
+            return response
+        match = getattr(request, "resolver_match", None)
+        report(recorder, request.method, request.path, match.view_name if match is not None else None)
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile selected requests and store them as `RequestProfile` rows.
+
+    Staff users opt in per request (`PROFILING_HEADER` header or
+    `PROFILING_QUERY_PARAM` flag set to 1); `PROFILING_SAMPLE_RATE` samples
+    1 in N requests. Removed from the chain unless `PROFILING_ENABLED`.
+    Must come after AuthenticationMiddleware. See core/profiling.py.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = profiling.requested_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        with profiling.capture() as result:
+            response = self.get_response(request)
+        if result is None:
+            return response
+
+        profile = profiling.build(result, request, response, trigger)
+
+        close = response.close
+
+        def save_and_close():
+            # Before close() sends request_finished, which may close the connection
+            try:
+                profiling.save(profile)
+            except DatabaseError:
+                logger.exception("Could not store the profile of %s %s", request.method, request.path)
+            finally:
+                close()
+
+        # Written after the response is sent: outside the metrics/budget accounting
+        response.close = save_and_close
+        response["X-Profile-Id"] = str(profile.pk)
+        return response
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:24
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                ("method", models.CharField(max_length=10)),
+                ("path", models.CharField(max_length=500)),
+                ("route", models.CharField(blank=True, max_length=200)),
+                ("view_name", models.CharField(blank=True, max_length=200)),
+                ("status_code", models.PositiveSmallIntegerField()),
+                (
+                    "trigger",
+                    models.CharField(
+                        choices=[("requested", "requested"), ("sampled", "sampled")],
+                        max_length=10,
+                    ),
+                ),
+                ("duration_ms", models.FloatField()),
+                ("cpu_ms", models.FloatField()),
+                ("sql_count", models.PositiveIntegerField(default=0)),
+                ("sql_ms", models.FloatField(default=0)),
+                ("sql_timeline", models.JSONField(blank=True, default=list)),
+                ("profile_text", models.TextField(blank=True)),
+                ("stats", models.BinaryField(blank=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Request profile",
+                "verbose_name_plural": "Request profiles",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -1,3 +1,110 @@
+from __future__ import annotations
+
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+class RequestProfile(models.Model):
+    """A profiled request captured by `ProfilingMiddleware` (core/profiling.py).
+
+    Notes:
+    - `profile_text` holds the top functions by cumulative time; `stats` the
+      raw pstats data (downloadable from the admin as a .prof file for
+      snakeviz / `python -m pstats`).
+    - `sql_timeline` lists every statement with its start offset and duration
+      in ms, relative to the start of the request.
+    - Only the newest `PROFILING_KEEP` rows are kept.
+    - The UUID is chosen up front so the response can carry it in
+      `X-Profile-Id` while the row is written after the response is sent.
+    """
+
+    class Trigger(models.TextChoices):
+        REQUESTED = "requested", "requested"  # staff header / query flag
+        SAMPLED = "sampled", "sampled"  # 1 in PROFILING_SAMPLE_RATE
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    route = models.CharField(max_length=200, blank=True)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    trigger = models.CharField(max_length=10, choices=Trigger.choices)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+
+    duration_ms = models.FloatField()
+    cpu_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField(default=0)
+    sql_ms = models.FloatField(default=0)
+    sql_timeline = models.JSONField(default=list, blank=True)
+    profile_text = models.TextField(blank=True)
+    stats = models.BinaryField(blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Request profile"
+        verbose_name_plural = "Request profiles"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class Job(models.Model):
+    """A background job run by `python manage.py run_worker` (core/jobs.py).
+
+    Notes:
+    - `name` is a task registered with `@task` in an app's `jobs.py`;
+      `payload` its keyword arguments (JSON).
+    - Workers claim due pending rows with `SELECT ... FOR UPDATE SKIP LOCKED`
+      and hold them for `lease_expires_at`; rows of a crashed worker go back
+      to pending when their lease expires.
+    - Done one-off jobs are deleted; failed ones (attempts exhausted) stay for
+      inspection. Periodic jobs (`periodic_seconds`) are one row each that is
+      re-armed after every run.
+    - `key` deduplicates: at most one pending or running job per key.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "pending"
+        RUNNING = "running", "running"
+        FAILED = "failed", "failed"
+
+    id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    run_at = models.DateTimeField(default=timezone.now)
+    periodic_seconds = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker claim: due pending rows only
+            models.Index(fields=["run_at", "id"], condition=models.Q(status="pending"), name="core_job_due_idx"),
+            # Lease expiry scan: running rows only
+            models.Index(
+                fields=["lease_expires_at"], condition=models.Q(status="running"), name="core_job_lease_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="core_job_active_key_uniq",
+            ),
+        ]
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
 
-# Create your models here.
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.name} #{self.pk} ({self.status})"
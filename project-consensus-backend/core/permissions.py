@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import hmac
+
+from django.conf import settings
+from rest_framework import permissions
+
+
+class IsInternalRequest(permissions.BasePermission):
+    """Allow staff users, `Authorization: Bearer <INTERNAL_API_TOKEN>`, or `INTERNAL_IPS` clients.
+
+    Used for operational endpoints (metrics, pool statistics) that scrapers
+    call without a session. `INTERNAL_IPS` matches `REMOTE_ADDR`, i.e. the
+    proxy's address behind a reverse proxy: prefer the token there.
+    """
+
+    def has_permission(self, request, view) -> bool:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            return True
+        token = settings.INTERNAL_API_TOKEN
+        scheme, _, credentials = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+        if token and scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip(), token):
+            return True
+        return request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS
+
+
+class IsStaffOrReadOnly(permissions.BasePermission):
+    """Anyone may read; only staff may write (e.g. the course catalogue)."""
+
+    def has_permission(self, request, view) -> bool:
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+class IsAuthorOrReadOnly(permissions.IsAuthenticatedOrReadOnly):
+    """Anyone may read; signed-in users may create; only the author (or staff) may change a row.
+
+    Objects must have an `author_id`.
+    """
+
+    def has_object_permission(self, request, view, obj) -> bool:
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return obj.author_id == request.user.pk or request.user.is_staff
@@ -0,0 +1,155 @@
+"""
+On-demand request profiling.
+
+- `ProfilingMiddleware` (core/middleware.py) profiles a request when a staff
+  user asks for it (`X-Profile: 1` header or `?_profile=1`), or for 1 in
+  `PROFILING_SAMPLE_RATE` requests. With `PROFILING_ENABLED=False` (default)
+  the middleware is removed from the chain, so there is no overhead.
+- A profiled request runs under cProfile with an `execute_wrapper` recording
+  the SQL timeline; the result is stored as a `RequestProfile` row, listed in
+  the admin, and its id returned in the `X-Profile-Id` response header.
+- The row is written when the response is closed (after it was sent), so the
+  INSERT shows up neither in the profile nor in the request's query metrics
+  and budget.
+- cProfile can only be active once per process (Python 3.12+), so a request
+  arriving while another one is being profiled runs unprofiled.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .models import RequestProfile
+
+
+_profiler_lock = threading.Lock()
+
+SQL_TEXT_LIMIT = 2_000
+
+
+def requested_trigger(request) -> str | None:
+    """Why this request should be profiled (a `RequestProfile.Trigger`), or None."""
+
+    header = "HTTP_" + settings.PROFILING_HEADER.upper().replace("-", "_")
+    flagged = request.META.get(header) == "1" or request.GET.get(settings.PROFILING_QUERY_PARAM) == "1"
+    if flagged:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_active and user.is_staff:
+            return RequestProfile.Trigger.REQUESTED
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate > 0 and random.randrange(rate) == 0:
+        return RequestProfile.Trigger.SAMPLED
+    return None
+
+
+class SqlTimeline:
+    """`execute_wrapper` hook recording start offset, duration and SQL text."""
+
+    def __init__(self, origin: float):
+        self.origin = origin
+        self.entries: list[dict] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.entries.append(
+                {
+                    "start_ms": round((started - self.origin) * 1000, 3),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "sql": sql[:SQL_TEXT_LIMIT],
+                    "many": many,
+                }
+            )
+
+
+class Capture:
+    """Results of one profiled block (filled in when the block exits)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.timeline = SqlTimeline(self.started)
+        self.duration_ms = 0.0
+        self.cpu_ms = 0.0
+
+    def to_model(self, **fields) -> RequestProfile:
+        stats = pstats.Stats(self.profiler)
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.PROFILING_TOP_FUNCTIONS)
+        entries = self.timeline.entries
+        return RequestProfile(
+            duration_ms=round(self.duration_ms, 3),
+            cpu_ms=round(self.cpu_ms, 3),
+            sql_count=len(entries),
+            sql_ms=round(sum(entry["duration_ms"] for entry in entries), 3),
+            sql_timeline=entries,
+            profile_text=text.getvalue(),
+            stats=marshal.dumps(stats.stats),
+            **fields,
+        )
+
+
+@contextmanager
+def capture():
+    """Profile the block; yields None (block runs unprofiled) when busy."""
+
+    if not _profiler_lock.acquire(blocking=False):
+        yield None
+        return
+    try:
+        result = Capture()
+        cpu_started = time.thread_time()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(result.timeline))
+            result.profiler.enable()
+            try:
+                yield result
+            finally:
+                result.profiler.disable()
+                result.duration_ms = (time.perf_counter() - result.started) * 1000
+                result.cpu_ms = (time.thread_time() - cpu_started) * 1000
+    finally:
+        _profiler_lock.release()
+
+
+def build(result: Capture, request, response, trigger: str) -> RequestProfile:
+    """Unsaved `RequestProfile` for a finished capture."""
+
+    match = getattr(request, "resolver_match", None)
+    user = getattr(request, "user", None)
+    profile = result.to_model(
+        method=request.method[:10],
+        path=request.get_full_path()[:500],
+        route=match.route.rstrip("$")[:200] if match is not None else "",
+        view_name=(match.view_name or "")[:200] if match is not None else "",
+        status_code=response.status_code,
+        trigger=trigger,
+        user=user if user is not None and user.is_authenticated else None,
+    )
+    return profile
+
+
+def save(profile: RequestProfile) -> None:
+    profile.save(force_insert=True)
+    _trim()
+
+
+def _trim() -> None:
+    keep = settings.PROFILING_KEEP
+    cutoff = RequestProfile.objects.values_list("created_at", flat=True)[keep : keep + 1]
+    if cutoff:
+        RequestProfile.objects.filter(created_at__lte=cutoff[0]).delete()
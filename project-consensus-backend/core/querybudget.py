@@ -0,0 +1,177 @@
+"""
+Per-request SQL recording, N+1 detection and query budgets.
+
+- `QueryRecorder` is a `connection.execute_wrapper` hook that records every
+  statement with a fingerprint (literals and IN-lists normalized).
+- A fingerprint seen `QUERY_BUDGET_N_PLUS_ONE_THRESHOLD` times in one request
+  is reported as a likely N+1. The responsible code is named from the call
+  stack: the DRF serializer field being rendered (`ForumPostSerializer.author`)
+  or, outside serializers, the innermost project source line.
+- Budgets come from `QUERY_BUDGETS` (keyed by "<METHOD> <url name>" or
+  "<url name>") with `QUERY_BUDGET_DEFAULT` as fallback.
+
+`QueryBudgetMiddleware` (core/middleware.py) logs violations; with
+`QUERY_BUDGET_RAISE=True` (see core/testing.py) it raises instead, failing the
+test that made the request.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import Serializer
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised (instead of logged) when `QUERY_BUDGET_RAISE` is enabled."""
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]*)\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT", "BEGIN", "COMMIT", "ROLLBACK")
+
+_SERIALIZER_TO_REPRESENTATION = Serializer.to_representation.__code__
+_CURSOR_MODULE = str(Path("django", "db", "backends", "utils.py"))
+
+
+def fingerprint(sql: str) -> str:
+    """Normalize a statement so repeated executions with other values match."""
+
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _responsible_code() -> str | None:
+    """Name the serializer field and/or project line that triggered the query."""
+
+    base_dir = str(Path(settings.BASE_DIR))
+    project_line = None
+    # Frames inside the cursor call belong to execute wrappers (this recorder,
+    # the metrics counter); only look at callers of Django's cursor layer.
+    below_cursor = True
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if below_cursor:
+            below_cursor = not code.co_filename.endswith(_CURSOR_MODULE)
+        elif code is _SERIALIZER_TO_REPRESENTATION:
+            serializer = frame.f_locals.get("self")
+            current = frame.f_locals.get("field")
+            if serializer is not None and current is not None:
+                label = f"{type(serializer).__name__}.{current.field_name}"
+                return f"{label} ({project_line})" if project_line else label
+        elif project_line is None and code.co_filename.startswith(base_dir) and "site-packages" not in code.co_filename:
+            project_line = f"{Path(code.co_filename).relative_to(base_dir)}:{frame.f_lineno}"
+        frame = frame.f_back
+    return project_line
+
+
+@dataclass
+class QueryRecord:
+    sql: str
+    fingerprint: str
+    seconds: float
+    source: str | None = None
+
+
+@dataclass
+class NPlusOne:
+    fingerprint: str
+    count: int
+    source: str | None
+
+
+class QueryRecorder:
+    """Collect the statements executed while `capture()` is active."""
+
+    def __init__(self):
+        self.records: list[QueryRecord] = []
+        self._seen: Counter[str] = Counter()
+        self._sources: dict[str, str] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if not sql.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+                self._record(sql, elapsed)
+
+    def _record(self, sql: str, elapsed: float) -> None:
+        key = fingerprint(sql)
+        self._seen[key] += 1
+        source = None
+        # Walking the stack is only worth it once a statement repeats
+        if self._seen[key] >= 2:
+            source = _responsible_code()
+            if source is not None:
+                self._sources.setdefault(key, source)
+        self.records.append(QueryRecord(sql, key, elapsed, source))
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(self))
+            yield self
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    def n_plus_one(self, threshold: int | None = None) -> list[NPlusOne]:
+        threshold = threshold or getattr(settings, "QUERY_BUDGET_N_PLUS_ONE_THRESHOLD", 3)
+        return [
+            NPlusOne(key, count, self._sources.get(key))
+            for key, count in self._seen.most_common()
+            if count >= threshold
+        ]
+
+    def problems(self, budget: int | None) -> list[str]:
+        """Human-readable budget / N+1 violations (empty when all is well)."""
+
+        found = []
+        if budget is not None and self.count > budget:
+            found.append(f"{self.count} queries exceed the budget of {budget}")
+        for suspect in self.n_plus_one():
+            found.append(
+                f"N+1: {suspect.count}x from {suspect.source or 'unknown code'}: {suspect.fingerprint[:200]}"
+            )
+        return found
+
+
+def budget_for(method: str, view_name: str | None) -> int | None:
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    if view_name:
+        for key in (f"{method} {view_name}", view_name):
+            if key in budgets:
+                return budgets[key]
+    return getattr(settings, "QUERY_BUDGET_DEFAULT", None)
+
+
+def report(recorder: QueryRecorder, method: str, path: str, view_name: str | None) -> None:
+    """Log the request's violations, or raise them with `QUERY_BUDGET_RAISE`."""
+
+    problems = recorder.problems(budget_for(method, view_name))
+    if problems:
+        message = f"{method} {path} ({view_name}): " + "; ".join(problems)
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning("Query budget: %s", message)
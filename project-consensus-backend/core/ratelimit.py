@@ -0,0 +1,174 @@
+"""
+Atomic sliding-window rate limiting on the Django cache.
+
+- `SlidingWindowLimiter` counts hits with `cache.add` / `cache.incr`, which are
+  atomic on Redis/Memcached (and within one process on LocMem), so concurrent
+  requests can never all read "not limited" and slip through together.
+  A denied hit takes its increment back (`cache.decr`): only allowed hits
+  count, so a client retrying while limited does not extend its own lockout.
+- Limits hold across workers only with a shared cache (CACHE_URL=redis://...;
+  `check --deploy` warns about a per-process one, see core/checks.py).
+- The window is approximated from two fixed buckets (current + weighted
+  previous), which smooths bursts at bucket boundaries with O(1) cache keys.
+- `AtomicRateThrottle` plugs the limiter into DRF's throttling; subclasses pick
+  the identity (IP, user, email) and a `scope` whose rate is read from
+  `REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]`. DRF turns a denial into
+  HTTP 429 with a `Retry-After` header.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+_PERIOD_SECONDS = {"s": 1, "m": 60, "h": 60 * 60, "d": 60 * 60 * 24}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([smhd])[a-z]*\s*$")
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """Parse "<limit>/<period>" into (limit, window seconds).
+
+    Accepts DRF-style rates ("5/min", "100/hour") and multiples ("1/60s", "10/15m").
+    """
+
+    match = _RATE_RE.match(rate)
+    if not match:
+        raise ValueError(f"Invalid rate {rate!r}; expected e.g. '5/min' or '1/60s'")
+    limit, multiplier, unit = match.groups()
+    return int(limit), int(multiplier or 1) * _PERIOD_SECONDS[unit]
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    count: float  # estimated hits in the sliding window, including this one
+    retry_after: int  # seconds until a new hit would be allowed (0 when allowed)
+
+
+class SlidingWindowLimiter:
+    """Sliding-window counter built only from atomic cache operations."""
+
+    key_prefix = "ratelimit"
+
+    def __init__(self, cache_alias: str | None = None):
+        self.cache = caches[cache_alias or getattr(settings, "RATELIMIT_CACHE_ALIAS", "default")]
+
+    def hit(self, key: str, limit: int, window: int, now: float | None = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        bucket = int(now // window)
+        current_key = f"{self.key_prefix}:{key}:{bucket}"
+        previous_key = f"{self.key_prefix}:{key}:{bucket - 1}"
+
+        current = self._incr(current_key, window)
+        previous = self.cache.get(previous_key, 0)
+        elapsed = (now % window) / window
+        estimated = previous * (1 - elapsed) + current
+        if estimated <= limit:
+            return RateLimitResult(True, estimated, 0)
+        self._decr(current_key)
+        return RateLimitResult(False, estimated, self._retry_after(current, previous, limit, window, now))
+
+    def _incr(self, key: str, window: int) -> int:
+        # Keys live for two windows so the next bucket can weight this one.
+        if self.cache.add(key, 1, timeout=window * 2):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr(); start a fresh bucket.
+            self.cache.add(key, 1, timeout=window * 2)
+            return 1
+
+    def _decr(self, key: str) -> None:
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass  # expired meanwhile: nothing to take back
+
+    @staticmethod
+    def _retry_after(current: int, previous: int, limit: int, window: int, now: float) -> int:
+        elapsed = (now % window) / window
+        if current >= limit:
+            # Wait for the bucket to roll over, then for its weight (now the
+            # "previous" bucket) to decay below the limit.
+            decay = max(0.0, 1 - (limit - 1) / current)
+            wait = (1 - elapsed + decay) * window
+        else:
+            # Over only because of the previous bucket's weight.
+            wait = (1 - (limit - current) / previous - elapsed) * window
+        return max(1, math.ceil(wait))
+
+
+class AtomicRateThrottle(BaseThrottle):
+    """DRF throttle backed by `SlidingWindowLimiter`.
+
+    Subclasses set `scope` and implement `get_ident_key`; returning None skips
+    the check (e.g. an email throttle on a request without an email).
+    `methods` restricts the throttle to some HTTP methods (None: all), so a
+    viewset can declare one write throttle without limiting its reads.
+    """
+
+    scope: str = ""
+    methods: tuple[str, ...] | None = None
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if rate is None:
+            raise KeyError(f"No throttle rate configured for scope {self.scope!r}")
+        self.limit, self.window = parse_rate(rate)
+        self.limiter = SlidingWindowLimiter()
+        self._retry_after = 0
+
+    def get_ident_key(self, request, view) -> str | None:
+        raise NotImplementedError
+
+    def allow_request(self, request, view) -> bool:
+        if self.methods is not None and request.method not in self.methods:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+        result = self.limiter.hit(f"{self.scope}:{ident}", self.limit, self.window)
+        self._retry_after = result.retry_after
+        return result.allowed
+
+    def wait(self):
+        return self._retry_after
+
+
+class IPRateThrottle(AtomicRateThrottle):
+    """Limit by client address (honours `NUM_PROXIES` like DRF's throttles)."""
+
+    def get_ident_key(self, request, view):
+        return f"ip:{self.get_ident(request)}"
+
+
+class UserRateThrottle(AtomicRateThrottle):
+    """Limit by authenticated user; anonymous requests fall back to the IP."""
+
+    def get_ident_key(self, request, view):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class EmailRateThrottle(AtomicRateThrottle):
+    """Limit by the (lower-cased) `email` field of the request body."""
+
+    def get_ident_key(self, request, view):
+        try:
+            email = request.data.get("email")
+        except AttributeError:
+            return None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return f"email:{email.strip().lower()}"
@@ -0,0 +1,91 @@
+"""
+Cached, database-backed sessions with throttled expiry refreshes.
+
+Use with `SESSION_ENGINE = "core.sessions"` and `SESSION_SAVE_EVERY_REQUEST = True`.
+
+The stock engines rewrite the session row on every request just to push the
+expiry forward. This engine keeps the rolling `SESSION_COOKIE_AGE` expiry but
+only re-persists an unmodified session once its stored expiry lags the new one
+by more than `SESSION_REFRESH_SLACK_SECONDS`. Modified sessions (login, logout,
+set_expiry, ...) are always written.
+
+Storage is the session cache (`SESSION_CACHE_ALIAS`) with write-through to
+`django_session`, as in `cached_db`. Use a cache shared by all workers
+(CACHE_URL=redis://... or memcached) in multi-process deployments.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+
+KEY_PREFIX = "core.sessions"
+
+# Epoch seconds of the expiry last written to storage. Stored inside the session
+# data so both the cache and the DB copy carry it, but lifted out on load into
+# `SessionStore.persisted_expiry`: views never see it in `request.session`.
+PERSISTED_EXPIRY_KEY = "_core_sessions_persisted_expiry"
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self.persisted_expiry: int | None = None
+
+    def load(self):
+        return self._lift_marker(super().load())
+
+    async def aload(self):
+        return self._lift_marker(await super().aload())
+
+    def save(self, must_create=False):
+        expiry = self.get_expiry_date()
+        if self._is_refresh_only(must_create) and not self._is_stale(expiry):
+            return
+        with self._marked(self._get_session(no_load=must_create), expiry):
+            super().save(must_create)
+
+    async def asave(self, must_create=False):
+        expiry = await self.aget_expiry_date()
+        if self._is_refresh_only(must_create) and not self._is_stale(expiry):
+            return
+        with self._marked(await self._aget_session(no_load=must_create), expiry):
+            await super().asave(must_create)
+
+    def _lift_marker(self, data: dict) -> dict:
+        self.persisted_expiry = data.pop(PERSISTED_EXPIRY_KEY, None)
+        return data
+
+    @contextmanager
+    def _marked(self, session: dict, expiry: datetime):
+        """Carry the marker in the session data for the duration of a write."""
+
+        # Plain dict writes, so the `modified` flag is left untouched. A save
+        # without a key recurses through create(): the outermost call cleans up.
+        outermost = PERSISTED_EXPIRY_KEY not in session
+        session[PERSISTED_EXPIRY_KEY] = int(expiry.timestamp())
+        try:
+            yield
+            self.persisted_expiry = session[PERSISTED_EXPIRY_KEY]
+        finally:
+            if outermost:
+                session.pop(PERSISTED_EXPIRY_KEY, None)
+
+    def _is_refresh_only(self, must_create: bool) -> bool:
+        """True when the save would only push the expiry forward."""
+
+        return not must_create and not self.modified and self.session_key is not None
+
+    def _is_stale(self, expiry: datetime) -> bool:
+        """True when the stored expiry lags `expiry` by more than the slack (or is unknown)."""
+
+        if self.persisted_expiry is None:
+            return True
+        slack = getattr(settings, "SESSION_REFRESH_SLACK_SECONDS", 60 * 60)
+        return expiry.timestamp() - self.persisted_expiry > slack
@@ -0,0 +1,141 @@
+"""
+Sparse fieldsets: `?fields=id,title,author` on read endpoints.
+
+- Serializers mix in `SparseFieldsetSerializerMixin`; the top-level
+  serializer (or the child of a `many=True` list) drops every field that was
+  not requested. Nested serializers are left alone.
+- Plain fields need the model column named by their `source`. Method fields
+  declare the model paths they read in `Meta.sparse_sources`
+  (`{"author": ["author__username", "author__profile"]}`; `[]` for values
+  that come from annotations). `Meta.sparse_required` lists paths needed no
+  matter what was requested (e.g. read in `to_representation`).
+- Viewsets mix in `SparseFieldsetViewMixin` and pass their base queryset
+  through `prune_queryset()`: `only()` the needed columns and
+  `select_related()` only the joins the remaining fields traverse. Without
+  `?fields=` this still trims the query to what the serializer renders.
+  `wants(name)` lets `get_queryset` skip annotations (counts, `Exists`) for
+  fields that are not in the response.
+- Only safe methods are pruned; writes and their responses always see full
+  instances. Unknown field names are rejected with 400.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+FIELDS_PARAM = "fields"
+
+
+def requested_fields(request) -> frozenset[str] | None:
+    """Field names from `?fields=a,b` (None when absent or empty)."""
+
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    raw = request.query_params.get(FIELDS_PARAM, "")
+    names = frozenset(name.strip() for name in raw.split(",") if name.strip())
+    return names or None
+
+
+@lru_cache(maxsize=None)
+def _declared_fields(serializer_class) -> dict:
+    # Unbound instance without a request: every field, as declared
+    return dict(serializer_class().fields)
+
+
+@lru_cache(maxsize=1024)
+def _model_paths(serializer_class, names: frozenset[str]) -> frozenset[str]:
+    fields = _declared_fields(serializer_class)
+    meta = serializer_class.Meta
+    sources = getattr(meta, "sparse_sources", {})
+    paths = set(getattr(meta, "sparse_required", ()))
+    for name in names:
+        if name in sources:
+            paths.update(sources[name])
+        elif fields[name].source != "*":
+            paths.add(fields[name].source.replace(".", "__"))
+    return frozenset(paths)
+
+
+def _resolve(model, path: str) -> tuple[str, str | None]:
+    """(`only()` path, `select_related()` path or None) for a model path.
+
+    - "title" / "author" (forward FK): the local column, no join
+    - "author__username": join `author`
+    - "author__profile" (reverse one-to-one): join `author__profile`
+    """
+
+    opts = model._meta
+    names: list[str] = []
+    joined = 0
+    parts = path.split("__")
+    for index, part in enumerate(parts):
+        field = opts.get_field(part)
+        names.append(field.name)
+        if field.is_relation and (index < len(parts) - 1 or not field.concrete):
+            joined = index + 1
+            opts = field.related_model._meta
+    return "__".join(names), "__".join(names[:joined]) or None
+
+
+class SparseFieldsetSerializerMixin:
+    """Render only the `?fields=` subset (see module docstring)."""
+
+    def get_fields(self):  # type: ignore[override]
+        fields = super().get_fields()  # type: ignore[misc]
+        if not self._is_sparse_root():
+            return fields
+        wanted = requested_fields(self.context.get("request"))  # type: ignore[attr-defined]
+        if wanted is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in wanted}
+
+    def _is_sparse_root(self) -> bool:
+        parent = self.parent  # type: ignore[attr-defined]
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+
+class SparseFieldsetViewMixin:
+    """Validate `?fields=` and trim the queryset to what the response needs."""
+
+    def sparse_field_names(self) -> frozenset[str]:
+        """Fields the response renders: the `?fields=` subset or all of them."""
+
+        available = _declared_fields(self.get_serializer_class())  # type: ignore[attr-defined]
+        wanted = requested_fields(self.request)  # type: ignore[attr-defined]
+        if wanted is None:
+            return frozenset(available)
+        unknown = sorted(wanted - available.keys())
+        if unknown:
+            raise ValidationError({FIELDS_PARAM: [f"Unknown field(s): {', '.join(unknown)}"]})
+        return wanted
+
+    def wants(self, name: str) -> bool:
+        """Whether field `name` is rendered (always True for writes)."""
+
+        if self.request.method not in SAFE_METHODS:  # type: ignore[attr-defined]
+            return True
+        return name in self.sparse_field_names()
+
+    def prune_queryset(self, queryset):
+        """`only()` + `select_related()` for the rendered fields (safe methods only)."""
+
+        if self.request.method not in SAFE_METHODS:  # type: ignore[attr-defined]
+            return queryset
+        paths = _model_paths(self.get_serializer_class(), self.sparse_field_names())  # type: ignore[attr-defined]
+        model = queryset.model
+        columns = {model._meta.pk.name}
+        joins = set()
+        for path in paths:
+            column, join = _resolve(model, path)
+            columns.add(column)
+            if join:
+                joins.add(join)
+        queryset = queryset.select_related(None)
+        if joins:
+            queryset = queryset.select_related(*sorted(joins))
+        return queryset.only(*sorted(columns))
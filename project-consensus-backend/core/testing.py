@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from unittest import SkipTest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Profile
+from .querybudget import QueryBudgetExceeded, QueryRecorder
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_RAISE=True)
+class QueryBudgetTestCase(TestCase):
+    """TestCase where a request over its query budget, or looping N+1, fails the test.
+
+    `assertQueryBudget` applies the same checks to code that runs outside a
+    request (serializers, querysets).
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget: int):
+        recorder = QueryRecorder()
+        with recorder.capture():
+            yield recorder
+        problems = recorder.problems(budget)
+        if problems:
+            raise QueryBudgetExceeded("; ".join(problems))
+
+
+def make_user(name: str):
+    """A user `<name>@connect.polyu.hk` (password "pw") with a profile."""
+
+    email = f"{name}@connect.polyu.hk"
+    user = get_user_model().objects.create_user(username=email, email=email, password="pw")
+    Profile.objects.create(user=user, display_name=name.title())
+    return user
+
+
+def plan_problems(plan: dict, tables: frozenset[str]) -> list[str]:
+    """Seq Scans on `tables` and explicit sorts anywhere in an EXPLAIN (FORMAT JSON) plan node."""
+
+    problems = []
+    kind = plan["Node Type"]
+    if kind == "Seq Scan" and plan.get("Relation Name") in tables:
+        problems.append(f"Seq Scan on {plan['Relation Name']}")
+    elif kind in ("Sort", "Incremental Sort"):
+        problems.append(f"{kind} by {', '.join(plan.get('Sort Key', []))}")
+    for child in plan.get("Plans", ()):
+        problems.extend(plan_problems(child, tables))
+    return problems
+
+
+class QueryPlanTestCase(TestCase):
+    """TestCase that EXPLAINs the queries of a request (PostgreSQL only, skipped elsewhere).
+
+    `assertIndexedPlans(url, tables)` fails when a query touching `tables`
+    plans a sequential scan of one of them or an explicit sort. Plans are
+    taken with `enable_seqscan` / `enable_sort` off: the planner then picks
+    those only when no index can serve the query, so the check holds on a
+    small seeded database regardless of table sizes and statistics.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        if connection.vendor != "postgresql":
+            raise SkipTest("query plans are checked on PostgreSQL")
+        super().setUpClass()
+
+    def explain(self, sql: str) -> dict:
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute("SET enable_sort = off")
+            try:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0]
+            finally:
+                cursor.execute("RESET enable_seqscan")
+                cursor.execute("RESET enable_sort")
+        if isinstance(plan, str):  # pragma: no cover - drivers without JSON decoding
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+
+    def assertIndexedPlans(self, url: str, tables: set[str] | frozenset[str]) -> None:
+        tables = frozenset(tables)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        checked = 0
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or not any(f'"{table}"' in sql for table in tables):
+                continue
+            checked += 1
+            plan = self.explain(sql)
+            problems = plan_problems(plan, tables)
+            if problems:
+                self.fail(f"{url}: {'; '.join(problems)}\n{sql}\n{json.dumps(plan, indent=2)}")
+        self.assertTrue(checked, f"{url}: no query touched {sorted(tables)}")
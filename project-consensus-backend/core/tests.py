@@ -1,3 +1,742 @@
-from django.test import TestCase
+from __future__ import annotations
 
-# Create your tests here.
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.db import IntegrityError, OperationalError, connection, connections
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from prometheus_client.parser import text_string_to_metric_families
+
+from courses.models import Course, CourseReview
+from forum.models import ForumPost, ForumPostComment
+from . import jobs, microbench, sessions, warmup
+from .metrics import render_metrics
+from .models import Job, RequestProfile
+from .ratelimit import SlidingWindowLimiter, parse_rate
+from .testing import QueryBudgetTestCase, QueryPlanTestCase
+
+
+def _run_concurrently(func, count: int) -> list:
+    """Run `func` in `count` threads released at the same instant."""
+
+    barrier = threading.Barrier(count)
+
+    def task():
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        futures = [pool.submit(task) for _ in range(count)]
+        return [f.result() for f in futures]
+
+
+@override_settings(DATABASE_REPLICA_ALIASES=["replica_test"])
+class ReadReplicaRoutingTests(TransactionTestCase):
+    """`replica_test` is a second connection to the test database, so routed reads still see the data."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Added here rather than in the class body: the runner checks the
+        # declared databases before any test database exists
+        connections.settings["replica_test"] = {**connections["default"].settings_dict}
+        cls.addClassCleanup(cls.drop_replica)
+        cls.databases = {"default", "replica_test"}
+        super().setUpClass()
+
+    @classmethod
+    def drop_replica(cls):
+        connections["replica_test"].close()
+        del connections["replica_test"]
+        del connections.settings["replica_test"]
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user("route@connect.polyu.hk", "route@connect.polyu.hk", "pw")
+        ForumPost.objects.create(title="Routed", content="<p>x</p>", author=self.user)
+
+    def queries_by_alias(self, request):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica_test"]) as replica:
+                response = request()
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_the_replica(self):
+        response, primary, replica = self.queries_by_alias(lambda: self.client.get("/api/forum/posts/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 1)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertNotIn("pin_primary", response.cookies)
+
+    def test_writes_and_a_live_pin_read_from_the_primary(self):
+        self.client.force_login(self.user)
+        body = {"title": "New", "content": "<p>y</p>"}
+        response, primary, replica = self.queries_by_alias(
+            lambda: self.client.post("/api/forum/posts/", body, content_type="application/json")
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        # The pin cookie set by the write keeps the next reads on the primary
+        self.assertIn("pin_primary", response.cookies)
+        response, primary, replica = self.queries_by_alias(lambda: self.client.get("/api/forum/posts/"))
+        self.assertEqual(response.json()["count"], 2)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        # An expired pin no longer does
+        self.client.cookies["pin_primary"] = "1"
+        response, primary, replica = self.queries_by_alias(lambda: self.client.get("/api/forum/posts/"))
+        self.assertGreater(replica, 0)
+
+    def test_reads_outside_a_request_stay_on_the_primary(self):
+        # Commands and jobs read back what they just wrote
+        _, primary, replica = self.queries_by_alias(lambda: list(ForumPost.objects.all()))
+        self.assertEqual((primary, replica), (1, 0))
+        _, primary, replica = self.queries_by_alias(
+            lambda: call_command(
+                "generate_dataset",
+                users=3,
+                posts=1,
+                comments=0,
+                likes=0,
+                courses=0,
+                reviews=0,
+                review_replies=0,
+                prefix="routed",
+                stdout=io.StringIO(),
+            )
+        )
+        self.assertEqual(replica, 0)
+        self.assertEqual(get_user_model().objects.filter(username__startswith="routed").count(), 3)
+
+    def test_batch_post_is_a_read(self):
+        body = {"requests": [{"path": "/api/forum/posts/"}]}
+        response, primary, replica = self.queries_by_alias(
+            lambda: self.client.post("/api/batch/", body, content_type="application/json")
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["responses"][0]["status"], 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertNotIn("pin_primary", response.cookies)
+
+
+class InternalEndpointTests(TestCase):
+    url = "/api/metrics/executors/"
+
+    def test_denied_by_default_even_from_loopback(self):
+        # The test client's REMOTE_ADDR is 127.0.0.1, like every client behind a local proxy
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION="Bearer ").status_code, 403)
+
+    @override_settings(INTERNAL_API_TOKEN="s3cret")
+    def test_bearer_token(self):
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+
+    @override_settings(INTERNAL_IPS=["127.0.0.1"])
+    def test_internal_ips(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR="203.0.113.7").status_code, 403)
+
+    def test_staff(self):
+        User = get_user_model()
+        staff = User.objects.create_user("ops@connect.polyu.hk", "ops@connect.polyu.hk", "pw", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+@override_settings(INTERNAL_IPS=["127.0.0.1"])
+class MetricsMiddlewareTests(TestCase):
+    def sample(self, body: str, name: str, **labels) -> float:
+        for family in text_string_to_metric_families(body):
+            for sample in family.samples:
+                if sample.name == name and all(sample.labels.get(k) == v for k, v in labels.items()):
+                    return sample.value
+        return 0.0
+
+    def test_requests_are_labelled_by_route_pattern_and_status(self):
+        route = "api/forum/posts/(?P<pk>[^/.]+)/"
+        user = get_user_model().objects.create_user("m@connect.polyu.hk", "m@connect.polyu.hk", "pw")
+        post = ForumPost.objects.create(title="Metrics", content="<p>x</p>", author=user)
+        before = self.client.get("/api/metrics/").content.decode()
+
+        self.assertEqual(self.client.get(f"/api/forum/posts/{post.pk}/").status_code, 200)
+        self.assertEqual(self.client.get("/api/forum/posts/00000000-0000-0000-0000-000000000000/").status_code, 404)
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+
+        def delta(name, **labels):
+            return self.sample(body, name, **labels) - self.sample(before, name, **labels)
+
+        for status in ("200", "404"):
+            self.assertEqual(delta("http_requests_total", method="GET", route=route, status=status), 1)
+        # One series per pattern, whatever the id in the path
+        self.assertNotIn(str(post.pk), body)
+        self.assertEqual(delta("http_request_duration_seconds_count", method="GET", route=route), 2)
+        self.assertGreater(delta("http_request_db_queries_sum", method="GET", route=route), 0)
+
+
+class DatabasePoolTests(SimpleTestCase):
+    def test_health_checks_become_the_pool_check(self):
+        # config/settings.py relies on this instead of a "check" pool option
+        try:
+            from django.db.backends.postgresql.base import DatabaseWrapper
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            self.skipTest("psycopg is not installed")
+        settings_dict = {
+            **connection.settings_dict,
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": "unused",
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {"pool": {"min_size": 1, "name": "check"}},
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias="pool_check_test")
+        try:
+            self.assertIs(wrapper.pool._check, ConnectionPool.check_connection)  # built, not opened
+        finally:
+            wrapper.close_pool()
+
+
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        store = sessions.SessionStore()
+        store["theme"] = "dark"
+        store.save()
+        self.key = store.session_key
+
+    def save_writes(self, store) -> int:
+        """`django_session` statements run by `store.save()`."""
+
+        with CaptureQueriesContext(connection) as queries:
+            store.save()
+        return sum("django_session" in query["sql"] for query in queries.captured_queries)
+
+    def test_refresh_only_save_within_the_slack_skips_the_write(self):
+        store = sessions.SessionStore(self.key)
+        self.assertEqual(store["theme"], "dark")
+        self.assertEqual(self.save_writes(store), 0)
+        with override_settings(SESSION_REFRESH_SLACK_SECONDS=-1):
+            self.assertEqual(self.save_writes(sessions.SessionStore(self.key)), 1)
+
+    def test_data_changes_are_always_written(self):
+        store = sessions.SessionStore(self.key)
+        store["theme"] = "light"
+        self.assertEqual(self.save_writes(store), 1)
+        cache.clear()
+        self.assertEqual(sessions.SessionStore(self.key)["theme"], "light")
+
+    def test_marker_is_stored_but_hidden_from_the_session(self):
+        store = sessions.SessionStore(self.key)
+        self.assertEqual(dict(store.items()), {"theme": "dark"})
+        self.assertIsNotNone(store.persisted_expiry)
+        stored = store.decode(Session.objects.get(session_key=self.key).session_data)
+        self.assertIn(sessions.PERSISTED_EXPIRY_KEY, stored)
+        cache.clear()  # from the DB copy too
+        store = sessions.SessionStore(self.key)
+        self.assertEqual(dict(store.items()), {"theme": "dark"})
+        self.assertEqual(store.persisted_expiry, stored[sessions.PERSISTED_EXPIRY_KEY])
+
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("5/min"), (5, 60))
+        self.assertEqual(parse_rate("100/hour"), (100, 3600))
+        self.assertEqual(parse_rate("1/60s"), (1, 60))
+        self.assertEqual(parse_rate("10/15m"), (10, 900))
+        with self.assertRaises(ValueError):
+            parse_rate("ten per minute")
+
+    def test_concurrent_hits_never_exceed_limit(self):
+        limiter = SlidingWindowLimiter()
+        now = 1_000_000.0  # fixed instant: all hits land in one bucket
+        results = _run_concurrently(lambda: limiter.hit("test:concurrent", 10, 60, now=now), 50)
+        self.assertEqual(sum(r.allowed for r in results), 10)
+        self.assertTrue(all(r.retry_after >= 1 for r in results if not r.allowed))
+
+    def test_denied_hits_do_not_extend_the_lockout(self):
+        limiter = SlidingWindowLimiter()
+        for _ in range(2):
+            self.assertTrue(limiter.hit("test:retry", 2, 60, now=6000).allowed)
+        for _ in range(20):
+            self.assertFalse(limiter.hit("test:retry", 2, 60, now=6000).allowed)
+        self.assertEqual(cache.get("ratelimit:test:retry:100"), 2)
+        # Late in the next bucket only the two allowed hits weigh in
+        self.assertTrue(limiter.hit("test:retry", 2, 60, now=6110).allowed)
+
+    def test_previous_bucket_is_weighted(self):
+        limiter = SlidingWindowLimiter()
+        for _ in range(10):
+            self.assertTrue(limiter.hit("test:slide", 10, 60, now=60 * 100 + 59).allowed)
+        # Just after the boundary almost the whole previous bucket still counts
+        self.assertFalse(limiter.hit("test:slide", 10, 60, now=60 * 101 + 1).allowed)
+        # Near the end of the next bucket its weight has decayed
+        self.assertTrue(limiter.hit("test:slide", 10, 60, now=60 * 101 + 55).allowed)
+
+
+class RateLimitedEndpointTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_verification_code_endpoint_under_concurrency(self):
+        def send():
+            return Client().post(
+                "/api/accounts/send_verification_code/",
+                {"email": "Race@connect.polyu.hk"},
+                content_type="application/json",
+            )
+
+        responses = _run_concurrently(send, 20)
+        codes = sorted(r.status_code for r in responses)
+        self.assertEqual(codes.count(200), 1)
+        self.assertEqual(codes.count(429), 19)
+        throttled = next(r for r in responses if r.status_code == 429)
+        self.assertGreaterEqual(int(throttled["Retry-After"]), 1)
+
+
+class GenerateDatasetTests(TestCase):
+    def test_generates_consistent_trees_and_counters(self):
+        call_command(
+            "generate_dataset",
+            users=20,
+            posts=15,
+            comments=200,
+            likes=150,
+            courses=5,
+            reviews=30,
+            review_replies=40,
+            batch_size=50,
+            prefix="t",
+            stdout=io.StringIO(),
+        )
+        posts = ForumPost.objects.filter(author__username__startswith="t-")
+        self.assertEqual(posts.count(), 15)
+        comments = ForumPostComment.objects.filter(post__in=posts)
+        self.assertEqual(comments.count(), 200)
+        replies = comments.filter(parent__isnull=False)
+        self.assertTrue(replies.exists())
+        # Every reply hangs off a main comment of the same post and targets its parent's author
+        self.assertFalse(replies.filter(main_comment__isnull=True).exists())
+        self.assertFalse(replies.filter(main_comment__parent__isnull=False).exists())
+        self.assertFalse(replies.exclude(main_comment__post=F("post")).exists())
+        self.assertFalse(replies.exclude(reply_to_user=F("parent__author")).exists())
+        for post in posts:
+            self.assertEqual(post.likes_count, post.likes.count())
+        for course in Course.objects.filter(subject_id__startswith="T-"):
+            self.assertEqual(course.rating_reviews_count, course.reviews.count())
+
+
+    def test_prefixes_coexist_with_the_same_seed(self):
+        sizes = dict(users=3, posts=4, comments=10, likes=5, courses=2, reviews=4, review_replies=4, batch_size=50)
+        for prefix in ("a", "b"):
+            call_command("generate_dataset", prefix=prefix, seed=42, stdout=io.StringIO(), **sizes)
+        a = set(ForumPost.objects.filter(author__username__startswith="a-").values_list("pk", flat=True))
+        b = set(ForumPost.objects.filter(author__username__startswith="b-").values_list("pk", flat=True))
+        self.assertEqual((len(a), len(b)), (4, 4))
+        self.assertFalse(a & b)
+        self.assertEqual(ForumPostComment.objects.filter(post__in=a | b).count(), 20)
+
+
+class MicrobenchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        microbench.seed_fixture()
+
+    def test_query_counts_match_baseline(self):
+        # Query counts do not depend on the vendor: fall back to the SQLite
+        # baseline until one is recorded for this database
+        path = microbench.baseline_path()
+        baseline = json.loads((path if path.exists() else microbench.baseline_path("sqlite")).read_text())
+        report = microbench.run_suite(repeat=1, warmup=0)
+        self.assertEqual(set(report["cases"]), set(baseline["cases"]))
+        self.assertEqual(microbench.compare(baseline, report, time_threshold=float("inf"), alloc_threshold=float("inf")), [])
+
+
+class ListEndpointPlanTests(QueryPlanTestCase):
+    """Every filtered list endpoint is served from an index, in order (see the models' Meta.indexes).
+
+    Not covered: `?search=` (ILIKE scans by design) and the unpaginated
+    `/api/courses/` catalogue, which reads the whole table.
+    """
+
+    TABLES = {
+        "auth_user",
+        "accounts_profile",
+        "forum_forumpost",
+        "forum_forumpostcomment",
+        "forum_forumpostlike",
+        "courses_coursereview",
+        "courses_coursereviewreply",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_dataset",
+            users=50,
+            posts=40,
+            comments=800,
+            likes=400,
+            courses=10,
+            reviews=200,
+            review_replies=300,
+            batch_size=500,
+            prefix="plan",
+            stdout=io.StringIO(),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        replies = ForumPostComment.objects.filter(parent__isnull=False)
+        cls.reply = replies.filter(replies__isnull=False).first() or replies.first()
+        cls.post_id, cls.main_id = cls.reply.post_id, cls.reply.main_comment_id
+        cls.review = CourseReview.objects.filter(replies__isnull=False).first()
+        cls.user = get_user_model().objects.filter(username__startswith="plan-").first()
+
+    def test_forum_lists(self):
+        self.client.force_login(self.user)
+        for url in (
+            "/api/forum/posts/",
+            f"/api/forum/comments/?postId={self.post_id}",
+            f"/api/forum/comments/?postId={self.post_id}&isMain=1",
+            f"/api/forum/comments/?mainCommentId={self.main_id}",
+            f"/api/forum/comments/?parentId={self.reply.pk}",
+        ):
+            with self.subTest(url=url):
+                self.assertIndexedPlans(url, self.TABLES)
+
+    def test_course_lists(self):
+        for url in (f"/api/reviews/?course={self.review.course_id}", f"/api/replies/?review={self.review.pk}"):
+            with self.subTest(url=url):
+                self.assertIndexedPlans(url, self.TABLES)
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0)
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_superuser("staff@connect.polyu.hk", "staff@connect.polyu.hk", "pw")
+        cls.member = User.objects.create_user("member@connect.polyu.hk", "member@connect.polyu.hk", "pw")
+
+    def test_staff_header_stores_profile(self):
+        self.client.force_login(self.staff)
+        response = self.client.get("/api/forum/posts/", headers={"X-Profile": "1"})
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual(profile.trigger, RequestProfile.Trigger.REQUESTED)
+        self.assertEqual(profile.route, "api/forum/posts/")
+        self.assertEqual(profile.sql_count, len(profile.sql_timeline))
+        self.assertGreater(profile.sql_count, 0)
+        self.assertIn("cumulative", profile.profile_text)
+
+        page = self.client.get(f"/admin/core/requestprofile/{profile.pk}/change/")
+        self.assertContains(page, "SQL timeline")
+        download = self.client.get(f"/admin/core/requestprofile/{profile.pk}/download/")
+        self.assertEqual(bytes(download.content), bytes(profile.stats))
+        self.assertEqual(self.client.get("/admin/core/requestprofile/").status_code, 200)
+
+    def test_flag_ignored_for_non_staff(self):
+        self.client.force_login(self.member)
+        response = self.client.get("/api/forum/posts/?_profile=1")
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_KEEP=2)
+    def test_sampling_and_retention(self):
+        for _ in range(4):
+            self.client.get("/api/health/")
+        self.assertEqual(RequestProfile.objects.count(), 2)
+        self.assertEqual(RequestProfile.objects.first().trigger, RequestProfile.Trigger.SAMPLED)
+
+
+class BatchEndpointTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user("batch@connect.polyu.hk", "batch@connect.polyu.hk", "pw")
+        cls.post = ForumPost.objects.create(title="Batched", content="<p>x</p>", author=cls.user)
+        cls.main = ForumPostComment.objects.create(post=cls.post, author=cls.user, content="Main")
+        ForumPostComment.objects.create(post=cls.post, author=cls.user, content="Reply", parent=cls.main)
+
+    def batch(self, *paths: str, **item):
+        body = {"requests": [{"id": str(i), "path": path, **item} for i, path in enumerate(paths)]}
+        return self.client.post("/api/batch/", body, content_type="application/json")
+
+    def test_matches_separate_calls_in_fewer_queries(self):
+        self.client.force_login(self.user)
+        paths = [
+            "/api/accounts/me/",
+            "/api/forum/posts/",
+            f"/api/forum/posts/{self.post.pk}/",
+            f"/api/forum/comments/?mainCommentId={self.main.pk}",
+            "/api/courses/",
+        ]
+        separate = []
+        with CaptureQueriesContext(connection) as separate_queries:
+            for path in paths:
+                separate.append(self.client.get(path))
+        with CaptureQueriesContext(connection) as batch_queries:
+            response = self.batch(*paths)
+
+        self.assertEqual(response.status_code, 200)
+        for alone, together in zip(separate, response.json()["responses"]):
+            self.assertEqual(together["status"], alone.status_code)
+            self.assertEqual(together["body"], alone.json())
+            self.assertEqual(together["headers"]["Content-Type"], "application/json")
+        # Session and user are loaded once for the batch, not once per call
+        self.assertLess(len(batch_queries), len(separate_queries))
+
+    def test_anonymous_sub_requests_keep_their_own_status(self):
+        results = self.batch("/api/accounts/me/", "/api/forum/posts/", "/api/nope/").json()["responses"]
+        self.assertEqual([r["status"] for r in results], [401, 200, 404])
+        self.assertEqual([r["id"] for r in results], ["0", "1", "2"])
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_rejects_malformed_batches(self):
+        self.assertEqual(self.batch("/api/health/", "/api/health/", "/api/health/").status_code, 400)
+        self.assertEqual(self.batch("/api/health/", method="POST").status_code, 400)
+        self.assertEqual(self.batch("/admin/").status_code, 400)
+        self.assertEqual(self.batch("http://example.com/api/health/").status_code, 400)
+        self.assertEqual(self.batch("/api/batch/").status_code, 400)
+        self.assertEqual(self.client.post("/api/batch/", {"requests": []}, content_type="application/json").status_code, 400)
+
+    def test_response_bytes_and_time_limits(self):
+        with override_settings(BATCH_MAX_RESPONSE_BYTES=100):
+            results = self.batch("/api/health/", "/api/forum/posts/", "/api/health/").json()["responses"]
+        self.assertEqual([r["status"] for r in results], [200, 413, 200])
+        self.assertEqual(results[0]["body"], {"status": "ok"})
+
+        with override_settings(BATCH_TIMEOUT_SECONDS=-1):
+            results = self.batch("/api/health/").json()["responses"]
+        self.assertEqual(results[0]["status"], 504)
+
+
+class WarmCachesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user("warm@connect.polyu.hk", "warm@connect.polyu.hk", "pw")
+        post = ForumPost.objects.create(title="Hot", content="<p>x</p>", author=cls.user, likes_count=5)
+        ForumPostComment.objects.create(post=post, author=cls.user, content="Main")
+
+    def test_sessions_are_loaded_back_into_an_empty_cache(self):
+        self.client.force_login(self.user)
+        cache.clear()
+        results = warmup.warm(["sessions"], concurrency=1)
+        self.assertEqual([(r.name, r.error) for r in results], [("sessions", None)])
+        self.assertGreaterEqual(results[0].items, 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get("/api/accounts/me/").status_code, 200)
+        self.assertFalse([q for q in queries if "django_session" in q["sql"]])
+        # Entries already in the cache are newer than their rows: left alone
+        self.assertEqual(warmup.warm(["sessions"], concurrency=1)[0].items, 0)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "OPTIONS": {"MAX_ENTRIES": 3}}},
+        WARM_CACHES_SESSIONS=2000,
+    )
+    def test_sessions_are_capped_at_a_locmem_cache_size(self):
+        later = timezone.now() + timedelta(days=365)
+        keys = [f"warm{i}" for i in range(5)]
+        for i, key in enumerate(keys):
+            Session.objects.create(
+                session_key=key, session_data=sessions.SessionStore().encode({}), expire_date=later + timedelta(hours=i)
+            )
+
+        self.assertEqual(warmup.warm(["sessions"], concurrency=1)[0].items, 3)
+        prefix = sessions.SessionStore.cache_key_prefix
+        self.assertEqual([key for key in keys if cache.has_key(prefix + key)], keys[2:])
+
+    def test_command_reports_every_warmer(self):
+        out = io.StringIO()
+        call_command("warm_caches", concurrency=1, stdout=out)
+        report = out.getvalue()
+        for name in warmup.WARMERS:
+            self.assertIn(name, report)
+        self.assertIn("total", report)
+
+    def test_failing_warmer_does_not_stop_the_others(self):
+        def broken() -> int:
+            raise RuntimeError("boom")
+
+        with mock.patch.dict(warmup.WARMERS, {"broken": broken}), self.assertLogs("core.warmup", "ERROR"):
+            results = warmup.warm(["broken", "threads"], concurrency=1)
+        self.assertEqual(results[0].error, "RuntimeError: boom")
+        self.assertIsNone(results[1].error)
+        self.assertGreaterEqual(results[1].items, 1)
+
+    @override_settings(WARM_CACHES_ON_BOOT=False)
+    def test_boot_hook_is_off_by_default(self):
+        self.assertEqual(warmup.on_worker_boot(), [])
+
+
+@override_settings(JOBS_BACKOFF_SECONDS=10, JOBS_MAX_ATTEMPTS=3)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(jobs.TASKS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+
+        @jobs.task("tests.record")
+        def record(value: int):
+            self.calls.append(value)
+
+        @jobs.task("tests.broken", max_attempts=2)
+        def broken():
+            raise RuntimeError("boom")
+
+        self.record, self.broken = record, broken
+
+    def due(self, job: Job) -> None:
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+
+    def test_jobs_run_in_due_order_and_done_ones_are_deleted(self):
+        later = self.record.enqueue(value=3, run_at=timezone.now() + timedelta(hours=1))
+        self.record.enqueue(value=1)
+        self.record.enqueue(value=2)
+        while (job := jobs.claim("test")) is not None:
+            self.assertEqual(job.status, Job.Status.RUNNING)
+            self.assertEqual(jobs.run(job), "done")
+        self.assertEqual(self.calls, [1, 2])
+        self.assertEqual(list(Job.objects.values_list("pk", flat=True)), [later.pk])  # not due yet
+
+    def test_retries_back_off_then_fail(self):
+        job = self.broken.enqueue()
+        with self.assertLogs("core.jobs", "ERROR"):
+            self.assertEqual(jobs.run(jobs.claim("test")), "retried")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (Job.Status.PENDING, 1, "RuntimeError: boom"))
+        self.assertAlmostEqual((job.run_at - timezone.now()).total_seconds(), 10, delta=2)
+        self.assertIsNone(jobs.claim("test"))
+
+        self.due(job)
+        with self.assertLogs("core.jobs", "ERROR"):
+            self.assertEqual(jobs.run(jobs.claim("test")), "failed")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+        self.assertEqual(jobs.retry_delay(3), timedelta(seconds=40))
+
+    def test_keys_deduplicate_pending_jobs(self):
+        first = self.record.enqueue(value=1, key="recount:1")
+        self.assertEqual(self.record.enqueue(value=2, key="recount:1").pk, first.pk)
+        jobs.run(jobs.claim("test"))
+        self.assertNotEqual(self.record.enqueue(value=3, key="recount:1").pk, first.pk)
+
+    def test_key_freed_between_insert_and_lookup(self):
+        save = Job.save
+        attempts = []
+
+        def racing_save(job, *args, **kwargs):
+            attempts.append(job)
+            if len(attempts) == 1:
+                raise IntegrityError("duplicate key value violates unique constraint")
+            return save(job, *args, **kwargs)
+
+        with mock.patch.object(Job, "save", racing_save):
+            job = self.record.enqueue(value=1, key="recount:1")
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(Job.objects.get(key="recount:1").pk, job.pk)
+
+    def test_expired_leases_go_back_to_pending(self):
+        job = self.record.enqueue(value=1)
+        claimed = jobs.claim("crashed")
+        self.assertIsNone(jobs.claim("other"))
+        Job.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.requeue_expired(), 1)
+        again = jobs.claim("other")
+        self.assertEqual((again.pk, again.attempts), (job.pk, 2))
+        # The first worker lost it: its late outcome is not recorded
+        jobs.run(claimed)
+        self.assertEqual(Job.objects.get(pk=job.pk).locked_by, "other")
+
+    def test_periodic_jobs_are_rearmed(self):
+        self.assertEqual(jobs.ensure_periodic({"tests.record": 60, "tests.broken": 60}), 2)
+        self.assertEqual(jobs.ensure_periodic({"tests.record": 60, "tests.broken": 60}), 0)
+        Job.objects.filter(name="tests.record").update(payload={"value": 7})
+
+        ran = []
+        with self.assertLogs("core.jobs", "ERROR"):
+            while (job := jobs.claim("test")) is not None:
+                ran.append((job.name, jobs.run(job)))
+                if ran[-1][1] == "retried":
+                    self.due(job)
+        self.assertEqual(ran, [("tests.record", "done"), ("tests.broken", "retried"), ("tests.broken", "failed")])
+        for job in Job.objects.all():
+            self.assertEqual((job.status, job.attempts), (Job.Status.PENDING, 0))
+            self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(Job.objects.get(name="tests.broken").last_error, "RuntimeError: boom")
+
+        jobs.ensure_periodic({"tests.record": 30})
+        self.assertEqual(list(Job.objects.values_list("name", "periodic_seconds")), [("tests.record", 30)])
+
+    def test_zero_interval_turns_a_periodic_job_off(self):
+        self.assertEqual(jobs.ensure_periodic({"tests.record": 60}), 1)
+        self.assertEqual(jobs.ensure_periodic({"tests.record": 0}), 0)
+        self.assertFalse(Job.objects.exists())
+
+        # A running row whose interval was set to 0 meanwhile is re-armed, not divided by
+        self.record.enqueue(value=1)
+        job = jobs.claim("test")
+        job.periodic_seconds = 0
+        jobs._rearm(job, "")
+        self.assertLess(Job.objects.get().run_at, timezone.now() + timedelta(seconds=2))
+
+    def test_queue_depth_and_latency_metrics(self):
+        self.record.enqueue(value=1, run_at=timezone.now() - timedelta(minutes=5))
+        self.record.enqueue(value=2)
+        stats = {(task, status): (n, age) for task, status, n, age in jobs.queue_stats()}
+        self.assertEqual(stats[("tests.record", "pending")][0], 2)
+        self.assertGreaterEqual(stats[("tests.record", "pending")][1], 299)
+
+        jobs.run(jobs.claim("test"))
+        body = render_metrics()[0].decode()
+        self.assertIn('job_queue_depth{status="pending",task="tests.record"} 1.0', body)
+        self.assertIn('jobs_processed_total{outcome="done",task="tests.record"}', body)
+        self.assertIn('job_queue_latency_seconds_count{task="tests.record"}', body)
+
+
+class RunWorkerTests(TransactionTestCase):
+    def test_worker_threads_drain_the_queue(self):
+        for i in range(6):
+            jobs.enqueue("forum.flush_post_views", key=f"flush:{i}")
+        out = io.StringIO()
+        call_command("run_worker", once=True, concurrency=1, no_periodic=True, stdout=out)
+        self.assertIn("done=6 retried=0 failed=0", out.getvalue())
+        self.assertFalse(Job.objects.exists())
+
+    def test_worker_threads_survive_database_errors(self):
+        jobs.enqueue("forum.flush_post_views")
+        claim = jobs.claim
+        calls = []
+
+        def flaky_claim(worker):
+            calls.append(worker)
+            if len(calls) == 1:
+                raise OperationalError("server closed the connection unexpectedly")
+            return claim(worker)
+
+        with mock.patch.object(jobs, "claim", flaky_claim), self.assertLogs("core.jobs", "ERROR"):
+            report = jobs.Worker(concurrency=1, poll_interval=0, once=True).run()
+        self.assertEqual(report.outcomes["done"], 1)
+        self.assertFalse(Job.objects.exists())
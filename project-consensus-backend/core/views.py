@@ -1,9 +1,39 @@
+import os
+
+from django.http import HttpResponse
 from django.shortcuts import render
 
 # Create your views here.
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from .db_pool import pool_stats
+from .executors import executor_stats
+from .metrics import render_metrics
+from .permissions import IsInternalRequest
+
 @api_view(["GET"])
 def health(request):
-    return Response({"status": "ok"})
\ No newline at end of file
+    return Response({"status": "ok"})
+
+
+@api_view(["GET"])
+@permission_classes([IsInternalRequest])
+def db_pool_metrics(request):
+    """Connection pool statistics of the worker process serving this request."""
+    return Response({"pid": os.getpid(), "pools": pool_stats()})
+
+
+@api_view(["GET"])
+@permission_classes([IsInternalRequest])
+def executor_metrics(request):
+    """Bounded executor statistics (e.g. password hashing) of this worker process."""
+    return Response({"pid": os.getpid(), "executors": executor_stats()})
+
+
+@api_view(["GET"])
+@permission_classes([IsInternalRequest])
+def prometheus_metrics(request):
+    """Prometheus text exposition (aggregated across workers in multiprocess mode)."""
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
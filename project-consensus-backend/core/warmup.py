@@ -0,0 +1,192 @@
+"""
+Cache warming after a deploy: `python manage.py warm_caches`, or per worker at boot.
+
+- Warmers (`WARMERS`) each load one part of the hot working set and return
+  how many items they touched:
+  - "sessions": the most recently active sessions (by rolling expiry) into
+    the session cache (core/sessions.py), so returning users skip the
+    `django_session` lookup; existing cache entries are left alone. A
+    per-process cache (LocMem) gets at most its MAX_ENTRIES (default 300),
+    and sessions go in oldest first, so if it culls it drops the least
+    recently active ones rather than the hottest.
+  - "feed": the first WARM_CACHES_FEED_PAGES pages of the post list.
+  - "threads": the main comments of the WARM_CACHES_HOT_POSTS most liked posts.
+  - "courses": the course catalog and the reviews of the
+    WARM_CACHES_HOT_COURSES most reviewed courses.
+  - "catalog": the process's course catalog snapshot (courses/catalog.py).
+  The list warmers run the viewsets' own queryset, pagination and serializer
+  code, which pulls the pages' index and table blocks into the database's
+  buffer cache and builds the worker's lazy per-process state.
+- `warm()` runs them with at most WARM_CACHES_CONCURRENCY threads (each
+  with its own database connection) and reports items and seconds per
+  warmer; one failing warmer does not stop the others.
+- The session cache is per process with the default LocMem backend: only
+  `on_worker_boot()` (called from the server's worker-init hook) warms it
+  there; the command warms shared caches (CACHE_URL) and the database.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Callable
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import connections
+from django.test import RequestFactory
+from django.utils import timezone
+
+from .checks import is_shared_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmResult:
+    name: str
+    items: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+
+def _render_list(viewset_cls, pages: int = 1, **query) -> int:
+    """Rows of the first `pages` list pages, rendered as an anonymous GET would."""
+
+    rows = 0
+    for page in range(1, pages + 1):
+        request = RequestFactory().get("/", {**query, "page": page} if pages > 1 else query)
+        request.user = AnonymousUser()
+        view = viewset_cls(action="list", action_map={"get": "list"}, format_kwarg=None, args=(), kwargs={})
+        view.request = view.initialize_request(request)
+        queryset = view.filter_queryset(view.get_queryset())
+        page_rows = view.paginate_queryset(queryset)
+        data = view.get_serializer(list(queryset) if page_rows is None else page_rows, many=True).data
+        rows += len(data)
+        if page_rows is None or not view.paginator.page.has_next():
+            break
+    return rows
+
+
+def warm_sessions() -> int:
+    from django.contrib.sessions.models import Session
+
+    store_cls = import_module(settings.SESSION_ENGINE).SessionStore
+    prefix = getattr(store_cls, "cache_key_prefix", None)
+    if prefix is None:  # not a cache-backed engine
+        return 0
+    alias = settings.SESSION_CACHE_ALIAS
+    cache = caches[alias]
+    limit = settings.WARM_CACHES_SESSIONS
+    if not is_shared_cache(alias):
+        # Past MAX_ENTRIES LocMem culls a third of its entries per add
+        limit = min(limit, settings.CACHES[alias].get("OPTIONS", {}).get("MAX_ENTRIES", 300))
+    now = timezone.now()
+    rows = list(Session.objects.filter(expire_date__gt=now).order_by("-expire_date")[:limit])
+    decoder = store_cls()
+    added = 0
+    for row in reversed(rows):  # the most recently active last, as the most recently used entries
+        timeout = int((row.expire_date - now).total_seconds())
+        # add(): a session the worker already touched is newer than the row
+        added += bool(cache.add(prefix + row.session_key, decoder.decode(row.session_data), timeout))
+    return added
+
+
+def warm_feed() -> int:
+    from forum.views import ForumPostViewSet
+
+    return _render_list(ForumPostViewSet, pages=settings.WARM_CACHES_FEED_PAGES)
+
+
+def warm_threads() -> int:
+    from forum.models import ForumPost
+    from forum.views import ForumPostCommentViewSet
+
+    hot = ForumPost.objects.order_by("-likes_count").values_list("pk", flat=True)[: settings.WARM_CACHES_HOT_POSTS]
+    return sum(_render_list(ForumPostCommentViewSet, postId=str(pk), isMain="1") for pk in hot)
+
+
+def warm_courses() -> int:
+    from courses.models import Course
+    from courses.views import CourseReviewViewSet, CourseViewSet
+
+    rows = _render_list(CourseViewSet)
+    hot = Course.objects.order_by("-rating_reviews_count").values_list("pk", flat=True)[: settings.WARM_CACHES_HOT_COURSES]
+    return rows + sum(_render_list(CourseReviewViewSet, course=str(pk)) for pk in hot)
+
+
+def warm_catalog() -> int:
+    from courses import catalog
+
+    return len(catalog.current())
+
+
+WARMERS: dict[str, Callable[[], int]] = {
+    "sessions": warm_sessions,
+    "feed": warm_feed,
+    "threads": warm_threads,
+    "courses": warm_courses,
+    "catalog": warm_catalog,
+}
+
+
+def _run(name: str, threaded: bool) -> WarmResult:
+    result = WarmResult(name)
+    started = time.perf_counter()
+    try:
+        result.items = WARMERS[name]()
+    except Exception as exc:
+        logger.exception("Cache warmer %r failed", name)
+        result.error = f"{type(exc).__name__}: {exc}"
+    finally:
+        result.seconds = time.perf_counter() - started
+        if threaded:
+            connections.close_all()
+    return result
+
+
+def warm(names: list[str] | None = None, concurrency: int | None = None, timeout: float | None = None) -> list[WarmResult]:
+    """Run the warmers (all by default); concurrency 1 runs them in this thread.
+
+    Warmers still running after `timeout` seconds are reported as timed out
+    and left to finish in the background.
+    """
+
+    names = list(names or WARMERS)
+    concurrency = concurrency or settings.WARM_CACHES_CONCURRENCY
+    if concurrency <= 1:
+        return [_run(name, threaded=False) for name in names]
+
+    executor = ThreadPoolExecutor(max_workers=min(concurrency, len(names)), thread_name_prefix="warm-caches")
+    futures = {name: executor.submit(_run, name, True) for name in names}
+    wait(futures.values(), timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+    return [
+        future.result() if future.done() and not future.cancelled() else WarmResult(name, error="timed out")
+        for name, future in futures.items()
+    ]
+
+
+def on_worker_boot() -> list[WarmResult]:
+    """Warm this worker when WARM_CACHES_ON_BOOT is set; call from the server's worker-init hook.
+
+    E.g. in gunicorn.conf.py: `def post_worker_init(worker): on_worker_boot()`.
+    Bounded by WARM_CACHES_TIMEOUT, so a slow database delays the worker's
+    first request by at most that long.
+    """
+
+    if not settings.WARM_CACHES_ON_BOOT:
+        return []
+    started = time.perf_counter()
+    results = warm(timeout=settings.WARM_CACHES_TIMEOUT)
+    logger.info(
+        "Warmed caches in %.2fs: %s",
+        time.perf_counter() - started,
+        ", ".join(f"{r.name}={r.error or r.items}" for r in results),
+    )
+    return results
@@ -0,0 +1,209 @@
+"""
+In-process snapshot of the course catalog, serving `GET /api/courses/`.
+
+- One immutable `CatalogSnapshot` per worker process holds the catalog as
+  NumPy columns: categorical codes for department, term semester and the
+  four attribute choices, term year, `rating_score` (float64), reviews count
+  and sort ranks. Each course's response dict (`CourseSerializer`) is
+  rendered once, when the snapshot is built.
+- A list request is a boolean mask (one vectorized comparison per filter)
+  and, with `?ordering=`, a stable argsort of the survivors; the response
+  is the pre-rendered rows at those positions, cut to `?fields=`.
+- Freshness: every request reads `(max(last_updated), count)` (one
+  aggregate query); a different pair rebuilds the snapshot (one SELECT of
+  the table) and swaps it in, so readers never see a half-built one. API
+  writes stamp `last_updated`; code changing courses with `update()` or
+  `bulk_update()` must stamp it too.
+- `CatalogQuery.apply()` is the same filter/order on a queryset, used when
+  `COURSE_CATALOG_SNAPSHOT=False` and as the reference in tests and
+  `bench_course_catalog`. Code order is by code point, which may differ from
+  the database collation for mixed-case codes.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.db.models import Count, Max
+from rest_framework.exceptions import ValidationError
+
+from .models import Course
+
+
+# Query parameter -> categorical column; values are comma-separated, any of them matches
+CATEGORICAL = {
+    "department": "department",
+    "semester": "term_semester",
+    "difficulty": "attr_difficulty",
+    "workload": "attr_workload",
+    "grading": "attr_grading",
+    "gain": "attr_gain",
+}
+# `?ordering=` names (prefix "-" for descending) -> model field; ties keep id order
+ORDERINGS = {
+    "rating": "rating_score",
+    "reviews": "rating_reviews_count",
+    "code": "subject_code",
+    "year": "term_year",
+    "updated": "last_updated",
+}
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+@dataclass(frozen=True)
+class CatalogQuery:
+    """Filters and ordering of a course list request."""
+
+    categorical: tuple[tuple[str, frozenset[str]], ...] = ()
+    year: int | None = None
+    min_rating: float | None = None
+    max_rating: float | None = None
+    ordering: str | None = None
+
+    @classmethod
+    def from_params(cls, params) -> "CatalogQuery":
+        """Parse `?department=&semester=&difficulty=&workload=&grading=&gain=&year=&minRating=&maxRating=&ordering=`."""
+
+        errors = {}
+        categorical = []
+        for param, field in CATEGORICAL.items():
+            values = frozenset(v.strip() for v in params.get(param, "").split(",") if v.strip())
+            if values:
+                categorical.append((field, values))
+
+        def number(param: str, kind):
+            raw = params.get(param)
+            if raw in (None, ""):
+                return None
+            try:
+                return kind(raw)
+            except ValueError:
+                errors[param] = ["A valid number is required."]
+                return None
+
+        ordering = params.get("ordering") or None
+        if ordering is not None and ordering.lstrip("-") not in ORDERINGS:
+            errors["ordering"] = [f"Choose from {', '.join(ORDERINGS)} (prefix - for descending)."]
+        query = cls(
+            categorical=tuple(categorical),
+            year=number("year", int),
+            min_rating=number("minRating", float),
+            max_rating=number("maxRating", float),
+            ordering=ordering,
+        )
+        if errors:
+            raise ValidationError(errors)
+        return query
+
+    def apply(self, queryset):
+        """The same filters and ordering on a Course queryset."""
+
+        for field, values in self.categorical:
+            queryset = queryset.filter(**{f"{field}__in": values})
+        if self.year is not None:
+            queryset = queryset.filter(term_year=self.year)
+        if self.min_rating is not None:
+            queryset = queryset.filter(rating_score__gte=self.min_rating)
+        if self.max_rating is not None:
+            queryset = queryset.filter(rating_score__lte=self.max_rating)
+        if self.ordering:
+            field = ORDERINGS[self.ordering.lstrip("-")]
+            return queryset.order_by(f"-{field}" if self.ordering.startswith("-") else field, "pk")
+        return queryset.order_by("pk")
+
+
+def _codes(values: list) -> tuple[dict, np.ndarray]:
+    """(value -> code, codes per row); codes follow the sorted order of the values."""
+
+    vocabulary, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return {value: code for code, value in enumerate(vocabulary.tolist())}, codes.astype(np.int32)
+
+
+class CatalogSnapshot:
+    """Columns and pre-rendered rows of every course, in id order."""
+
+    def __init__(self, version: tuple, courses: list[Course], rows: list[dict]):
+        self.version = version
+        self.rows = rows
+        self.vocabulary: dict[str, dict[str, int]] = {}
+        self.columns: dict[str, np.ndarray] = {}
+        for field in CATEGORICAL.values():
+            self.vocabulary[field], self.columns[field] = _codes([getattr(c, field) for c in courses])
+        # Sort keys: numbers as they are, codes by rank, timestamps in microseconds
+        self.columns["subject_code"] = _codes([c.subject_code for c in courses])[1]
+        self.columns["term_year"] = np.fromiter((c.term_year for c in courses), np.int32, len(courses))
+        self.columns["rating_score"] = np.fromiter((c.rating_score for c in courses), np.float64, len(courses))
+        self.columns["rating_reviews_count"] = np.fromiter(
+            (c.rating_reviews_count for c in courses), np.int64, len(courses)
+        )
+        self.columns["last_updated"] = np.fromiter(
+            ((c.last_updated - _EPOCH) // timedelta(microseconds=1) for c in courses), np.int64, len(courses)
+        )
+        for column in self.columns.values():
+            column.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def build(cls, version: tuple) -> "CatalogSnapshot":
+        from .serializers import CourseSerializer
+
+        courses = list(Course.objects.order_by("pk"))
+        return cls(version, courses, [dict(row) for row in CourseSerializer(courses, many=True).data])
+
+    def select(self, query: CatalogQuery) -> np.ndarray:
+        """Row positions matching `query`, in its order."""
+
+        mask = np.ones(len(self.rows), dtype=bool)
+        for field, values in query.categorical:
+            vocabulary = self.vocabulary[field]
+            # Lookup table over the (small) vocabulary, then one gather per row
+            allowed = np.zeros(len(vocabulary), dtype=bool)
+            allowed[[vocabulary[v] for v in values if v in vocabulary]] = True
+            mask &= allowed[self.columns[field]]
+        if query.year is not None:
+            mask &= self.columns["term_year"] == query.year
+        if query.min_rating is not None:
+            mask &= self.columns["rating_score"] >= query.min_rating
+        if query.max_rating is not None:
+            mask &= self.columns["rating_score"] <= query.max_rating
+        positions = np.flatnonzero(mask)
+        if query.ordering:
+            keys = self.columns[ORDERINGS[query.ordering.lstrip("-")]][positions]
+            positions = positions[np.argsort(-keys if query.ordering.startswith("-") else keys, kind="stable")]
+        return positions
+
+    def render(self, positions: np.ndarray, fields: frozenset[str] | None = None) -> list[dict]:
+        """Response rows at `positions`, cut to `fields` (None: every field)."""
+
+        rows = self.rows
+        if fields is None:
+            return [rows[i] for i in positions.tolist()]
+        return [{k: v for k, v in rows[i].items() if k in fields} for i in positions.tolist()]
+
+
+_snapshot: CatalogSnapshot | None = None
+_lock = threading.Lock()
+
+
+def catalog_version() -> tuple:
+    row = Course.objects.aggregate(updated=Max("last_updated"), count=Count("pk"))
+    return row["updated"], row["count"]
+
+
+def current() -> CatalogSnapshot:
+    """This process's snapshot, rebuilt first when the catalog changed."""
+
+    global _snapshot
+    version = catalog_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = CatalogSnapshot.build(version)
+        return _snapshot
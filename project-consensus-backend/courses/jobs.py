@@ -0,0 +1,11 @@
+"""Background tasks of the courses app (core/jobs.py)."""
+
+from __future__ import annotations
+
+from core.jobs import task
+from . import similarity
+
+
+@task("courses.build_similar_courses", lease_seconds=60 * 60)
+def build_similar_courses(k: int | None = None) -> int:
+    return similarity.rebuild(k=k).rows
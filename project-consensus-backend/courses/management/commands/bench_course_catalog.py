@@ -0,0 +1,108 @@
+"""
+Course list filtering: the NumPy catalog snapshot against the ORM path.
+
+- Runs a set of `/api/courses/` query strings (single filters, combined
+  filters, rating ranges, orderings) `--repeat` times each through both
+  paths of courses/catalog.py and reports median microseconds for:
+  - `orm_ids`: the filtered, ordered queryset's ids (one SQL query)
+  - `orm_list`: the full ORM list, rows fetched and serialized
+  - `select`: the snapshot's vectorized mask + argsort
+  - `snapshot_list`: select + the pre-rendered rows (the served path, less
+    its one version-check query, timed separately as `version`)
+- Checks that both paths return the same ids for every query.
+
+Uses the configured database; seed courses first, e.g.
+`python manage.py generate_dataset --courses 5000`.
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from courses import catalog
+from courses.models import Course
+from courses.serializers import CourseSerializer
+
+
+def _median_us(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1_000_000, 1)
+
+
+class Command(BaseCommand):
+    help = "Compare course list filtering on the in-process NumPy snapshot with the ORM path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=30, help="Runs per query and path (default 30)")
+        parser.add_argument("--output", help="Write the report as JSON to this path")
+
+    def queries(self) -> list[str]:
+        department = (
+            Course.objects.exclude(department="").values_list("department", flat=True).order_by("department").first()
+            or "Computing"
+        )
+        year = Course.objects.values_list("term_year", flat=True).order_by("-term_year").first() or 2025
+        return [
+            "",
+            f"department={department}",
+            "difficulty=hard,veryHard",
+            f"year={year}&semester=fall&ordering=-rating",
+            "workload=light,moderate&grading=lenient&gain=high",
+            "minRating=7&ordering=-reviews",
+            f"department={department}&difficulty=easy,medium&minRating=5&maxRating=9&ordering=code",
+        ]
+
+    def handle(self, *args, **options):
+        count = Course.objects.count()
+        if not count:
+            raise CommandError("No courses; seed the database first (python manage.py generate_dataset).")
+        repeat = options["repeat"]
+
+        started = time.perf_counter()
+        snapshot = catalog.current()
+        build_ms = round((time.perf_counter() - started) * 1000, 1)
+        report = {
+            "courses": count,
+            "snapshot_build_ms": build_ms,
+            "version_us": _median_us(catalog.catalog_version, repeat),
+            "queries": [],
+        }
+        for raw in self.queries():
+            query = catalog.CatalogQuery.from_params(QueryDict(raw))
+            queryset = query.apply(Course.objects.all())
+            orm_ids = list(queryset.values_list("pk", flat=True))
+            snapshot_ids = [snapshot.rows[i]["id"] for i in snapshot.select(query)]
+            if orm_ids != snapshot_ids:
+                raise CommandError(f"?{raw}: the snapshot returned other rows than the ORM")
+            report["queries"].append(
+                {
+                    "query": raw or "(none)",
+                    "rows": len(orm_ids),
+                    "orm_ids_us": _median_us(lambda: list(queryset.values_list("pk", flat=True)), repeat),
+                    "orm_list_us": _median_us(lambda: CourseSerializer(queryset.all(), many=True).data, repeat),
+                    "select_us": _median_us(lambda: snapshot.select(query), repeat),
+                    "snapshot_list_us": _median_us(lambda: snapshot.render(snapshot.select(query)), repeat),
+                }
+            )
+
+        self.stdout.write(
+            f"{count} courses; snapshot built in {build_ms} ms; version check {report['version_us']} us"
+        )
+        self.stdout.write(f"{'query':<58} {'rows':>6} {'orm ids':>9} {'orm list':>10} {'select':>8} {'snap list':>10}")
+        for row in report["queries"]:
+            self.stdout.write(
+                f"{row['query'][:58]:<58} {row['rows']:>6} {row['orm_ids_us']:>9} {row['orm_list_us']:>10} "
+                f"{row['select_us']:>8} {row['snapshot_list_us']:>10}"
+            )
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n")
@@ -0,0 +1,29 @@
+"""
+Rebuild the precomputed similar courses (courses/similarity.py).
+
+Run after review imports; `run_worker` also runs it daily (JOBS_PERIODIC). Until
+the first run `GET /api/courses/<id>/similar/` answers an empty list.
+"""
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from courses import similarity
+
+
+class Command(BaseCommand):
+    help = "Recompute every course's top-K similar courses from review aggregates and store them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--k", type=int, help="Neighbours per course (default COURSE_SIMILAR_K)")
+        parser.add_argument(
+            "--chunk-size", type=int, help="Courses per similarity block (default COURSE_SIMILAR_CHUNK_SIZE)"
+        )
+
+    def handle(self, *args, **options):
+        result = similarity.rebuild(k=options["k"], chunk_size=options["chunk_size"])
+        self.stdout.write(
+            f"{result.courses} courses -> {result.rows} rows: features {result.features_seconds:.2f}s, "
+            f"neighbours {result.neighbours_seconds:.2f}s, store {result.store_seconds:.2f}s"
+        )
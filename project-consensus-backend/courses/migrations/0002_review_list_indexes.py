@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="course",
+            name="courses_cou_subject_3506dc_idx",
+        ),
+        migrations.AlterField(
+            model_name="coursereview",
+            name="course",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reviews",
+                to="courses.course",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="coursereviewreply",
+            name="review",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="replies",
+                to="courses.coursereview",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="coursereview",
+            index=models.Index(fields=["course", "-created_at"], name="courses_review_course_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="coursereviewreply",
+            index=models.Index(fields=["review", "created_at"], name="courses_reply_review_idx"),
+        ),
+    ]
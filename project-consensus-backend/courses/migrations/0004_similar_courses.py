@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0003_review_author_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarCourse",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.PositiveSmallIntegerField()),
+                ("score", models.FloatField()),
+                (
+                    "course",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="courses.course",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="courses.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Similar course",
+                "verbose_name_plural": "Similar courses",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("course", "rank"),
+                        name="courses_similar_course_rank_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
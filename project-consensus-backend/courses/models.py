@@ -66,9 +66,7 @@ class Course(models.Model):
     last_updated = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        indexes = [
-            models.Index(fields=["subject_id"]),
-        ]
+        # subject_id is unique, which already indexes it
         verbose_name = "Course"
         verbose_name_plural = "Courses"
 
@@ -80,8 +78,12 @@ class CourseReview(models.Model):
     """Course review model."""
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="reviews")
-    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="course_reviews")
+    # Indexed by `courses_review_course_idx` (course_id first)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="reviews", db_index=False)
+    # Indexed by `courses_review_author_idx` (author_id first)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="course_reviews", db_index=False
+    )
     overall_rating = models.FloatField(default=0)
 
     attr_difficulty = models.CharField(max_length=10, choices=Course.Difficulty.choices, default=Course.Difficulty.MEDIUM)
@@ -101,6 +103,12 @@ class CourseReview(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # `GET /api/reviews/?course=<id>`, newest first
+            models.Index(fields=["course", "-created_at"], name="courses_review_course_idx"),
+            # "My reviews" (`/api/accounts/me/reviews/`)
+            models.Index(fields=["author", "-created_at"], name="courses_review_author_idx"),
+        ]
         verbose_name = "Course review"
         verbose_name_plural = "Course reviews"
 
@@ -109,7 +117,8 @@ class CourseReviewReply(models.Model):
     """Single-level course review reply model."""
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    review = models.ForeignKey(CourseReview, on_delete=models.CASCADE, related_name="replies")
+    # Indexed by `courses_reply_review_idx` (review_id first)
+    review = models.ForeignKey(CourseReview, on_delete=models.CASCADE, related_name="replies", db_index=False)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
@@ -119,5 +128,31 @@ class CourseReviewReply(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # `GET /api/replies/?review=<id>`, oldest first
+            models.Index(fields=["review", "created_at"], name="courses_reply_review_idx"),
+        ]
         verbose_name = "Course review reply"
         verbose_name_plural = "Course review replies"
+
+
+class SimilarCourse(models.Model):
+    """Precomputed "similar courses": the top-K neighbours of each course.
+
+    Rebuilt by `python manage.py build_similar_courses` (courses/similarity.py);
+    `GET /api/courses/<id>/similar/` reads one course's rows in rank order.
+    """
+
+    # Indexed by the (course, rank) unique constraint
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+", db_index=False)
+    rank = models.PositiveSmallIntegerField()
+    similar = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            # Also the index of the per-course lookup, already in rank order
+            models.UniqueConstraint(fields=["course", "rank"], name="courses_similar_course_rank_uniq"),
+        ]
+        verbose_name = "Similar course"
+        verbose_name_plural = "Similar courses"
@@ -5,6 +5,7 @@ from rest_framework import serializers
 
 from accounts.models import Profile
 from accounts.serializers import AuthorSerializer
+from core.sparse import SparseFieldsetSerializerMixin
 from .models import Course, CourseReview, CourseReviewReply
 
 
@@ -19,7 +20,7 @@ def _author_payload_for(user: User) -> dict:
         return {"id": str(user.pk), "name": user.get_username(), "avatar": None}
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer aligning with the frontend Course type structure."""
 
     term = serializers.SerializerMethodField()
@@ -41,6 +42,12 @@ class CourseSerializer(serializers.ModelSerializer):
             "last_updated",
         ]
         read_only_fields = ["id", "last_updated"]
+        # Model paths read by the method fields (`?fields=`, core/sparse.py)
+        sparse_sources = {
+            "term": ["term_year", "term_semester"],
+            "rating": ["rating_score", "rating_reviews_count"],
+            "attributes": ["attr_difficulty", "attr_workload", "attr_grading", "attr_gain"],
+        }
 
     def get_term(self, obj: Course):
         return {"year": obj.term_year, "semester": obj.term_semester}
@@ -57,7 +64,7 @@ class CourseSerializer(serializers.ModelSerializer):
         }
 
 
-class CourseReviewSerializer(serializers.ModelSerializer):
+class CourseReviewSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer aligning with the frontend CourseReview type."""
 
     author = serializers.SerializerMethodField()
@@ -83,6 +90,10 @@ class CourseReviewSerializer(serializers.ModelSerializer):
             "replies_count",
         ]
         read_only_fields = ["id", "createdAt", "updatedAt"]
+        sparse_sources = {
+            "author": ["author__username", "author__profile"],
+            "attributes": ["attr_difficulty", "attr_workload", "attr_grading", "attr_gain"],
+        }
 
     def get_author(self, obj: CourseReview) -> dict:
         return _author_payload_for(obj.author)
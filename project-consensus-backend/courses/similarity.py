@@ -0,0 +1,160 @@
+"""
+Similar courses, precomputed: `python manage.py build_similar_courses`.
+
+- One feature vector per course, from its reviews' aggregates:
+  - difficulty, workload, grading and gain: the share of reviews picking each
+    choice. The course's own `attr_*` counts as COURSE_SIMILAR_PRIOR extra
+    reviews, so courses with few (or no) reviews still get a profile and
+    one review does not decide it.
+  - rating: `rating_score / 10` as the pair (r, 1 - r), so that two high
+    (or two low) ratings point the same way.
+  - department: one-hot (empty department: zeros).
+  Each block is scaled by its weight in `WEIGHTS`; rows are L2-normalized,
+  so a dot product is the cosine similarity.
+- The aggregates are four GROUP BY queries over the reviews plus one read of
+  the courses, never a query per course.
+- Neighbours: `X[chunk] @ X.T` for COURSE_SIMILAR_CHUNK_SIZE courses at a
+  time (memory stays chunk x courses), the course itself masked out, then
+  `argpartition` for the top K and a sort of those K.
+- Stored in `SimilarCourse`, (course, rank) -> (similar, score), replaced in
+  one transaction; readers see the old or the new table, never a mix.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Course, CourseReview, SimilarCourse
+
+
+# Review attribute -> its choices, in a fixed column order
+ATTRIBUTES = {
+    "attr_difficulty": Course.Difficulty.values,
+    "attr_workload": Course.Workload.values,
+    "attr_grading": Course.Grading.values,
+    "attr_gain": Course.Gain.values,
+}
+# Block weights in the feature vector
+WEIGHTS = {
+    "attr_difficulty": 1.0,
+    "attr_workload": 1.0,
+    "attr_grading": 0.75,
+    "attr_gain": 0.75,
+    "rating": 1.0,
+    "department": 0.5,
+}
+
+
+@dataclass
+class BuildResult:
+    courses: int = 0
+    rows: int = 0
+    features_seconds: float = 0.0
+    neighbours_seconds: float = 0.0
+    store_seconds: float = 0.0
+
+
+def features() -> tuple[np.ndarray, np.ndarray]:
+    """(course ids, L2-normalized float32 feature rows), in id order."""
+
+    courses = list(
+        Course.objects.order_by("pk").values_list("pk", "department", "rating_score", *ATTRIBUTES)
+    )
+    ids = np.fromiter((row[0] for row in courses), np.int64, len(courses))
+    position = {pk: i for i, pk in enumerate(ids.tolist())}
+    blocks = []
+
+    prior = settings.COURSE_SIMILAR_PRIOR
+    for column, (field, choices) in enumerate(ATTRIBUTES.items(), start=3):
+        index = {choice: i for i, choice in enumerate(choices)}
+        counts = np.zeros((len(courses), len(choices)), dtype=np.float64)
+        for i, row in enumerate(courses):
+            if row[column] in index:
+                counts[i, index[row[column]]] = prior
+        # order_by(): no Meta ordering in the GROUP BY
+        grouped = CourseReview.objects.order_by().values_list("course_id", field).annotate(n=Count("pk"))
+        for course_id, value, n in grouped:
+            if course_id in position and value in index:
+                counts[position[course_id], index[value]] += n
+        totals = counts.sum(axis=1, keepdims=True)
+        blocks.append(WEIGHTS[field] * np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0))
+
+    rating = np.clip(np.fromiter((row[2] for row in courses), np.float64, len(courses)) / 10, 0, 1)
+    blocks.append(WEIGHTS["rating"] * np.stack([rating, 1 - rating], axis=1))
+
+    departments = sorted({row[1] for row in courses if row[1]})
+    department_index = {name: i for i, name in enumerate(departments)}
+    onehot = np.zeros((len(courses), len(departments)), dtype=np.float64)
+    for i, row in enumerate(courses):
+        if row[1]:
+            onehot[i, department_index[row[1]]] = 1
+    blocks.append(WEIGHTS["department"] * onehot)
+
+    matrix = np.hstack(blocks)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+    return ids, matrix.astype(np.float32)
+
+
+def top_k(matrix: np.ndarray, k: int, chunk_size: int = 1024) -> tuple[np.ndarray, np.ndarray]:
+    """(neighbour positions, scores), both (rows, min(k, rows - 1)), best first.
+
+    Ties are broken by position, i.e. by course id.
+    """
+
+    n = len(matrix)
+    k = min(k, n - 1)
+    neighbours = np.empty((n, max(k, 0)), dtype=np.int64)
+    scores = np.empty((n, max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return neighbours, scores
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        block = matrix[start:stop] @ matrix.T
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # not its own neighbour
+        if k < n - 1:
+            candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(n), block.shape)
+        candidate_scores = np.take_along_axis(block, candidates, axis=1)
+        # Best score first, then lowest position; the course itself (-inf) sorts last
+        order = np.lexsort((candidates, -candidate_scores), axis=1)[:, :k]
+        neighbours[start:stop] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:stop] = np.take_along_axis(candidate_scores, order, axis=1)
+    return neighbours, scores
+
+
+def rebuild(k: int | None = None, chunk_size: int | None = None) -> BuildResult:
+    """Recompute every course's top `k` similar courses and replace the table."""
+
+    k = k or settings.COURSE_SIMILAR_K
+    chunk_size = chunk_size or settings.COURSE_SIMILAR_CHUNK_SIZE
+    result = BuildResult()
+
+    started = time.perf_counter()
+    ids, matrix = features()
+    result.courses = len(ids)
+    result.features_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    neighbours, scores = top_k(matrix, k, chunk_size)
+    result.neighbours_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rows = [
+        SimilarCourse(course_id=course_id, rank=rank, similar_id=similar_id, score=round(score, 6))
+        for course_id, similar, similar_scores in zip(ids.tolist(), ids[neighbours].tolist(), scores.tolist())
+        for rank, (similar_id, score) in enumerate(zip(similar, similar_scores), start=1)
+    ]
+    with transaction.atomic():
+        SimilarCourse.objects.all().delete()
+        SimilarCourse.objects.bulk_create(rows, batch_size=1000)
+    result.rows = len(rows)
+    result.store_seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+import random
+
+import numpy as np
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.testing import QueryBudgetTestCase, make_user
+from . import catalog, similarity
+from .models import Course, CourseReview, CourseReviewReply, SimilarCourse
+
+
+User = get_user_model()
+
+
+class CourseEndpointQueryBudgetTests(QueryBudgetTestCase):
+    """Course, review and reply routes with several rows per page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [make_user(f"student{i}") for i in range(4)]
+        cls.courses = [
+            Course.objects.create(
+                subject_id=f"COMP{i:04d}",
+                subject_code=f"COMP{i:04d}",
+                title=f"Course {i}",
+                term_year=2025,
+                term_semester=Course.Semester.FALL,
+            )
+            for i in range(8)
+        ]
+        cls.course = cls.courses[0]
+        cls.reviews = [
+            CourseReview.objects.create(course=cls.course, author=cls.users[i % 4], overall_rating=8, content=f"Review {i}")
+            for i in range(8)
+        ]
+        cls.review = cls.reviews[0]
+        cls.replies = [
+            CourseReviewReply.objects.create(
+                review=cls.review,
+                author=cls.users[(i + 1) % 4],
+                reply_to_user=cls.review.author,
+                content=f"Reply {i}",
+            )
+            for i in range(8)
+        ]
+
+    def assertWriteAccess(self, url: str, allowed, denied) -> None:
+        """Anonymous and `denied` users get 403 on PATCH/DELETE; `allowed` can edit, then delete."""
+
+        for user in (None, denied):
+            with self.subTest(user=user):
+                self.client.logout()
+                if user is not None:
+                    self.client.force_login(user)
+                self.assertEqual(self.client.patch(url, {"content": "x"}, content_type="application/json").status_code, 403)
+                self.assertEqual(self.client.delete(url).status_code, 403)
+        self.client.force_login(allowed)
+        self.assertEqual(self.client.patch(url, {"content": "Edited"}, content_type="application/json").status_code, 200)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+    def test_course_routes(self):
+        self.assertEqual(len(self.client.get("/api/courses/").json()), 8)
+        url = f"/api/courses/{self.course.pk}/"
+        self.assertEqual(self.client.get(url).status_code, 200)
+        staff = make_user("staff")
+        staff.is_staff = True
+        staff.save(update_fields=["is_staff"])
+        self.assertWriteAccess(url, allowed=staff, denied=self.users[0])
+        body = {"subjectId": "NEW0001", "subjectCode": "NEW0001", "title": "New"}
+        self.client.force_login(self.users[0])
+        self.assertEqual(self.client.post("/api/courses/", body, content_type="application/json").status_code, 403)
+
+    def test_review_routes(self):
+        for query in ("", f"?course={self.course.pk}"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/reviews/{query}").status_code, 200)
+        url = f"/api/reviews/{self.review.pk}/"
+        self.assertEqual(self.client.get(url).json()["author"]["name"], self.review.author.profile.display_name)
+        self.assertWriteAccess(url, allowed=self.review.author, denied=self.users[1])
+
+    def test_reply_routes(self):
+        for query in ("", f"?review={self.review.pk}"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/replies/{query}").status_code, 200)
+        reply = self.replies[0]
+        url = f"/api/replies/{reply.pk}/"
+        self.assertIsNotNone(self.client.get(url).json()["replyToUser"])
+        self.assertWriteAccess(url, allowed=reply.author, denied=self.review.author)
+
+    def test_replies_are_created_as_the_signed_in_user(self):
+        body = {"review": str(self.review.pk), "content": "Mine"}
+        self.assertEqual(self.client.post("/api/replies/", body, content_type="application/json").status_code, 403)
+        self.client.force_login(self.users[3])
+        response = self.client.post("/api/replies/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CourseReviewReply.objects.get(pk=response.json()["id"]).author, self.users[3])
+
+    def test_sparse_fieldsets(self):
+        with override_settings(COURSE_CATALOG_SNAPSHOT=False), CaptureQueriesContext(connection) as queries:
+            courses = self.client.get("/api/courses/?fields=id,rating").json()
+        self.assertEqual(set(courses[0]), {"id", "rating"})
+        self.assertNotIn('"title"', queries.captured_queries[-1]["sql"])
+        self.assertEqual(self.client.get("/api/courses/?fields=id,rating").json(), courses)
+        self.assertEqual(self.client.get("/api/courses/?fields=nope").status_code, 400)
+
+        with CaptureQueriesContext(connection) as queries:
+            reviews = self.client.get(f"/api/reviews/?course={self.course.pk}&fields=id,course,overallRating").json()
+        self.assertEqual(reviews[0]["course"], self.course.pk)
+        self.assertEqual(set(reviews[0]), {"id", "course", "overallRating"})
+        self.assertNotIn("JOIN", queries.captured_queries[-1]["sql"])
+        self.assertEqual(self.client.get("/api/reviews/?fields=nope").status_code, 400)
+
+
+class CourseCatalogSnapshotTests(QueryBudgetTestCase):
+    """`GET /api/courses/` from the NumPy snapshot agrees with the ORM path."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(5)
+        cls.courses = [
+            Course.objects.create(
+                subject_id=f"CAT{i:04d}",
+                subject_code=f"{rng.choice(['COMP', 'AMA', 'EIE'])}{rng.randint(1000, 4999)}",
+                title=f"Course {i}",
+                term_year=rng.choice([2024, 2025]),
+                term_semester=rng.choice(Course.Semester.values),
+                rating_score=rng.choice([0.0, 5.5, 7.0, 7.0, 8.25, 9.5]),
+                rating_reviews_count=rng.randint(0, 40),
+                attr_difficulty=rng.choice(Course.Difficulty.values),
+                attr_workload=rng.choice(Course.Workload.values),
+                attr_grading=rng.choice(Course.Grading.values),
+                attr_gain=rng.choice(Course.Gain.values),
+                department=rng.choice(["Computing", "Applied Mathematics", ""]),
+            )
+            for i in range(60)
+        ]
+
+    def test_filters_and_orderings_match_the_orm(self):
+        queries = [
+            "",
+            "?department=Computing",
+            "?department=Computing,Applied%20Mathematics&difficulty=hard,veryHard",
+            "?semester=fall&year=2025&ordering=-rating",
+            "?workload=light&grading=lenient,balanced&gain=high&ordering=code",
+            "?minRating=7&maxRating=8.25&ordering=-reviews",
+            "?ordering=-updated",
+            "?ordering=year&fields=id,term",
+            "?department=Nowhere",
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                snapshot = self.client.get(f"/api/courses/{query}").json()
+                with override_settings(COURSE_CATALOG_SNAPSHOT=False):
+                    orm = self.client.get(f"/api/courses/{query}").json()
+                self.assertEqual(snapshot, orm)
+        self.assertEqual(len(self.client.get("/api/courses/?department=Nowhere").json()), 0)
+
+    def test_rebuilt_when_the_catalog_changes(self):
+        self.client.get("/api/courses/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/courses/?department=Design")
+        self.assertEqual(len(queries), 1)  # the version check only
+
+        course = self.courses[0]
+        self.client.force_login(User.objects.create_user("editor", "editor@connect.polyu.hk", "pw", is_staff=True))
+        url = f"/api/courses/{course.pk}/"
+        self.assertEqual(self.client.patch(url, {"department": "Design"}, content_type="application/json").status_code, 200)
+        self.assertEqual([c["id"] for c in self.client.get("/api/courses/?department=Design").json()], [course.pk])
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get("/api/courses/?department=Design").json(), [])
+
+    def test_select_is_vectorized_over_the_columns(self):
+        snapshot = catalog.current()
+        query = catalog.CatalogQuery.from_params({"difficulty": "hard", "minRating": "7", "ordering": "-rating"})
+        positions = snapshot.select(query)
+        expected = sorted(
+            (c for c in self.courses if c.attr_difficulty == "hard" and c.rating_score >= 7),
+            key=lambda c: (-c.rating_score, c.pk),
+        )
+        self.assertEqual([snapshot.rows[i]["id"] for i in positions], [c.pk for c in expected])
+
+    def test_invalid_params(self):
+        for query in ("?year=soon", "?minRating=high", "?ordering=title"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/courses/{query}").status_code, 400)
+
+
+class SimilarCoursesTests(QueryBudgetTestCase):
+    """Precomputed similar courses and `GET /api/courses/<id>/similar/`."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = make_user("reviewer")
+
+        def course(code: str, department: str, rating: float, difficulty: str, workload: str) -> Course:
+            course = Course.objects.create(
+                subject_id=f"SIM-{code}",
+                subject_code=code,
+                title=code,
+                term_year=2025,
+                term_semester="fall",
+                rating_score=rating,
+                department=department,
+            )
+            for _ in range(6):
+                CourseReview.objects.create(
+                    course=course,
+                    author=author,
+                    content="ok",
+                    attr_difficulty=difficulty,
+                    attr_workload=workload,
+                )
+            return course
+
+        cls.hard = course("COMP4001", "Computing", 4.0, "veryHard", "veryHeavy")
+        cls.hard_twin = course("COMP4002", "Computing", 4.5, "veryHard", "veryHeavy")
+        cls.hard_elsewhere = course("AMA4001", "Applied Mathematics", 4.0, "veryHard", "veryHeavy")
+        cls.easy = course("COMP1001", "Computing", 9.0, "veryEasy", "light")
+        cls.easy_twin = course("EIE1001", "Electrical Engineering", 9.5, "veryEasy", "light")
+
+    def test_similar_profiles_rank_first(self):
+        result = similarity.rebuild(k=3)
+        self.assertEqual((result.courses, result.rows), (5, 15))
+
+        hard = self.client.get(f"/api/courses/{self.hard.pk}/similar/").json()
+        self.assertEqual([c["id"] for c in hard[:2]], [self.hard_twin.pk, self.hard_elsewhere.pk])
+        scores = [c["similarity"] for c in hard]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertNotIn(self.hard.pk, [c["id"] for c in hard])
+        easy = self.client.get(f"/api/courses/{self.easy.pk}/similar/").json()
+        self.assertEqual(easy[0]["id"], self.easy_twin.pk)
+
+    def test_top_k_matches_a_full_sort(self):
+        rng = np.random.default_rng(3)
+        matrix = rng.random((50, 8)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        neighbours, scores = similarity.top_k(matrix, k=5, chunk_size=16)
+        full = matrix @ matrix.T
+        np.fill_diagonal(full, -np.inf)
+        np.testing.assert_array_equal(neighbours, np.argsort(-full, axis=1, kind="stable")[:, :5])
+        np.testing.assert_allclose(scores, np.sort(full, axis=1)[:, ::-1][:, :5], rtol=1e-6)
+
+    def test_rebuild_replaces_the_table(self):
+        similarity.rebuild(k=4)
+        self.assertEqual(SimilarCourse.objects.count(), 20)
+        self.easy_twin.delete()
+        similarity.rebuild(k=2)
+        self.assertEqual(SimilarCourse.objects.count(), 8)
+        self.assertEqual(
+            list(SimilarCourse.objects.filter(course=self.hard).values_list("rank", flat=True)), [1, 2]
+        )
+
+    def test_one_indexed_lookup(self):
+        self.assertEqual(self.client.get(f"/api/courses/{self.hard.pk}/similar/").json(), [])
+        similarity.rebuild(k=3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/courses/{self.hard.pk}/similar/?fields=id,title")
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(set(response.json()[0]), {"id", "title", "similarity"})
+        self.assertEqual(self.client.get("/api/courses/nope/similar/").json(), [])
+        self.assertEqual(self.client.get(f"/api/courses/{self.hard.pk}/similar/?fields=bogus").status_code, 400)
@@ -1,48 +1,117 @@
 from __future__ import annotations
 
-from rest_framework import viewsets, permissions
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
 
-from .models import Course, CourseReview, CourseReviewReply
+from accounts.counters import bump
+from core.permissions import IsAuthorOrReadOnly, IsStaffOrReadOnly
+from core.sparse import SparseFieldsetViewMixin, requested_fields
+from . import catalog
+from .models import Course, CourseReview, CourseReviewReply, SimilarCourse
 from .serializers import CourseSerializer, CourseReviewSerializer, CourseReviewReplySerializer
 
 
-class CourseViewSet(viewsets.ModelViewSet):
-    """CRUD for courses."""
+class CourseViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    """CRUD for courses; reads accept `?fields=` (core/sparse.py), writes are staff-only.
+
+    The list is filtered and ordered by query params (courses/catalog.py):
+    - `?department=&semester=&difficulty=&workload=&grading=&gain=`
+      (comma-separated values), `?year=`, `?minRating=`, `?maxRating=`
+    - `?ordering=rating|reviews|code|year|updated`, `-` for descending
+    - served from the process's catalog snapshot unless
+      COURSE_CATALOG_SNAPSHOT is off
+
+    `GET /api/courses/<id>/similar/` lists the precomputed similar courses.
+    """
 
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
-    permission_classes = [permissions.AllowAny]
+    permission_classes = [IsStaffOrReadOnly]
+
+    def get_queryset(self):  # type: ignore[override]
+        qs = self.prune_queryset(super().get_queryset())
+        if self.action == "list":
+            qs = catalog.CatalogQuery.from_params(self.request.query_params).apply(qs)
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        if not settings.COURSE_CATALOG_SNAPSHOT:
+            return super().list(request, *args, **kwargs)
+        query = catalog.CatalogQuery.from_params(request.query_params)
+        fields = self.sparse_field_names() if requested_fields(request) else None
+        snapshot = catalog.current()
+        return Response(snapshot.render(snapshot.select(query), fields))
+
+    @action(detail=True, methods=["GET"])
+    def similar(self, request: Request, pk: str | None = None):
+        """Most similar courses first, each with its `similarity` (cosine, 0–1).
 
+        One range scan of the (course, rank) index joined to the courses; an
+        empty list until `build_similar_courses` has run (or for an unknown id).
+        """
+        assert pk is not None
+        self.sparse_field_names()  # 400 on unknown `?fields=`; `similarity` is always included
+        if not pk.isdigit():
+            return Response([])
+        rows = list(SimilarCourse.objects.filter(course_id=int(pk)).select_related("similar").order_by("rank"))
+        data = self.get_serializer([row.similar for row in rows], many=True).data
+        return Response([{**course, "similarity": row.score} for row, course in zip(rows, data)])
 
-class CourseReviewViewSet(viewsets.ModelViewSet):
+    def perform_create(self, serializer):  # type: ignore[override]
+        serializer.save(last_updated=timezone.now())
+
+    def perform_update(self, serializer):  # type: ignore[override]
+        # The catalog snapshot is rebuilt when max(last_updated) moves
+        serializer.save(last_updated=timezone.now())
+
+
+class CourseReviewViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """CRUD for course reviews.
 
     Supports filtering by course via query param:
     - GET /api/reviews/?course=<id>
+    - reads accept `?fields=` (core/sparse.py)
+    - create requires a signed-in user (the author); update/delete the author or staff
     """
 
-    queryset = CourseReview.objects.select_related("course", "author")
+    queryset = CourseReview.objects.select_related("course", "author__profile")
     serializer_class = CourseReviewSerializer
-    permission_classes = [permissions.AllowAny]
+    permission_classes = [IsAuthorOrReadOnly]
 
     def get_queryset(self):  # type: ignore[override]
-        qs = super().get_queryset()
+        qs = self.prune_queryset(super().get_queryset())
         course_id = self.request.query_params.get("course")
         if course_id:
             qs = qs.filter(course_id=course_id)
         return qs
 
+    def perform_create(self, serializer):  # type: ignore[override]
+        with transaction.atomic():
+            serializer.save(author=self.request.user)
+            bump(self.request.user.pk, reviews=1)
+
+    def perform_destroy(self, instance):  # type: ignore[override]
+        with transaction.atomic():
+            bump(instance.author_id, reviews=-1)
+            instance.delete()
+
 
 class CourseReviewReplyViewSet(viewsets.ModelViewSet):
     """CRUD for course review replies.
 
     Supports filtering by review via query param:
     - GET /api/replies/?review=<review_id>
+    - create requires a signed-in user (the author); update/delete the author or staff
     """
 
-    queryset = CourseReviewReply.objects.select_related("review", "author", "reply_to_user")
+    queryset = CourseReviewReply.objects.select_related("review", "author__profile", "reply_to_user__profile")
     serializer_class = CourseReviewReplySerializer
-    permission_classes = [permissions.AllowAny]
+    permission_classes = [IsAuthorOrReadOnly]
 
     def get_queryset(self):  # type: ignore[override]
         qs = super().get_queryset()
@@ -50,3 +119,6 @@ class CourseReviewReplyViewSet(viewsets.ModelViewSet):
         if review_id:
             qs = qs.filter(review_id=review_id)
         return qs
+
+    def perform_create(self, serializer):  # type: ignore[override]
+        serializer.save(author=self.request.user)
@@ -0,0 +1,28 @@
+"""Background tasks of the forum app (core/jobs.py)."""
+
+from __future__ import annotations
+
+from core.jobs import task
+from . import viewcounts
+from .sync import delete_post as _delete_post, prune_tombstones as _prune_tombstones, purge_deleted_comments
+
+
+@task("forum.flush_post_views")
+def flush_post_views() -> int | None:
+    """Persist the views pending in the cache; None when the lock was busy (the next run catches up)."""
+
+    return viewcounts.persist()
+
+
+@task("forum.prune_tombstones", lease_seconds=60 * 60)
+def prune_tombstones(chunk_size: int = 500, pause: float = 0.05) -> int:
+    """Delta-sync tombstones and soft-deleted comments past the retention, in small transactions."""
+
+    return _prune_tombstones(chunk_size, pause) + purge_deleted_comments(chunk_size, pause)
+
+
+@task("forum.delete_post", lease_seconds=60 * 60)
+def delete_post(post_id: str, chunk_size: int = 500, pause: float = 0.05) -> bool:
+    """Delete a post queued by `DELETE /api/forum/posts/<id>/`, its thread in small transactions."""
+
+    return _delete_post(post_id, chunk_size, pause)
@@ -0,0 +1,468 @@
+"""
+Live comment / like events per post as Server-Sent Events.
+
+- `GET /api/forum/posts/<uuid>/stream/` is answered by `live_asgi()`, a thin
+  ASGI layer in front of Django (config/asgi.py). It bypasses the Django
+  middleware on purpose: under ASGI every request that runs sync middleware
+  keeps a dedicated executor thread until the response ends, so a stream
+  served through Django would pin one thread per idle connection. Here an
+  idle stream is an asyncio queue plus two tasks.
+- Events: `comment` (created or edited comment, `ForumPostCommentSerializer`
+  shape without `repliesCount`), `comment_deleted` (`ids`) and `likes`
+  (`likes` count of the post). The SSE `id` is the change's `updated_at`, so a
+  reconnecting client can catch up with `/api/forum/changes/?since=<id>`.
+  An `event: reset` means the client fell behind (its queue overflowed):
+  resync via the changes endpoint and reconnect.
+- Writers call `publish_*()`; events go out after the transaction commits.
+  `FORUM_LIVE_BACKEND` decides how they reach the streams of every worker:
+  - "local": this process only (single worker, tests)
+  - "cache": through the shared cache (CACHE_URL), polled by one thread per
+    worker every FORUM_LIVE_POLL_INTERVAL seconds while it has streams
+  - "postgres": LISTEN/NOTIFY on a dedicated connection per worker
+- Under WSGI (runserver) the route answers 501; serve `config.asgi` with an
+  ASGI server (uvicorn, daphne, gunicorn -k uvicorn.workers.UvicornWorker).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = re.compile(r"/api/forum/posts/(?P<post_id>[0-9a-fA-F-]{36})/stream/")
+RETRY_MS = 3_000  # client reconnect delay sent with the stream preamble
+NOTIFY_CHANNEL = "forum_live"
+NOTIFY_LIMIT = 7_900  # Postgres caps NOTIFY payloads at 8000 bytes
+
+
+class TooManyStreams(Exception):
+    pass
+
+
+RESET_FRAME = b"event: reset\ndata: {}\n\n"
+
+
+class Subscription:
+    """One open stream: encoded SSE frames, buffered until the stream sends them."""
+
+    def __init__(self, broker: "Broker", post_id: str, loop: asyncio.AbstractEventLoop):
+        self.broker = broker
+        self.post_id = post_id
+        self.loop = loop
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self.overflowed = False
+
+    def deliver(self, frame: bytes) -> None:
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= settings.FORUM_LIVE_QUEUE_SIZE:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            frame = RESET_FRAME
+        self.queue.put_nowait(frame)
+
+    async def get(self) -> bytes:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """In-process pub/sub: post id -> open streams of this worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._count = 0
+        self.delivered = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def subscribe(self, post_id: str) -> Subscription:
+        """Register a stream (call from the event loop serving it)."""
+
+        subscription = Subscription(self, post_id, asyncio.get_running_loop())
+        with self._lock:
+            if self._count >= settings.FORUM_LIVE_MAX_STREAMS:
+                raise TooManyStreams
+            self._subscribers.setdefault(post_id, set()).add(subscription)
+            self._count += 1
+        get_fanout().ensure_listening()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.post_id)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.post_id]
+            self._count -= 1
+
+    def dispatch(self, event: dict) -> None:
+        """Hand an event to this worker's streams of its post (any thread)."""
+
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["postId"], ()))
+        if not subscribers:
+            return
+        # Encode once, and wake each event loop once rather than once per stream
+        frame = format_event(event)
+        by_loop: dict[asyncio.AbstractEventLoop, list[Subscription]] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, group in by_loop.items():
+            loop.call_soon_threadsafe(_deliver_all, group, frame)
+        self.delivered += len(subscribers)
+
+
+def _deliver_all(subscriptions: list[Subscription], frame: bytes) -> None:
+    for subscription in subscriptions:
+        subscription.deliver(frame)
+
+
+broker = Broker()
+
+
+# --- fan-out between workers --------------------------------------------------------------
+
+
+class LocalFanout:
+    """Events stay in this process."""
+
+    def publish(self, event: dict) -> None:
+        broker.dispatch(event)
+
+    def ensure_listening(self) -> None:
+        pass
+
+
+class _ListenerThread:
+    """Starts `_listen` once, in a daemon thread, on the first stream."""
+
+    name = "forum-live"
+
+    def __init__(self):
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def ensure_listening(self) -> None:
+        if self._started:
+            return
+        with self._start_lock:
+            if not self._started:
+                threading.Thread(target=self._listen, name=self.name, daemon=True).start()
+                self._started = True
+
+    def _listen(self) -> None:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+
+class CacheFanout(_ListenerThread):
+    """Events numbered by a cache counter; each worker polls for new numbers.
+
+    Works with any shared cache backend supporting atomic `incr` (Redis,
+    Memcached, database cache). Events live for FORUM_LIVE_EVENT_TTL seconds.
+    """
+
+    name = "forum-live-cache"
+    SEQ_KEY = "forum:live:seq"
+    EVENT_KEY = "forum:live:event:{}"
+    MAX_BATCH = 500  # a worker further behind than this skips ahead
+
+    def publish(self, event: dict) -> None:
+        cache.add(self.SEQ_KEY, 0, timeout=None)
+        seq = cache.incr(self.SEQ_KEY)
+        cache.set(self.EVENT_KEY.format(seq), event, timeout=settings.FORUM_LIVE_EVENT_TTL)
+
+    def _listen(self) -> None:
+        last: int | None = None
+        waited = 0
+        while True:
+            time.sleep(settings.FORUM_LIVE_POLL_INTERVAL)
+            if not broker.count:
+                last = None  # nobody listening: resume from the current position later
+                continue
+            try:
+                seq = cache.get(self.SEQ_KEY) or 0
+                if last is None or seq < last:
+                    last = seq
+                    continue
+                keys = [self.EVENT_KEY.format(n) for n in range(max(last + 1, seq - self.MAX_BATCH + 1), seq + 1)]
+                found = cache.get_many(keys)
+                for key in keys:
+                    if key not in found and waited < 2:
+                        # Numbered but not stored yet (publisher between incr and set): retry
+                        waited += 1
+                        break
+                    waited = 0
+                    last = int(key.rsplit(":", 1)[1])
+                    if key in found:
+                        broker.dispatch(found[key])
+            except Exception:  # pragma: no cover - cache outage; keep polling
+                logger.exception("Polling live events from the cache failed")
+
+
+class PostgresFanout(_ListenerThread):
+    """NOTIFY on publish, one LISTEN connection per worker.
+
+    Both use dedicated psycopg connections (not Django's), so publishing adds
+    no query to the request. Events over the 8000-byte NOTIFY limit are sent
+    as a reference and loaded once per worker by the listener.
+    """
+
+    name = "forum-live-postgres"
+
+    def __init__(self):
+        super().__init__()
+        self._publish_lock = threading.Lock()
+        self._publisher = None
+
+    def _connect(self):
+        import psycopg
+
+        db = settings.DATABASES["default"]
+        params = {
+            "dbname": db["NAME"],
+            "user": db.get("USER") or None,
+            "password": db.get("PASSWORD") or None,
+            "host": db.get("HOST") or None,
+            "port": db.get("PORT") or None,
+            "sslmode": db.get("OPTIONS", {}).get("sslmode"),
+        }
+        return psycopg.connect(autocommit=True, **{k: v for k, v in params.items() if v is not None})
+
+    def publish(self, event: dict) -> None:
+        payload = json.dumps(event)
+        if len(payload.encode()) > NOTIFY_LIMIT:
+            payload = json.dumps({**{k: v for k, v in event.items() if k != "comment"}, "ref": event["comment"]["id"]})
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None or self._publisher.closed:
+                        self._publisher = self._connect()
+                    self._publisher.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, payload])
+                    return
+                except Exception:
+                    self._publisher = None
+                    if attempt:
+                        raise
+
+    def _listen(self) -> None:  # pragma: no cover - needs PostgreSQL
+        while True:
+            try:
+                with self._connect() as conn:
+                    conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    for notify in conn.notifies():
+                        event = json.loads(notify.payload)
+                        if "ref" in event:
+                            event = _load_comment_event(event)
+                        if event is not None:
+                            broker.dispatch(event)
+            except Exception:
+                logger.exception("LISTEN %s failed; reconnecting", NOTIFY_CHANNEL)
+                time.sleep(1)
+
+
+def _load_comment_event(event: dict) -> dict | None:
+    from .models import ForumPostComment
+
+    close_old_connections()
+    try:
+        comment = (
+            ForumPostComment.objects.select_related("author__profile", "reply_to_user__profile")
+            .filter(pk=event["ref"])
+            .first()
+        )
+        return None if comment is None else comment_event(comment)
+    finally:
+        close_old_connections()
+
+
+_FANOUTS = {"local": LocalFanout, "cache": CacheFanout, "postgres": PostgresFanout}
+_fanouts: dict[str, object] = {}
+
+
+def get_fanout():
+    name = settings.FORUM_LIVE_BACKEND
+    if name not in _fanouts:
+        _fanouts[name] = _FANOUTS[name]()
+    return _fanouts[name]
+
+
+# --- publishing (called by the forum views) -----------------------------------------------
+
+
+def _publish_on_commit(build) -> None:
+    # `robust`: a fan-out failure is logged instead of failing the finished write
+    transaction.on_commit(lambda: get_fanout().publish(build()), robust=True)
+
+
+def comment_event(comment, data: dict | None = None) -> dict:
+    """`comment` event; `data` is the comment's serialized form if already at hand."""
+
+    from .serializers import ForumPostCommentSerializer
+
+    data = dict(data if data is not None else ForumPostCommentSerializer(comment).data)
+    # The client keeps its own count; replies arrive as their own events
+    data.pop("repliesCount", None)
+    return {"type": "comment", "postId": str(comment.post_id), "at": _iso(comment.updated_at), "comment": data}
+
+
+def publish_comment(comment, data: dict | None = None) -> None:
+    """A comment was created or edited (`data`: its serialized form, if available)."""
+
+    _publish_on_commit(lambda: comment_event(comment, data))
+
+
+def publish_comments_deleted(post_id, ids, at: datetime) -> None:
+    _publish_on_commit(
+        lambda: {"type": "comment_deleted", "postId": str(post_id), "at": _iso(at), "ids": [str(pk) for pk in ids]}
+    )
+
+
+def publish_likes(post_id, likes: int, at: datetime) -> None:
+    _publish_on_commit(lambda: {"type": "likes", "postId": str(post_id), "at": _iso(at), "likes": likes})
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat()
+
+
+# --- the SSE endpoint ------------------------------------------------------------------------
+
+
+def format_event(event: dict) -> bytes:
+    lines = []
+    if event.get("at"):
+        lines.append(f"id: {event['at']}")
+    lines.append(f"event: {event['type']}")
+    lines.append("data: " + json.dumps(event, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def _post_exists(post_id: str) -> bool:
+    from .models import ForumPost
+
+    close_old_connections()
+    try:
+        return ForumPost.objects.filter(pk=post_id).exists()
+    finally:
+        close_old_connections()
+
+
+def _cors_headers(scope) -> list[tuple[bytes, bytes]]:
+    origin = dict(scope.get("headers") or []).get(b"origin", b"").decode("latin1")
+    if not origin or origin not in settings.CORS_ALLOWED_ORIGINS:
+        return []
+    headers = [(b"access-control-allow-origin", origin.encode("latin1")), (b"vary", b"Origin")]
+    if settings.CORS_ALLOW_CREDENTIALS:
+        headers.append((b"access-control-allow-credentials", b"true"))
+    return headers
+
+
+async def _send_json(send, scope, status: int, body: dict, headers=()) -> None:
+    payload = json.dumps(body).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), *headers, *_cors_headers(scope)],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def serve_stream(scope, receive, send, post_id: str) -> None:
+    """Hold an SSE stream for `post_id` until the client disconnects."""
+
+    if scope["method"] != "GET":
+        await _send_json(send, scope, 405, {"detail": "Method not allowed."}, [(b"allow", b"GET")])
+        return
+    if broker.count >= settings.FORUM_LIVE_MAX_STREAMS:
+        await _send_json(send, scope, 503, {"detail": "Too many open streams."}, [(b"retry-after", b"5")])
+        return
+    if not await sync_to_async(_post_exists)(post_id):
+        await _send_json(send, scope, 404, {"detail": "Not found."})
+        return
+    try:
+        subscription = broker.subscribe(post_id.lower())
+    except TooManyStreams:
+        await _send_json(send, scope, 503, {"detail": "Too many open streams."}, [(b"retry-after", b"5")])
+        return
+
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),  # nginx: do not buffer the stream
+                    *_cors_headers(scope),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": f"retry: {RETRY_MS}\n\n".encode(), "more_body": True})
+        while True:
+            next_event = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait(
+                {next_event, disconnect},
+                timeout=settings.FORUM_LIVE_HEARTBEAT_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnect in done:
+                next_event.cancel()
+                return
+            if next_event not in done:
+                next_event.cancel()
+                # Comment line: keeps proxies from closing the idle connection
+                await send({"type": "http.response.body", "body": b": keep-alive\n\n", "more_body": True})
+                continue
+            frame = next_event.result()
+            await send({"type": "http.response.body", "body": frame, "more_body": True})
+            if frame is RESET_FRAME:
+                await send({"type": "http.response.body", "body": b""})
+                return
+    finally:
+        subscription.close()
+        disconnect.cancel()
+
+
+async def _wait_for_disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def live_asgi(django_application):
+    """Wrap the Django ASGI app: stream requests are served here, the rest by Django."""
+
+    async def application(scope, receive, send):
+        if scope["type"] == "http":
+            match = STREAM_PATH.fullmatch(scope["path"])
+            if match is not None:
+                await serve_stream(scope, receive, send, match["post_id"])
+                return
+        await django_application(scope, receive, send)
+
+    return application
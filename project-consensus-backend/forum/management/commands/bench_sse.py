@@ -0,0 +1,206 @@
+"""
+How many idle SSE streams one worker holds, and how fast it fans events out.
+
+- Drives the ASGI application (config.asgi, including `forum.live`) in this
+  process, the way an ASGI server would, with `--connections` open streams
+  spread over the newest `--posts` posts. No sockets: the numbers are the
+  application's own cost per connection, to which the server adds its
+  per-socket buffers (and the process needs a file descriptor per client,
+  see `ulimit -n`).
+- Reports connect time, resident memory and Python heap (`--tracemalloc`)
+  per stream, thread count, and for `--events` rounds (one event to every
+  post) the time until the first/median/last stream had it.
+- Uses the in-process broker ("local" backend): cross-worker fan-out adds
+  the cache poll interval or a NOTIFY round trip on top.
+
+Seed posts first, e.g. `python manage.py generate_dataset`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from forum import live
+from forum.models import ForumPost
+
+
+def _rss_kib() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except OSError:  # pragma: no cover - not Linux
+        import resource
+
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class StreamClient:
+    """One simulated EventSource: counts events and keeps the last arrival time."""
+
+    def __init__(self, post_id: str, on_event):
+        self.post_id = post_id
+        self.on_event = on_event
+        self.connected = asyncio.Event()
+        self.events = 0
+        self.arrived = 0.0
+        self.status = None
+        self._requested = False
+        self._closed = asyncio.Event()
+        self.task = None
+
+    def start(self, application) -> None:
+        path = f"/api/forum/posts/{self.post_id}/stream/"
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "headers": [(b"host", b"localhost"), (b"accept", b"text/event-stream")],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        self.task = asyncio.ensure_future(application(scope, self._receive, self._send))
+
+    async def _receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._closed.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            if self.status != 200:
+                self.connected.set()
+        elif message.get("body", b"").startswith(b"retry:"):
+            self.connected.set()
+        elif b"event: " in message.get("body", b""):
+            self.events += 1
+            self.arrived = time.perf_counter()
+            self.on_event()
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class Command(BaseCommand):
+    help = "Measure idle SSE streams per worker (memory, threads) and event fan-out latency, in process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=2000, help="Streams to open (default 2000)")
+        parser.add_argument("--posts", type=int, default=20, help="Spread streams over this many posts (default 20)")
+        parser.add_argument("--events", type=int, default=10, help="Fan-out rounds (default 10)")
+        parser.add_argument("--batch", type=int, default=200, help="Streams opened concurrently (default 200)")
+        parser.add_argument("--tracemalloc", action="store_true", help="Also measure Python heap per stream (slower)")
+        parser.add_argument("--output", help="Write the report as JSON to this path")
+
+    def handle(self, *args, **options):
+        post_ids = [str(pk) for pk in ForumPost.objects.order_by("-created_at").values_list("pk", flat=True)[: options["posts"]]]
+        if not post_ids:
+            raise CommandError("No forum posts; seed the database first (python manage.py generate_dataset).")
+        from config.asgi import application
+
+        with override_settings(
+            FORUM_LIVE_BACKEND="local",
+            FORUM_LIVE_MAX_STREAMS=options["connections"] + 1,
+            FORUM_LIVE_HEARTBEAT_SECONDS=3600,
+            ALLOWED_HOSTS=["localhost"],
+        ):
+            report = asyncio.run(self._bench(application, post_ids, options))
+
+        text = json.dumps(report, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(text + "\n")
+        self.stdout.write(text)
+
+    async def _bench(self, application, post_ids: list[str], options) -> dict:
+        count = options["connections"]
+        if options["tracemalloc"]:
+            tracemalloc.start()
+        rss_before, threads_before = _rss_kib(), threading.active_count()
+        heap_before = tracemalloc.get_traced_memory()[0] if options["tracemalloc"] else 0
+
+        arrivals = 0
+        all_arrived = asyncio.Event()
+
+        def on_event():
+            nonlocal arrivals
+            arrivals += 1
+            if arrivals == count:
+                all_arrived.set()
+
+        clients = [StreamClient(post_ids[i % len(post_ids)], on_event) for i in range(count)]
+        started = time.perf_counter()
+        for offset in range(0, count, options["batch"]):
+            batch = clients[offset : offset + options["batch"]]
+            for client in batch:
+                client.start(application)
+            await asyncio.gather(*(client.connected.wait() for client in batch))
+        connect_s = time.perf_counter() - started
+        failed = sum(1 for client in clients if client.status != 200)
+        if failed:
+            raise CommandError(f"{failed} of {count} streams were refused (first status {clients[0].status}).")
+
+        await asyncio.sleep(0.1)
+        rss_after, threads_after = _rss_kib(), threading.active_count()
+        heap_after = tracemalloc.get_traced_memory()[0] if options["tracemalloc"] else 0
+        held = live.broker.count
+
+        rounds = []
+        for n in range(1, options["events"] + 1):
+            arrivals = 0
+            all_arrived.clear()
+            sent = time.perf_counter()
+            for post_id in post_ids:
+                live.broker.dispatch({"type": "likes", "postId": post_id, "likes": n, "at": timezone.now().isoformat()})
+            try:
+                await asyncio.wait_for(all_arrived.wait(), 30)
+            except TimeoutError:
+                raise CommandError(f"Round {n}: {count - arrivals} streams did not receive the event within 30 s.")
+            latencies = [(client.arrived - sent) * 1000 for client in clients]
+            rounds.append({"first": min(latencies), "p50": _percentile(latencies, 0.5), "last": max(latencies)})
+
+        for client in clients:
+            client.close()
+        await asyncio.gather(*(client.task for client in clients))
+        if options["tracemalloc"]:
+            tracemalloc.stop()
+
+        return {
+            "connections": count,
+            "posts": len(post_ids),
+            "held": held,
+            "left_after_close": live.broker.count,
+            "connect_seconds": round(connect_s, 3),
+            "rss_kib_per_connection": round((rss_after - rss_before) / count, 2),
+            "heap_kib_per_connection": round((heap_after - heap_before) / 1024 / count, 2)
+            if options["tracemalloc"]
+            else None,
+            "threads": {"before": threads_before, "while_open": threads_after},
+            "fanout_ms": {
+                key: round(statistics.median(r[key] for r in rounds), 3) for key in ("first", "p50", "last")
+            }
+            if rounds
+            else None,
+        }
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from forum import viewcounts
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the post views and unique-viewer sketches pending in the shared cache to the database "
+        "(`run_worker` also does this every JOBS_POST_VIEWS_SECONDS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wait", type=float, default=10.0, help="Seconds to wait for the views lock (default 10)")
+
+    def handle(self, *args, **options):
+        viewcounts.buffer().flush()
+        updated = viewcounts.persist(wait=options["wait"])
+        if updated is None:
+            raise CommandError("The views lock stayed busy; try again.")
+        self.stdout.write(f"Updated views of {updated} posts.")
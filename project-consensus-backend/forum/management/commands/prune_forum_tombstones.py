@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from forum.sync import prune_tombstones, purge_deleted_comments
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete delta-sync tombstones and hard-delete soft-deleted comments older than "
+        "FORUM_SYNC_RETENTION_DAYS, in small transactions (run daily, e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500, help="Rows deleted per transaction (default 500)")
+        parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between chunks (default 0.05)")
+
+    def handle(self, *args, **options):
+        chunk_size, pause = options["chunk_size"], options["pause"]
+        tombstones = prune_tombstones(chunk_size, pause)
+        comments = purge_deleted_comments(chunk_size, pause)
+        self.stdout.write(
+            f"Deleted {tombstones} tombstones and {comments} deleted comments "
+            f"older than {settings.FORUM_SYNC_RETENTION_DAYS} days."
+        )
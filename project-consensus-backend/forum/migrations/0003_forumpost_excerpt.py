@@ -0,0 +1,91 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:25
+
+import re
+from html.parser import HTMLParser
+
+from django.db import migrations, models
+
+
+# Frozen copy of forum/text.py as of this migration, so later changes there
+# do not alter what the backfill produced
+
+EXCERPT_LENGTH = 280
+
+_WHITESPACE = re.compile(r"\s+")
+_SKIPPED_TAGS = {"script", "style", "template"}
+_BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "tr", "td"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self.skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def plain_text(html):
+    parser = _TextExtractor()
+    parser.feed(html or "")
+    parser.close()
+    return _WHITESPACE.sub(" ", "".join(parser.parts)).strip()
+
+
+def excerpt(text, limit=EXCERPT_LENGTH):
+    if len(text) <= limit:
+        return text
+    cut = text[: limit - 1]
+    if " " in cut[limit // 2 :]:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def backfill_text_fields(apps, schema_editor):
+    ForumPost = apps.get_model("forum", "ForumPost")
+    batch = []
+    for post in ForumPost.objects.only("pk", "content").iterator(chunk_size=2000):
+        text = plain_text(post.content)
+        post.excerpt = excerpt(text)
+        post.content_length = len(text)
+        batch.append(post)
+        if len(batch) >= 2000:
+            ForumPost.objects.bulk_update(batch, ["excerpt", "content_length"])
+            batch = []
+    if batch:
+        ForumPost.objects.bulk_update(batch, ["excerpt", "content_length"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0002_seed_demo_forum_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="forumpost",
+            name="content_length",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="forumpost",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.RunPython(backfill_text_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:33
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows have not changed since they were created
+    for name in ("ForumPost", "ForumPostComment"):
+        apps.get_model("forum", name).objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0003_forumpost_excerpt"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ForumTombstone",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("post_id", models.UUIDField()),
+                ("deleted_at", models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "ForumTombstone",
+                "verbose_name_plural": "ForumTombstones",
+                "indexes": [models.Index(fields=["post_id", "deleted_at"], name="forum_tombstone_post_idx")],
+            },
+        ),
+        migrations.AddField(
+            model_name="forumpost",
+            name="updated_at",
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="forumpostcomment",
+            name="updated_at",
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="forumpostcomment",
+            index=models.Index(fields=["post", "updated_at"], name="forum_comment_post_upd_idx"),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:10
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_deleted_at(apps, schema_editor):
+    # Best guess for rows flagged before deleted_at existed
+    apps.get_model("forum", "ForumPostComment").objects.filter(is_deleted=True).update(deleted_at=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0004_updated_at_tombstones"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="forumpostcomment",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_deleted_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="forumpostcomment",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["post", "-created_at"],
+                name="forum_comment_live_post_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="forumpostcomment",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["main_comment", "-created_at"],
+                name="forum_comment_live_main_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="forumpostcomment",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)), fields=["post"], name="forum_comment_deleted_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="forumpostcomment",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)), fields=["deleted_at"], name="forum_comment_purge_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0005_comment_soft_delete"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # State only (no SQL): the comment ordering drifted from 0001
+        migrations.AlterModelOptions(
+            name="forumpostcomment",
+            options={
+                "ordering": ["-created_at"],
+                "verbose_name": "ForumPostComment",
+                "verbose_name_plural": "ForumPostComments",
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="forumpostlike",
+            name="forum_like_post_user_idx",
+        ),
+        migrations.AlterField(
+            model_name="forumpostcomment",
+            name="post",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="comments",
+                to="forum.forumpost",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="forumpostlike",
+            name="post",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="likes",
+                to="forum.forumpost",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="forumpostcomment",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False), ("parent__isnull", True)),
+                fields=["post", "-created_at"],
+                name="forum_comment_live_top_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="forumpostcomment",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["parent", "-created_at"],
+                name="forum_comment_live_parent_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0006_comment_list_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="forumpost",
+            name="author",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="forum_posts",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="forumpostcomment",
+            name="author",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="forum_comments",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="forumpostlike",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="forum_post_likes",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="forumpost",
+            index=models.Index(fields=["author", "-created_at"], name="forum_post_author_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="forumpostcomment",
+            index=models.Index(fields=["author", "-created_at"], name="forum_comment_author_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="forumpostlike",
+            index=models.Index(fields=["user", "-created_at"], name="forum_like_user_idx"),
+        ),
+    ]
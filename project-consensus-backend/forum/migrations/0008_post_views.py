@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0007_activity_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ForumPostViewers",
+            fields=[
+                (
+                    "post",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="viewers",
+                        serialize=False,
+                        to="forum.forumpost",
+                    ),
+                ),
+                ("sketch", models.BinaryField()),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "ForumPostViewers",
+                "verbose_name_plural": "ForumPostViewers",
+            },
+        ),
+        migrations.AddField(
+            model_name="forumpost",
+            name="unique_viewers",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="forumpost",
+            name="views_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
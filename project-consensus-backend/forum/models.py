@@ -3,8 +3,18 @@ from __future__ import annotations
 import uuid
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
- 
+
+from .text import excerpt, plain_text
+
+
+def _touch(instance, save_kwargs: dict) -> None:
+    """Bump `updated_at` on save (also when `update_fields` is given)."""
+
+    instance.updated_at = timezone.now()
+    if save_kwargs.get("update_fields") is not None:
+        save_kwargs["update_fields"] = {*save_kwargs["update_fields"], "updated_at"}
 
 
 class ForumPost(models.Model):
@@ -19,25 +29,79 @@ class ForumPost(models.Model):
     - tags: list of strings (JSON)
     - language: display language label
     - likes_count: integer like count (isLiked is session-level, not stored)
+    - excerpt / content_length: plain-text snippet and length of `content`
+    - updated_at: last change (edit or like count), for delta sync (forum/sync.py)
+    - views_count / unique_viewers: page views and estimated distinct viewers,
+      written in batches by forum/viewcounts.py (they do not touch updated_at)
     """
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=200)
     content = models.TextField()
-    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="forum_posts")
+    # Indexed by `forum_post_author_idx` (author_id first)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="forum_posts", db_index=False
+    )
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
     tags = models.JSONField(default=list, blank=True)
     language = models.CharField(max_length=50, default="")
     likes_count = models.PositiveIntegerField(default=0)
+    # Derived from `content` on save (forum/text.py): feed listings read these
+    # instead of the full HTML body.
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
+    content_length = models.PositiveIntegerField(default=0, editable=False)
+    views_count = models.PositiveIntegerField(default=0, editable=False)
+    unique_viewers = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # "My posts" (`/api/accounts/me/posts/`), newest first
+            models.Index(fields=["author", "-created_at"], name="forum_post_author_idx"),
+        ]
         verbose_name = "ForumPost"
         verbose_name_plural = "ForumPosts"
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.title}"
 
+    def refresh_text_fields(self) -> None:
+        """Recompute `excerpt` / `content_length` from `content`."""
+
+        text = plain_text(self.content)
+        self.excerpt = excerpt(text)
+        self.content_length = len(text)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.refresh_text_fields()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "excerpt", "content_length"}
+        _touch(self, kwargs)
+        super().save(*args, **kwargs)
+
+
+class ForumPostViewers(models.Model):
+    """HyperLogLog sketch of a post's viewers (forum/viewcounts.py).
+
+    Kept out of `ForumPost` so post reads and saves never carry the registers
+    (2**FORUM_VIEWS_HLL_PRECISION bytes); only the periodic persist reads and
+    writes them.
+    """
+
+    post = models.OneToOneField(ForumPost, on_delete=models.CASCADE, primary_key=True, related_name="viewers")
+    sketch = models.BinaryField()
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "ForumPostViewers"
+        verbose_name_plural = "ForumPostViewers"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"viewers of {self.post_id}"
+
 
 class ForumPostComment(models.Model):
     """Forum comment model (two-level: main + reply).
@@ -46,21 +110,32 @@ class ForumPostComment(models.Model):
     - parent is null: main comment (reply to post)
     - parent is not null: reply comment (reply to a main or another reply);
       the field `reply_to_user` indicates the target user being replied to
-    - is_deleted: soft deletion flag
+    - is_deleted / deleted_at: soft deletion (forum/sync.py `soft_delete_comment`);
+      deleted comments leave the lists, together with the replies under a
+      deleted main comment, and are hard-deleted after
+      FORUM_SYNC_RETENTION_DAYS by `prune_forum_tombstones` once no live
+      reply hangs below them
     - likes_count: integer like count
+    - updated_at: last change, for delta sync (forum/sync.py)
     """
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    post = models.ForeignKey(ForumPost, on_delete=models.CASCADE, related_name="comments")
+    # No single-column index: `forum_comment_post_upd_idx` leads with post_id
+    post = models.ForeignKey(ForumPost, on_delete=models.CASCADE, related_name="comments", db_index=False)
     parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE, related_name="replies")
     # Reference to the main (top-level) comment this reply belongs to.
     # For top-level comments, this is null. For replies (any depth), this points to the top-level comment.
     main_comment = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE, related_name="all_replies")
     content = models.TextField()
-    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="forum_comments")
+    # Indexed by `forum_comment_author_idx` (author_id first)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="forum_comments", db_index=False
+    )
     reply_to_user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="forum_reply_targets")
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
     is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
     likes_count = models.PositiveIntegerField(default=0)
 
     class Meta:
@@ -68,10 +143,73 @@ class ForumPostComment(models.Model):
         ordering = ["-created_at"]
         verbose_name = "ForumPostComment"
         verbose_name_plural = "ForumPostComments"
+        indexes = [
+            # Delta sync of one thread: range scan on updated_at within a post
+            models.Index(fields=["post", "updated_at"], name="forum_comment_post_upd_idx"),
+            # Comment lists only read live rows, newest first: by post (`postId`),
+            # main comments of a post (`postId&isMain=1`), by thread
+            # (`mainCommentId`, also the repliesCount subquery) and by parent
+            models.Index(
+                fields=["post", "-created_at"], condition=Q(is_deleted=False), name="forum_comment_live_post_idx"
+            ),
+            models.Index(
+                fields=["post", "-created_at"],
+                condition=Q(is_deleted=False, parent__isnull=True),
+                name="forum_comment_live_top_idx",
+            ),
+            models.Index(
+                fields=["main_comment", "-created_at"],
+                condition=Q(is_deleted=False),
+                name="forum_comment_live_main_idx",
+            ),
+            models.Index(
+                fields=["parent", "-created_at"], condition=Q(is_deleted=False), name="forum_comment_live_parent_idx"
+            ),
+            # "My comments" (`/api/accounts/me/comments/`), newest first
+            models.Index(fields=["author", "-created_at"], name="forum_comment_author_idx"),
+            # Deleted rows: per post (threads to leave out of comment counts), and the purger's scan
+            models.Index(fields=["post"], condition=Q(is_deleted=True), name="forum_comment_deleted_idx"),
+            models.Index(fields=["deleted_at"], condition=Q(is_deleted=True), name="forum_comment_purge_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.author_id} -> {self.post_id}"
 
+    def save(self, *args, **kwargs):
+        _touch(self, kwargs)
+        super().save(*args, **kwargs)
+
+
+# Comments shown in lists: not deleted, and not in the thread of a deleted main comment
+VISIBLE_COMMENTS = Q(is_deleted=False) & (Q(main_comment__isnull=True) | Q(main_comment__is_deleted=False))
+
+
+class ForumTombstone(models.Model):
+    """A hard-deleted post, reported by delta sync (forum/sync.py).
+
+    Notes:
+    - Written by the `forum.delete_post` job in the transaction that deletes
+      the post; the post's comments are covered by it. Comments are
+      soft-deleted and reported from their own rows.
+    - `post_id` is a plain UUID: the post is gone.
+    - Rows older than FORUM_SYNC_RETENTION_DAYS are removed by
+      `prune_forum_tombstones`; clients polling from before then must reload.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    post_id = models.UUIDField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post_id", "deleted_at"], name="forum_tombstone_post_idx"),
+        ]
+        verbose_name = "ForumTombstone"
+        verbose_name_plural = "ForumTombstones"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"post {self.post_id}"
+
 
 class ForumPostLike(models.Model):
     """Forum post like relation / 论坛帖子点赞关系
@@ -90,14 +228,22 @@ class ForumPostLike(models.Model):
     # EN: Surrogate primary key; lighter than UUID and sufficient for internal use only
     # 中文：内部用的替代主键；比 UUID 更轻量，足以满足需求
     id = models.BigAutoField(primary_key=True)
-    post = models.ForeignKey(ForumPost, on_delete=models.CASCADE, related_name="likes")
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="forum_post_likes")
+    # EN: The (post, user) unique index serves lookups by post; no separate index
+    # 中文：(post, user) 唯一索引已覆盖按帖子查询，无需单独索引
+    post = models.ForeignKey(ForumPost, on_delete=models.CASCADE, related_name="likes", db_index=False)
+    # EN: Indexed by `forum_like_user_idx` (user_id first)
+    # 中文：由 `forum_like_user_idx`（以 user_id 开头）覆盖
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="forum_post_likes", db_index=False
+    )
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         unique_together = ("post", "user")
         indexes = [
-            models.Index(fields=["post", "user"]),
+            # EN: "Posts I liked" (`/api/accounts/me/likes/`), newest like first
+            # 中文：“我点赞的帖子”，按点赞时间倒序
+            models.Index(fields=["user", "-created_at"], name="forum_like_user_idx"),
         ]
         verbose_name = "ForumPostLike"
         verbose_name_plural = "ForumPostLikes"
@@ -5,6 +5,7 @@ from rest_framework import serializers
 
 from accounts.models import Profile
 from accounts.serializers import AuthorSerializer
+from core.sparse import SparseFieldsetSerializerMixin
 from .models import ForumPost, ForumPostComment
 
 
@@ -24,21 +25,27 @@ def _author_payload_for(user) -> dict:
         return {"id": str(user.pk), "name": user.get_username(), "avatar": None}
 
 
-class ForumPostSerializer(serializers.ModelSerializer):
+class ForumPostSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for forum posts.
 
     Extra fields:
     - author: nested Author payload
     - likes: integer from likes_count
     - comments: computed comment count
-    - isLiked: session-related; fixed False here (can be wired to Like model)
+    - isLiked: whether the current user liked the post
+    - views / uniqueViewers: page views and estimated distinct viewers
+      (forum/viewcounts.py; updated in batches, minutes behind at most)
+    - `?fields=` limits the output on reads (core/sparse.py)
     """
 
     author = serializers.SerializerMethodField()
     likes = serializers.IntegerField(source="likes_count", read_only=True)
+    views = serializers.IntegerField(source="views_count", read_only=True)
+    uniqueViewers = serializers.IntegerField(source="unique_viewers", read_only=True)
     comments = serializers.SerializerMethodField()
     isLiked = serializers.SerializerMethodField()
     createdAt = serializers.DateTimeField(source="created_at", read_only=True)
+    updatedAt = serializers.DateTimeField(source="updated_at", read_only=True)
 
     class Meta:
         model = ForumPost
@@ -48,21 +55,32 @@ class ForumPostSerializer(serializers.ModelSerializer):
             "content",
             "author",
             "createdAt",
+            "updatedAt",
             "tags",
             "likes",
+            "views",
+            "uniqueViewers",
             "comments",
             "isLiked",
             "language",
         ]
-        read_only_fields = ["id", "createdAt", "author"]
+        read_only_fields = ["id", "createdAt", "updatedAt", "author"]
+        # Model paths read by the method fields (comments/isLiked: annotations)
+        sparse_sources = {"author": ["author__username", "author__profile"], "comments": [], "isLiked": []}
 
     def get_author(self, obj: ForumPost) -> dict:
         return _author_payload_for(obj.author)
 
     def get_comments(self, obj: ForumPost) -> int:
-        return obj.comments.count()
+        # Prefer the `comments_count` annotation from ForumPostViewSet.get_queryset
+        count = getattr(obj, "comments_count", None)
+        return count if count is not None else obj.comments.count()
 
     def get_isLiked(self, obj: ForumPost) -> bool:
+        # Prefer the `is_liked` annotation (present for authenticated requests)
+        is_liked = getattr(obj, "is_liked", None)
+        if is_liked is not None:
+            return is_liked
         request = self.context.get("request")
         user = getattr(request, "user", None)
         if user is not None and getattr(user, "is_authenticated", False):
@@ -70,13 +88,46 @@ class ForumPostSerializer(serializers.ModelSerializer):
         return False
 
 
-class ForumPostCommentSerializer(serializers.ModelSerializer):
-    """Serializer for forum comments (compatible with frontend type)."""
+class ForumPostListSerializer(ForumPostSerializer):
+    """Feed card variant of `ForumPostSerializer` (used by `list`).
+
+    Returns the stored plain-text `excerpt` and `contentLength` instead of the
+    HTML `content`, which the list queryset does not even load.
+    """
+
+    contentLength = serializers.IntegerField(source="content_length", read_only=True)
+
+    class Meta(ForumPostSerializer.Meta):
+        fields = [
+            "id",
+            "title",
+            "excerpt",
+            "contentLength",
+            "author",
+            "createdAt",
+            "updatedAt",
+            "tags",
+            "likes",
+            "views",
+            "uniqueViewers",
+            "comments",
+            "isLiked",
+            "language",
+        ]
+        read_only_fields = fields
+
+
+class ForumPostCommentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Serializer for forum comments (compatible with frontend type).
+
+    Deleted comments keep their place in a thread but render `content` as "".
+    """
 
     author = serializers.SerializerMethodField()
     replyToUser = serializers.SerializerMethodField()
     likes = serializers.IntegerField(source="likes_count", read_only=True)
     createdAt = serializers.DateTimeField(source="created_at", read_only=True)
+    updatedAt = serializers.DateTimeField(source="updated_at", read_only=True)
     parentId = serializers.UUIDField(source="parent_id", allow_null=True, required=False)
     postId = serializers.UUIDField(source="post_id")
     isDeleted = serializers.BooleanField(source="is_deleted", read_only=True)
@@ -92,6 +143,7 @@ class ForumPostCommentSerializer(serializers.ModelSerializer):
             "content",
             "author",
             "createdAt",
+            "updatedAt",
             "likes",
             "isDeleted",
             "parentId",
@@ -101,7 +153,14 @@ class ForumPostCommentSerializer(serializers.ModelSerializer):
             "mainCommentId",
         ]
         extra_kwargs = {}
-        read_only_fields = ["id", "createdAt", "author", "replyToUser", "isDeleted", "likes"]
+        read_only_fields = ["id", "createdAt", "updatedAt", "author", "replyToUser", "isDeleted", "likes"]
+        sparse_sources = {
+            "author": ["author__username", "author__profile"],
+            "replyToUser": ["reply_to_user__username", "reply_to_user__profile"],
+            "repliesCount": ["parent"],
+        }
+        # to_representation checks parent_id and is_deleted for every row
+        sparse_required = ["parent", "is_deleted"]
 
     def get_author(self, obj: ForumPostComment) -> dict:
         return _author_payload_for(obj.author)
@@ -122,4 +181,6 @@ class ForumPostCommentSerializer(serializers.ModelSerializer):
         # Do not include repliesCount for non-main comments
         if instance.parent_id is not None:
             data.pop("repliesCount", None)
+        if instance.is_deleted and "content" in data:
+            data["content"] = ""
         return data
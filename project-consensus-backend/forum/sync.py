@@ -0,0 +1,216 @@
+"""
+Delta sync for polling clients: `GET /api/forum/changes/?since=<watermark>`.
+
+- Returns posts and comments whose `updated_at` is after the watermark, plus
+  ids of rows deleted since then (posts: `ForumTombstone`; comments: the
+  soft-deleted rows themselves), and a new watermark (`until`) to send on the
+  next poll. Each kind is one range scan on an `updated_at` / `deleted_at`
+  index. A deleted main comment takes its thread's replies with it.
+- Rows changed in the last FORUM_SYNC_LAG_SECONDS are held back until the
+  next poll: a transaction that stamped `updated_at` before the watermark
+  but committed after it would otherwise never be reported.
+- A page holds at most FORUM_SYNC_PAGE_SIZE rows per kind; `hasMore` tells
+  the client to poll again right away. The watermark only advances to the
+  point every kind was read up to, so some rows can be returned twice —
+  clients upsert by id.
+- `reset: true` (no `since`, or one older than the tombstone retention)
+  means deltas cannot be trusted: reload the pages, then poll from `until`.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.counters import bump, uncount_comments
+from .models import ForumPost, ForumPostComment, ForumPostLike, ForumTombstone
+
+
+def parse_since(raw: str | None) -> datetime | None:
+    """Watermark from `?since=` (ISO 8601); ValueError when malformed."""
+
+    if not raw:
+        return None
+    value = parse_datetime(raw.replace(" ", "+"))  # an unescaped "+" arrives as a space
+    if value is None:
+        raise ValueError(raw)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def _window(queryset, column: str, since: datetime, cutoff: datetime, limit: int) -> tuple[list, datetime, bool]:
+    """Rows with since < `column` <= cutoff, oldest first, at most ~`limit`.
+
+    Returns (rows, read up to, truncated). When truncated, rows sharing the
+    first left-out timestamp are left out too, so nothing is skipped by the
+    strict `>` on the next poll.
+    """
+
+    rows = list(
+        queryset.filter(**{f"{column}__gt": since, f"{column}__lte": cutoff}).order_by(column, "pk")[: limit + 1]
+    )
+    if len(rows) <= limit:
+        return rows, cutoff, False
+    boundary = getattr(rows[limit], column)
+    kept = [row for row in rows[:limit] if getattr(row, column) < boundary]
+    if not kept:
+        # More than `limit` rows share one timestamp: return all of them
+        return list(queryset.filter(**{column: boundary}).order_by("pk")), boundary, True
+    return kept, getattr(kept[-1], column), True
+
+
+@dataclass
+class Changes:
+    until: datetime
+    reset: bool = False
+    has_more: bool = False
+    posts: list = field(default_factory=list)
+    comments: list = field(default_factory=list)
+    deleted_posts: list = field(default_factory=list)
+    deleted_comments: list = field(default_factory=list)
+
+
+def collect_changes(posts, comments, since: datetime | None, post_id=None) -> Changes:
+    """Changes after `since` from the given post/comment querysets.
+
+    `post_id` limits the result to one thread (the post and its comments).
+    """
+
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.FORUM_SYNC_LAG_SECONDS)
+    horizon = now - timedelta(days=settings.FORUM_SYNC_RETENTION_DAYS)
+    if since is None or since < horizon:
+        return Changes(until=cutoff, reset=True)
+    if since >= cutoff:
+        return Changes(until=since)
+
+    tombstones = ForumTombstone.objects.all()
+    if post_id is not None:
+        posts = posts.filter(pk=post_id)
+        comments = comments.filter(post_id=post_id)
+        tombstones = tombstones.filter(post_id=post_id)
+    limit = settings.FORUM_SYNC_PAGE_SIZE
+    post_rows, posts_until, posts_more = _window(posts, "updated_at", since, cutoff, limit)
+    comment_rows, comments_until, comments_more = _window(comments, "updated_at", since, cutoff, limit)
+    deleted, deleted_until, deleted_more = _window(tombstones, "deleted_at", since, cutoff, limit)
+    return Changes(
+        until=min(posts_until, comments_until, deleted_until),
+        has_more=posts_more or comments_more or deleted_more,
+        posts=post_rows,
+        comments=[row for row in comment_rows if not row.is_deleted],
+        deleted_posts=[row.post_id for row in deleted],
+        deleted_comments=[row.pk for row in comment_rows if row.is_deleted],
+    )
+
+
+def delete_with_tombstone(post: ForumPost) -> ForumTombstone:
+    """Delete a post (and its comments) and record its tombstone for delta sync."""
+
+    with transaction.atomic():
+        tombstone = ForumTombstone.objects.create(post_id=post.pk)
+        post.delete()
+    return tombstone
+
+
+def soft_delete_comment(comment: ForumPostComment) -> datetime | None:
+    """Flag a comment deleted: one UPDATE of one row, whatever hangs below it.
+
+    Replies stay in place (hidden from lists under a deleted main comment)
+    until `purge_deleted_comments`. Returns the deletion time, or None when
+    the comment was already deleted.
+    """
+
+    now = timezone.now()
+    updated = ForumPostComment.objects.filter(pk=comment.pk, is_deleted=False).update(
+        is_deleted=True, deleted_at=now, updated_at=now
+    )
+    if not updated:
+        return None
+    comment.is_deleted, comment.deleted_at, comment.updated_at = True, now, now
+    return now
+
+
+def _delete_in_chunks(queryset, chunk_size: int, pause: float, before=None) -> int:
+    """Hard-delete `queryset` at most `chunk_size` rows per transaction.
+
+    Short transactions keep row locks on hot threads brief; `pause` seconds
+    between chunks leave the database room for regular traffic. `before` is
+    called with each chunk (a queryset) in its transaction, ahead of the DELETE.
+    """
+
+    total = 0
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return total
+        chunk = queryset.model.objects.filter(pk__in=ids)
+        with transaction.atomic():
+            if before is not None:
+                before(chunk)
+            deleted, _ = chunk.delete()
+        total += deleted
+        if pause:
+            time.sleep(pause)
+
+
+def delete_post(post_id, chunk_size: int = 500, pause: float = 0.0) -> bool:
+    """Delete a post with its thread in short transactions; False when it was already gone.
+
+    - Comments go first, newest (deepest) first, each chunk taken off its
+      authors' counters; then the likes.
+    - The post, with whatever was added to it meanwhile, goes last in one
+      transaction that also updates its author's counters and writes the
+      tombstone. Until then it is still served, its thread emptying chunk by
+      chunk.
+    """
+
+    comments = ForumPostComment.objects.filter(post_id=post_id).order_by("-created_at")
+    _delete_in_chunks(comments, chunk_size, pause, before=uncount_comments)
+    _delete_in_chunks(ForumPostLike.objects.filter(post_id=post_id), chunk_size, pause)
+    with transaction.atomic():
+        post = ForumPost.objects.select_for_update().filter(pk=post_id).first()
+        if post is None:
+            return False
+        uncount_comments(post.comments.all())
+        bump(post.author_id, posts=-1, likes_received=-post.likes_count)
+        delete_with_tombstone(post)
+    return True
+
+
+def prune_tombstones(chunk_size: int = 1000, pause: float = 0.0) -> int:
+    """Delete tombstones older than FORUM_SYNC_RETENTION_DAYS; returns the count."""
+
+    horizon = timezone.now() - timedelta(days=settings.FORUM_SYNC_RETENTION_DAYS)
+    return _delete_in_chunks(ForumTombstone.objects.filter(deleted_at__lt=horizon), chunk_size, pause)
+
+
+def purge_deleted_comments(chunk_size: int = 500, pause: float = 0.0) -> int:
+    """Hard-delete comments soft-deleted more than FORUM_SYNC_RETENTION_DAYS ago.
+
+    - Only rows no reply points at (as parent or main comment) go, newest
+      (deepest) first, so each chunk cascades to nothing; every chunk is
+      picked afresh, so a thread that is all deleted goes leaf by leaf.
+    - Live comments are never purged (a live reply keeps the deleted
+      comments above it), so a client never holds a live row the server
+      no longer has.
+    - Every purged row was deleted before the horizon, and clients polling
+      from before it are reset anyway, so no tombstones are written.
+      Returns the number of rows deleted.
+    """
+
+    horizon = timezone.now() - timedelta(days=settings.FORUM_SYNC_RETENTION_DAYS)
+    leaves = (
+        ForumPostComment.objects.filter(is_deleted=True, deleted_at__lt=horizon)
+        .filter(~Exists(ForumPostComment.objects.filter(parent=OuterRef("pk"))))
+        .filter(~Exists(ForumPostComment.objects.filter(main_comment=OuterRef("pk"))))
+        .order_by("-created_at")
+    )
+    return _delete_in_chunks(leaves, chunk_size, pause)
@@ -0,0 +1,648 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import Profile
+from core import checks, jobs
+from core.models import Job
+from core.testing import QueryBudgetTestCase, make_user
+from . import live, sync, viewcounts
+from .models import ForumPost, ForumPostComment, ForumPostLike, ForumPostViewers
+
+
+class ForumEndpointQueryBudgetTests(QueryBudgetTestCase):
+    """Every forum route, with enough rows per page that an N+1 loop would show."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [make_user(f"user{i}") for i in range(5)]
+        cls.user = cls.users[0]
+        cls.posts = [
+            ForumPost.objects.create(title=f"Post {i}", content=f"<p>Body {i}</p>", author=cls.users[i % 5])
+            for i in range(12)
+        ]
+        cls.post = cls.posts[0]
+        cls.mains = [
+            ForumPostComment.objects.create(post=cls.post, content=f"Main {i}", author=cls.users[i % 5])
+            for i in range(6)
+        ]
+        cls.main = cls.mains[0]
+        cls.replies = [
+            ForumPostComment.objects.create(
+                post=cls.post,
+                parent=cls.main,
+                main_comment=cls.main,
+                content=f"Reply {i}",
+                author=cls.users[(i + 1) % 5],
+                reply_to_user=cls.main.author,
+            )
+            for i in range(6)
+        ]
+        for post in cls.posts[:6]:
+            ForumPostLike.objects.create(post=post, user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_list(self):
+        self.assertEqual(self.client.get("/api/forum/posts/").status_code, 200)
+        self.client.force_login(self.user)
+        data = self.client.get("/api/forum/posts/").json()
+        self.assertEqual(len(data["results"]), 12)
+
+    def test_post_search(self):
+        self.assertEqual(self.client.get("/api/forum/posts/?search=Post").status_code, 200)
+
+    def test_post_retrieve(self):
+        self.client.force_login(self.user)
+        data = self.client.get(f"/api/forum/posts/{self.post.pk}/").json()
+        self.assertEqual(data["comments"], 12)
+        self.assertTrue(data["isLiked"])
+
+    def test_post_create_update_delete(self):
+        self.client.force_login(self.user)
+        created = self.client.post(
+            "/api/forum/posts/",
+            {"title": "New", "content": "<p>x</p>", "tags": ["a"], "language": "English"},
+            content_type="application/json",
+        )
+        self.assertEqual(created.status_code, 201)
+        url = f"/api/forum/posts/{created.json()['id']}/"
+        self.assertEqual(self.client.patch(url, {"title": "Edited"}, content_type="application/json").status_code, 200)
+        self.assertEqual(
+            self.client.put(url, {"title": "Put", "content": "<p>y</p>"}, content_type="application/json").status_code,
+            200,
+        )
+        self.assertEqual(self.client.delete(url).status_code, 202)
+        self.assertEqual(jobs.run(jobs.claim("test")), "done")
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_post_like_unlike(self):
+        self.client.force_login(self.users[1])
+        post = self.posts[0]
+        liked = self.client.post(f"/api/forum/posts/{post.pk}/like/")
+        self.assertEqual(liked.json()["likes"], 1)
+        unliked = self.client.post(f"/api/forum/posts/{post.pk}/unlike/")
+        self.assertEqual(unliked.json()["likes"], 0)
+
+    def test_comment_list_filters(self):
+        for query in (
+            f"postId={self.post.pk}",
+            f"postId={self.post.pk}&isMain=1",
+            f"parentId={self.main.pk}",
+            f"mainCommentId={self.main.pk}",
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/forum/comments/?{query}").status_code, 200)
+
+    def test_comment_retrieve(self):
+        data = self.client.get(f"/api/forum/comments/{self.main.pk}/").json()
+        self.assertEqual(data["repliesCount"], 6)
+
+    def test_comment_create_update_delete(self):
+        self.client.force_login(self.user)
+        created = self.client.post(
+            "/api/forum/comments/",
+            {"content": "Hi", "postId": str(self.post.pk), "parentId": str(self.replies[0].pk)},
+            content_type="application/json",
+        )
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(created.json()["mainCommentId"], str(self.main.pk))
+        url = f"/api/forum/comments/{created.json()['id']}/"
+        self.assertEqual(self.client.patch(url, {"content": "Edited"}, content_type="application/json").status_code, 200)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+
+class ForumPostDeletionTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = make_user("poster")
+        cls.commenter = make_user("replier")
+        cls.post = ForumPost.objects.create(title="Busy", content="<p>x</p>", author=cls.author, likes_count=1)
+        ForumPostLike.objects.create(post=cls.post, user=cls.commenter)
+        for i in range(3):
+            main = ForumPostComment.objects.create(post=cls.post, content=f"Main {i}", author=cls.commenter)
+            for j in range(2):
+                ForumPostComment.objects.create(
+                    post=cls.post, parent=main, main_comment=main, content=f"Reply {j}", author=cls.author
+                )
+        Profile.objects.filter(user=cls.author).update(posts_count=1, comments_count=6, likes_received_count=1)
+        Profile.objects.filter(user=cls.commenter).update(comments_count=3)
+
+    def test_delete_is_queued_then_done_in_chunks(self):
+        url = f"/api/forum/posts/{self.post.pk}/"
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.delete(url).status_code, 202)
+        self.assertEqual(self.client.delete(url).status_code, 202)  # the same pending job
+        self.assertEqual(Job.objects.get().payload, {"post_id": str(self.post.pk)})
+        self.assertEqual(self.client.get(url).json()["comments"], 9)  # untouched until the job runs
+
+        self.assertTrue(sync.delete_post(self.post.pk, chunk_size=2))
+        self.assertFalse(ForumPost.objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(ForumPostComment.objects.filter(post_id=self.post.pk).exists())
+        self.assertFalse(ForumPostLike.objects.filter(post_id=self.post.pk).exists())
+        counters = Profile.objects.values_list("posts_count", "comments_count", "likes_received_count")
+        self.assertEqual(counters.get(user=self.author), (0, 0, 0))
+        self.assertEqual(counters.get(user=self.commenter), (0, 0, 0))
+        # The queued job finds nothing left to do
+        self.assertEqual(jobs.run(jobs.claim("test")), "done")
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ForumPostExcerptTests(QueryBudgetTestCase):
+    def test_excerpt_is_plain_text_and_tracks_content(self):
+        author = make_user("writer")
+        body = "<p>Hello &amp; <b>welcome</b></p><script>alert(1)</script><p>" + "word " * 200 + "</p>"
+        post = ForumPost.objects.create(title="Long", content=body, author=author)
+        self.assertTrue(post.excerpt.startswith("Hello & welcome word"))
+        self.assertNotIn("alert", post.excerpt)
+        self.assertTrue(post.excerpt.endswith("…"))
+        self.assertLessEqual(len(post.excerpt), 280)
+        self.assertEqual(post.content_length, len("Hello & welcome " + "word " * 199 + "word"))
+
+        post.content = "<p>Short</p>"
+        post.save(update_fields=["content"])
+        post.refresh_from_db()
+        self.assertEqual((post.excerpt, post.content_length), ("Short", 5))
+
+    def test_list_returns_excerpt_and_retrieve_returns_content(self):
+        author = make_user("writer")
+        post = ForumPost.objects.create(title="T", content="<p>Body <i>text</i></p>", author=author)
+        with self.assertNumQueries(2):
+            item = self.client.get("/api/forum/posts/").json()["results"][0]
+        self.assertNotIn("content", item)
+        self.assertEqual((item["excerpt"], item["contentLength"]), ("Body text", 9))
+        detail = self.client.get(f"/api/forum/posts/{post.pk}/").json()
+        self.assertEqual(detail["content"], "<p>Body <i>text</i></p>")
+
+
+class ForumSparseFieldsetTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("reader")
+        cls.post = ForumPost.objects.create(title="Sparse", content="<p>Body</p>", author=cls.user)
+        cls.main = ForumPostComment.objects.create(post=cls.post, content="Main", author=cls.user)
+        ForumPostComment.objects.create(
+            post=cls.post, parent=cls.main, main_comment=cls.main, content="Reply", author=cls.user, reply_to_user=cls.user
+        )
+
+    def test_post_list_renders_and_selects_only_requested_fields(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            item = self.client.get("/api/forum/posts/?fields=id,title").json()["results"][0]
+        self.assertEqual(item, {"id": str(self.post.pk), "title": "Sparse"})
+        page_sql = queries.captured_queries[-1]["sql"]
+        for skipped in ("auth_user", "forum_forumpostlike", "forum_forumpostcomment", '"excerpt"'):
+            self.assertNotIn(skipped, page_sql)
+
+        item = self.client.get("/api/forum/posts/?fields=id,author,comments,isLiked").json()["results"][0]
+        self.assertEqual(item["author"]["name"], "Reader")
+        self.assertEqual((item["comments"], item["isLiked"]), (2, False))
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/forum/posts/?fields=id,nope")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("nope", response.json()["fields"][0])
+
+    def test_comment_fields_and_retrieve(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(f"/api/forum/comments/?postId={self.post.pk}&fields=id,content").json()
+        self.assertEqual([set(row) for row in data["results"]], [{"id", "content"}] * 2)
+        # Only the self-join hiding threads of deleted main comments
+        self.assertNotIn("auth_user", queries.captured_queries[-1]["sql"])
+        self.assertNotIn("COUNT", queries.captured_queries[-1]["sql"])
+
+        detail = self.client.get(f"/api/forum/comments/{self.main.pk}/?fields=repliesCount,replyToUser").json()
+        self.assertEqual(detail, {"repliesCount": 1, "replyToUser": None})
+        post = self.client.get(f"/api/forum/posts/{self.post.pk}/?fields=content").json()
+        self.assertEqual(post, {"content": "<p>Body</p>"})
+
+    def test_writes_ignore_fields(self):
+        self.client.force_login(self.user)
+        response = self.client.post(f"/api/forum/posts/{self.post.pk}/like/?fields=id")
+        self.assertEqual(response.json()["isLiked"], True)
+        self.assertIn("title", response.json())
+
+
+@override_settings(FORUM_SYNC_LAG_SECONDS=0)
+class ForumDeltaSyncTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # The demo seed stamps replies up to a minute ahead; keep them out of the deltas
+        now = timezone.now()
+        ForumPostComment.objects.filter(updated_at__gt=now).update(created_at=now, updated_at=now)
+        cls.user = make_user("syncer")
+        cls.post = ForumPost.objects.create(title="Synced", content="<p>Body</p>", author=cls.user)
+        cls.main = ForumPostComment.objects.create(post=cls.post, content="Main", author=cls.user)
+        cls.reply = ForumPostComment.objects.create(
+            post=cls.post, parent=cls.main, main_comment=cls.main, content="Reply", author=cls.user
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def poll(self, since: str | None = None, **params):
+        if since is not None:
+            params["since"] = since
+        response = self.client.get("/api/forum/changes/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_bootstrap_then_only_changed_rows(self):
+        first = self.poll()
+        self.assertTrue(first["reset"])
+        self.assertEqual(self.poll(first["until"])["posts"], [])
+
+        self.client.patch(f"/api/forum/posts/{self.post.pk}/", {"title": "Edited"}, content_type="application/json")
+        self.client.post(f"/api/forum/posts/{self.post.pk}/like/")
+        data = self.poll(first["until"])
+        self.assertFalse(data["reset"])
+        self.assertEqual([(p["title"], p["likes"], p["isLiked"]) for p in data["posts"]], [("Edited", 1, True)])
+        self.assertEqual(data["comments"], [])
+        self.assertEqual(self.poll(data["until"])["posts"], [])
+
+    def test_deletes_are_reported_as_tombstones(self):
+        since = self.poll()["until"]
+        self.assertEqual(self.client.delete(f"/api/forum/comments/{self.main.pk}/").status_code, 204)
+        data = self.poll(since, postId=str(self.post.pk))
+        # The main comment's id stands for its thread; the soft-deleted row is not listed as a change
+        self.assertEqual(data["deleted"]["comments"], [str(self.main.pk)])
+        self.assertEqual(data["comments"], [])
+
+        self.assertEqual(self.client.delete(f"/api/forum/posts/{self.post.pk}/").status_code, 202)
+        self.assertEqual(jobs.run(jobs.claim("test")), "done")
+        self.assertEqual(self.poll(data["until"])["deleted"]["posts"], [str(self.post.pk)])
+
+    @override_settings(FORUM_SYNC_PAGE_SIZE=2)
+    def test_truncated_pages_do_not_skip_rows(self):
+        since = self.poll()["until"]
+        created = {
+            str(ForumPostComment.objects.create(post=self.post, content=f"New {i}", author=self.user).pk)
+            for i in range(5)
+        }
+        seen: set[str] = set()
+        for _ in range(5):
+            data = self.poll(since)
+            seen.update(row["id"] for row in data["comments"])
+            since = data["until"]
+            if not data["hasMore"]:
+                break
+        self.assertEqual(seen, created)
+
+    def test_old_watermark_and_bad_input(self):
+        with override_settings(FORUM_SYNC_RETENTION_DAYS=1):
+            self.assertTrue(self.poll("2000-01-01T00:00:00+00:00")["reset"])
+        self.assertEqual(self.client.get("/api/forum/changes/?since=yesterday").status_code, 400)
+        self.assertEqual(self.client.get(f"/api/forum/changes/?since={self.poll()['until']}&postId=x").status_code, 400)
+
+
+class ForumCommentSoftDeleteTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("deleter")
+        cls.post = ForumPost.objects.create(title="Thread", content="<p>Body</p>", author=cls.user)
+        cls.main = ForumPostComment.objects.create(post=cls.post, content="Main", author=cls.user)
+        cls.replies = [
+            ForumPostComment.objects.create(
+                post=cls.post, parent=cls.main, main_comment=cls.main, content=f"Reply {i}", author=cls.user
+            )
+            for i in range(5)
+        ]
+        cls.other = ForumPostComment.objects.create(post=cls.post, content="Other", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def listed(self, query: str) -> list[str]:
+        return [row["id"] for row in self.client.get(f"/api/forum/comments/?{query}").json()["results"]]
+
+    def test_destroy_flags_one_row_and_hides_the_thread(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.delete(f"/api/forum/comments/{self.main.pk}/").status_code, 204)
+        writes = [q["sql"] for q in queries if q["sql"].startswith(("UPDATE", "DELETE"))]
+        # The comment row, and the author's comments_count on the profile
+        self.assertEqual([sql.split()[1] for sql in writes], ['"forum_forumpostcomment"', '"accounts_profile"'])
+        self.assertIn('"is_deleted"', writes[0])
+        self.assertEqual(ForumPostComment.objects.filter(post=self.post).count(), 7)
+
+        self.assertEqual(self.listed(f"postId={self.post.pk}"), [str(self.other.pk)])
+        self.assertEqual(self.listed(f"mainCommentId={self.main.pk}"), [])
+        post = self.client.get(f"/api/forum/posts/{self.post.pk}/").json()
+        self.assertEqual(post["comments"], 1)
+        data = self.client.get(f"/api/forum/comments/{self.main.pk}/").json()
+        self.assertEqual((data["isDeleted"], data["content"]), (True, ""))
+
+        url = f"/api/forum/comments/{self.main.pk}/"
+        self.assertEqual(self.client.patch(url, {"content": "x"}, content_type="application/json").status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        reply = self.client.post(
+            "/api/forum/comments/",
+            {"content": "Hi", "postId": str(self.post.pk), "parentId": str(self.main.pk)},
+            content_type="application/json",
+        )
+        self.assertEqual(reply.status_code, 400)
+
+    def test_deleted_reply_leaves_the_rest_of_the_thread(self):
+        self.client.delete(f"/api/forum/comments/{self.replies[0].pk}/")
+        listed = self.listed(f"mainCommentId={self.main.pk}")
+        self.assertCountEqual(listed, [str(r.pk) for r in self.replies[1:]])
+        self.assertEqual(self.client.get(f"/api/forum/comments/{self.main.pk}/").json()["repliesCount"], 4)
+
+    def test_purge_removes_old_deleted_rows_in_chunks(self):
+        child = ForumPostComment.objects.create(
+            post=self.post, parent=self.other, main_comment=self.other, content="Child", author=self.user
+        )
+        for comment in (self.main, self.other):
+            self.client.delete(f"/api/forum/comments/{comment.pk}/")
+        out = io.StringIO()
+        call_command("prune_forum_tombstones", "--chunk-size=2", "--pause=0", stdout=out)
+        self.assertIn("0 deleted comments", out.getvalue())
+
+        # A live reply under the deleted `child` (and `other`, its main comment)
+        ForumPostComment.objects.create(
+            post=self.post, parent=child, main_comment=self.other, content="Live", author=self.user
+        )
+        ForumPostComment.objects.filter(pk=child.pk).update(is_deleted=True, deleted_at=timezone.now())
+        # In a live thread, a deleted reply stays while a live reply points at it
+        kept = ForumPostComment.objects.create(post=self.post, content="Kept", author=self.user)
+        answered = ForumPostComment.objects.create(
+            post=self.post, parent=kept, main_comment=kept, content="Answered", author=self.user
+        )
+        ForumPostComment.objects.create(
+            post=self.post, parent=answered, main_comment=kept, content="Answer", author=self.user
+        )
+        ForumPostComment.objects.filter(pk=answered.pk).update(is_deleted=True, deleted_at=timezone.now())
+        # A thread deleted all the way down
+        gone = ForumPostComment.objects.create(post=self.post, content="Gone", author=self.user)
+        first = ForumPostComment.objects.create(
+            post=self.post, parent=gone, main_comment=gone, content="First", author=self.user
+        )
+        ForumPostComment.objects.create(post=self.post, parent=first, main_comment=gone, content="Nested", author=self.user)
+        ForumPostComment.objects.filter(main_comment=gone).update(is_deleted=True, deleted_at=timezone.now())
+        ForumPostComment.objects.filter(pk=gone.pk).update(is_deleted=True, deleted_at=timezone.now())
+        ForumPostComment.objects.filter(is_deleted=True).update(deleted_at=timezone.now() - timedelta(days=31))
+        live = set(ForumPostComment.objects.filter(post=self.post, is_deleted=False).values_list("pk", flat=True))
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command("prune_forum_tombstones", "--chunk-size=2", "--pause=0", stdout=out)
+        # Only the all-deleted thread goes; live replies keep every deleted comment above them
+        self.assertFalse(ForumPostComment.objects.filter(Q(pk=gone.pk) | Q(main_comment=gone)).exists())
+        self.assertEqual(
+            set(ForumPostComment.objects.filter(post=self.post, is_deleted=False).values_list("pk", flat=True)), live
+        )
+        for comment in (self.main, self.other, child, answered):
+            self.assertTrue(ForumPostComment.objects.filter(pk=comment.pk).exists())
+        deletes = [q["sql"] for q in queries if q["sql"].startswith("DELETE")]
+        self.assertGreaterEqual(len(deletes), 2)
+
+
+async def _open_stream(application, post_id, headers=()):
+    """Drive the ASGI app like a server; returns (messages, disconnect(), task)."""
+
+    messages: list[dict] = []
+    received = asyncio.Event()
+    disconnected = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        received.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/api/forum/posts/{post_id}/stream/",
+        "raw_path": f"/api/forum/posts/{post_id}/stream/".encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), *headers],
+        "client": ("127.0.0.1", 5000),
+        "server": ("testserver", 80),
+    }
+    task = asyncio.ensure_future(application(scope, receive, send))
+
+    async def next_body(timeout: float = 2.0) -> bytes:
+        while True:
+            for index, message in enumerate(messages):
+                if message["type"] == "http.response.body":
+                    del messages[index]
+                    return message["body"]
+            received.clear()
+            await asyncio.wait_for(received.wait(), timeout)
+
+    return messages, next_body, disconnected, task
+
+
+@override_settings(FORUM_LIVE_BACKEND="local", CORS_ALLOWED_ORIGINS=["http://localhost:3000"])
+class ForumLiveStreamTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("streamer")
+        cls.post = ForumPost.objects.create(title="Live", content="<p>Body</p>", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_stream_delivers_comment_and_like_events(self):
+        from config.asgi import application
+
+        origin = (b"origin", b"http://localhost:3000")
+        messages, next_body, disconnected, task = await _open_stream(application, self.post.pk, [origin])
+        self.assertEqual(await next_body(), b"retry: 3000\n\n")
+        headers = dict(messages[0]["headers"]) if messages else {}
+        self.assertEqual(headers.get(b"content-type"), b"text/event-stream")
+        self.assertEqual(headers.get(b"access-control-allow-origin"), b"http://localhost:3000")
+        self.assertEqual(live.broker.count, 1)
+
+        def write():
+            self.client.force_login(self.user)
+            with self.captureOnCommitCallbacks(execute=True):
+                created = self.client.post(
+                    "/api/forum/comments/", {"postId": str(self.post.pk), "content": "Hi"}, content_type="application/json"
+                )
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(f"/api/forum/posts/{self.post.pk}/like/")
+            return created.json()
+
+        created = await sync_to_async(write)()
+        comment = (await next_body()).decode()
+        self.assertIn("event: comment\n", comment)
+        event_id = comment.split("id: ", 1)[1].split("\n", 1)[0]
+        self.assertEqual(parse_datetime(event_id), parse_datetime(created["updatedAt"]))
+        payload = json.loads(comment.split("data: ", 1)[1])
+        self.assertEqual(payload["comment"]["content"], "Hi")
+        likes = json.loads((await next_body()).decode().split("data: ", 1)[1])
+        self.assertEqual((likes["type"], likes["likes"]), ("likes", 1))
+
+        disconnected.set()
+        await asyncio.wait_for(task, 2)
+        self.assertEqual(live.broker.count, 0)
+
+    async def test_heartbeat_overflow_and_errors(self):
+        from config.asgi import application
+
+        with override_settings(FORUM_LIVE_HEARTBEAT_SECONDS=0.05, FORUM_LIVE_QUEUE_SIZE=2):
+            _, next_body, disconnected, task = await _open_stream(application, self.post.pk)
+            await next_body()
+            self.assertEqual(await next_body(), b": keep-alive\n\n")
+            subscription = next(iter(live.broker._subscribers[str(self.post.pk)]))
+            for n in range(3):
+                subscription.deliver(live.format_event({"type": "likes", "postId": str(self.post.pk), "likes": n}))
+            self.assertIn(b"event: reset", await next_body())
+            await asyncio.wait_for(task, 2)
+        self.assertEqual(live.broker.count, 0)
+
+        messages, _, _, task = await _open_stream(application, uuid.uuid4())
+        await asyncio.wait_for(task, 2)
+        self.assertEqual(messages[0]["status"], 404)
+        with override_settings(FORUM_LIVE_MAX_STREAMS=0):
+            messages, _, _, task = await _open_stream(application, self.post.pk)
+            await asyncio.wait_for(task, 2)
+        self.assertEqual(messages[0]["status"], 503)
+
+    def test_wsgi_route_explains_asgi_requirement(self):
+        self.assertEqual(self.client.get(f"/api/forum/posts/{self.post.pk}/stream/").status_code, 501)
+
+
+@override_settings(FORUM_LIVE_BACKEND="cache", FORUM_LIVE_POLL_INTERVAL=0.01)
+class ForumLiveCacheFanoutTests(QueryBudgetTestCase):
+    async def test_events_published_through_the_cache_reach_streams(self):
+        fanout = live.get_fanout()
+        subscription = live.broker.subscribe("post-a")
+        try:
+            # The listener starts from the position it sees first; publish until it is past that
+            for _ in range(100):
+                fanout.publish({"type": "likes", "postId": "post-b", "likes": 1})
+                fanout.publish({"type": "likes", "postId": "post-a", "likes": 2})
+                try:
+                    frame = await asyncio.wait_for(subscription.get(), 0.05)
+                    break
+                except TimeoutError:
+                    continue
+            self.assertIn(b'"likes":2', frame)
+        finally:
+            subscription.close()
+
+
+@override_settings(FORUM_VIEWS_ENABLED=True)
+class ForumPostViewCountTests(QueryBudgetTestCase):
+    """Batched view counts and HyperLogLog unique viewers (forum/viewcounts.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("reader")
+        cls.other = make_user("lurker")
+        cls.post = ForumPost.objects.create(title="Viewed", content="<p>Body</p>", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(viewcounts, "_buffer", viewcounts.ViewBuffer())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_estimates_stay_within_the_documented_error(self):
+        precision = 11
+        error = viewcounts.standard_error(precision)
+        self.assertAlmostEqual(error, 0.023, places=3)
+        for n in (50, 1_000, 5_000, 20_000):
+            relative = []
+            for trial in range(5):
+                sketch = viewcounts.HyperLogLog(precision)
+                for i in range(n):
+                    sketch.add(f"{trial}:user:{i}")
+                relative.append(sketch.estimate() / n - 1)
+            with self.subTest(n=n):
+                self.assertLess(max(map(abs, relative)), 3 * error)
+                self.assertLess((sum(r * r for r in relative) / len(relative)) ** 0.5, 1.5 * error)
+        self.assertEqual(viewcounts.HyperLogLog(precision).estimate(), 0)
+
+    def test_merge_is_the_union(self):
+        a, b, union = (viewcounts.HyperLogLog(10) for _ in range(3))
+        for i in range(3_000):
+            (a if i < 2_000 else b).add(f"viewer{i}")
+            union.add(f"viewer{i}")
+        a.add("viewer2500")  # in both
+        a.merge(b)
+        self.assertEqual(a.to_bytes(), union.to_bytes())
+        self.assertEqual(len(a.to_bytes()), 1024)
+
+    def test_views_reach_the_post_in_batches(self):
+        url = f"/api/forum/posts/{self.post.pk}/"
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                self.client.get(url, REMOTE_ADDR="10.0.0.1")
+            self.client.get(url, REMOTE_ADDR="10.0.0.2")
+            self.client.force_login(self.other)
+            self.client.get(url)
+            self.client.get(url)
+        writes = [q["sql"] for q in queries.captured_queries if not q["sql"].lstrip().upper().startswith("SELECT")]
+        self.assertEqual([w for w in writes if "forum_forumpost" in w], [])
+
+        self.assertTrue(viewcounts.buffer().flush())
+        self.assertEqual(viewcounts.persist(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.views_count, self.post.unique_viewers), (6, 3))
+
+        # The stored sketch keeps earlier viewers: a returning one is not new
+        self.client.get(url)
+        call_command("flush_post_views", stdout=io.StringIO())
+        data = self.client.get(url, {"fields": "views,uniqueViewers"}).json()
+        self.assertEqual(data, {"views": 7, "uniqueViewers": 3})
+        self.assertEqual(viewcounts.persist(), 0)  # nothing pending
+
+    def test_needs_a_shared_cache(self):
+        self.assertEqual([error.id for error in checks.check_post_views_cache(None)], ["core.E001"])
+        redis = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://localhost:6379/0"}
+        with override_settings(CACHES={"default": redis}):
+            self.assertEqual(checks.check_post_views_cache(None), [])
+        with override_settings(FORUM_VIEWS_ENABLED=False):
+            self.assertEqual(checks.check_post_views_cache(None), [])
+
+    def test_buffer_is_bounded_and_waits_for_the_cache_lock(self):
+        posts = [str(uuid.uuid4()) for _ in range(3)]
+        buffer = viewcounts.buffer()
+        cache.add(viewcounts.LOCK_KEY, "another worker", 30)
+        with override_settings(FORUM_VIEWS_BUFFER_POSTS=2):
+            buffer.record(posts[0], "user:1")
+            buffer.record(posts[1], "user:1")
+            with self.assertLogs("forum.viewcounts", "WARNING"):
+                buffer.record(posts[2], "user:1")  # full, and the flush cannot lock
+            self.assertEqual((len(buffer), buffer.dropped), (2, 1))
+            buffer.record(posts[0], "user:2")
+        self.assertIsNone(viewcounts.persist(wait=0))
+
+        cache.delete(viewcounts.LOCK_KEY)
+        self.assertTrue(buffer.flush())
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(cache.get(f"forum:views:n:{posts[0]}"), 2)
+        # Posts that no longer exist are skipped, and their entries cleared
+        self.assertEqual(viewcounts.persist(), 0)
+        self.assertIsNone(cache.get(f"forum:views:n:{posts[0]}"))
+        self.assertFalse(ForumPostViewers.objects.exists())
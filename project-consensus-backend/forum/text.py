@@ -0,0 +1,58 @@
+"""
+Plain-text projection of post HTML for feed listings.
+
+- `plain_text` drops tags (and the contents of script/style), unescapes
+  entities and collapses whitespace.
+- `excerpt` cuts plain text at a word boundary with an ellipsis.
+"""
+
+from __future__ import annotations
+
+import re
+from html.parser import HTMLParser
+
+
+EXCERPT_LENGTH = 280
+
+_WHITESPACE = re.compile(r"\s+")
+_SKIPPED_TAGS = {"script", "style", "template"}
+_BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "tr", "td"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self.skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def plain_text(html: str) -> str:
+    parser = _TextExtractor()
+    parser.feed(html or "")
+    parser.close()
+    return _WHITESPACE.sub(" ", "".join(parser.parts)).strip()
+
+
+def excerpt(text: str, limit: int = EXCERPT_LENGTH) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text[: limit - 1]
+    if " " in cut[limit // 2 :]:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
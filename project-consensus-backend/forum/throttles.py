@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from core.ratelimit import UserRateThrottle
+
+
+class ForumWriteThrottle(UserRateThrottle):
+    """Per-user limit on forum writes (create/update/delete/like); reads are not limited."""
+
+    scope = "forum_write"
+    methods = ("POST", "PUT", "PATCH", "DELETE")
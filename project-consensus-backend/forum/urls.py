@@ -1,10 +1,16 @@
+from django.urls import path
 from rest_framework.routers import SimpleRouter
-from .views import ForumPostViewSet, ForumPostCommentViewSet
+from .views import ForumPostViewSet, ForumPostCommentViewSet, changes, post_stream
 
 
 router = SimpleRouter()
 router.register(r"posts", ForumPostViewSet, basename="forum-post")
 router.register(r"comments", ForumPostCommentViewSet, basename="forum-comment")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("changes/", changes, name="forum-changes"),
+    # Served by forum.live.live_asgi under ASGI; this route only answers WSGI requests
+    path("posts/<uuid:pk>/stream/", post_stream, name="forum-post-stream"),
+    *router.urls,
+]
 
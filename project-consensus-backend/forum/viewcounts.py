@@ -0,0 +1,340 @@
+"""
+Post views and unique viewers without a write per page view.
+
+- `ForumPostViewSet.retrieve` calls `record_view()`: it only touches this
+  process's `ViewBuffer`, a dict of post id -> (views, HyperLogLog sketch),
+  no database or cache I/O.
+- Every FORUM_VIEWS_FLUSH_SECONDS (or when FORUM_VIEWS_BUFFER_POSTS posts are
+  pending) the request that notices flushes the buffer into the shared cache
+  (CACHE_URL) under a short cache lock: view counts are added, sketches are
+  merged register-wise (max), so every worker's viewers end up in one sketch
+  per post. A flush that cannot get the lock keeps its data for the next one.
+- The periodic job "forum.flush_post_views" (`run_worker`, every
+  JOBS_POST_VIEWS_SECONDS) or `manage.py flush_post_views` persists the
+  cache to the database: each pending sketch is merged into
+  `ForumPostViewers`, `ForumPost.views_count` grows by the pending views and
+  `unique_viewers` is set to the merged estimate, then those cache entries
+  are cleared. Request workers never write views to the database.
+- Memory: one sketch is 2**FORUM_VIEWS_HLL_PRECISION bytes (2 KiB at the
+  default 11) whatever the number of viewers; a worker holds at most about
+  FORUM_VIEWS_BUFFER_POSTS of them. When that is full and the cache is busy,
+  views of further posts are dropped (and logged) until the next flush.
+- Accuracy: `unique_viewers` has a relative standard error of about
+  1.04 / sqrt(2**precision), 2.3% at precision 11 (`standard_error`), at
+  every cardinality; views_count is exact up to what a crashed worker had
+  not flushed yet.
+  A viewer is the user, or the client address (`NUM_PROXIES` aware) when
+  anonymous. Changing the precision restarts the unique counts.
+- Needs a shared CACHE_URL, like rate limiting: with the default LocMem
+  cache the command's process cannot see the workers' views. Hence off
+  by default (FORUM_VIEWS_ENABLED), and system check core.E001
+  (core/checks.py) refuses to start with it on and a per-process cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.throttling import BaseThrottle
+
+from .models import ForumPost, ForumPostViewers
+
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "forum:views:lock"
+LOCK_TIMEOUT = 30  # seconds; a crashed holder blocks flushes at most this long
+DIRTY_KEY = "forum:views:dirty"  # post ids with views in the cache
+CACHE_TTL = 60 * 60 * 24  # pending views older than this are given up
+
+
+def _sketch_key(post_id: str) -> str:
+    return f"forum:views:hll:{post_id}"
+
+
+def _count_key(post_id: str) -> str:
+    return f"forum:views:n:{post_id}"
+
+
+def standard_error(precision: int) -> float:
+    """Relative standard error of a HyperLogLog estimate with 2**precision registers."""
+
+    return 1.04 / math.sqrt(1 << precision)
+
+
+def _sigma(x: float) -> float:
+    # x + sum(x**(2**k) * 2**(k-1)), k >= 1
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x in (0.0, 1.0):
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        previous = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+class HyperLogLog:
+    """Dense HyperLogLog: 2**precision one-byte registers over 64-bit hashes."""
+
+    def __init__(self, precision: int, registers: bytes | bytearray | None = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(1 << precision)
+        if len(self.registers) != 1 << precision:
+            raise ValueError(f"expected {1 << precision} registers, got {len(self.registers)}")
+
+    @classmethod
+    def from_bytes(cls, data: bytes | None, precision: int) -> "HyperLogLog":
+        """The sketch in `data`, or an empty one when missing or of another precision."""
+
+        if data is not None and len(data) == 1 << precision:
+            return cls(precision, data)
+        return cls(precision)
+
+    @staticmethod
+    def hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+    def add_hash(self, hashed: int) -> None:
+        # First `precision` bits pick the register; it keeps the highest
+        # position of the first 1 bit seen in the remaining bits
+        width = 64 - self.precision
+        index = hashed >> width
+        rank = width - (hashed & ((1 << width) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value: str) -> None:
+        self.add_hash(self.hash(value))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Union with `other` (same precision), in place."""
+
+        mine = np.frombuffer(self.registers, dtype=np.uint8)
+        np.maximum(mine, np.frombuffer(other.registers, dtype=np.uint8), out=mine)
+
+    def estimate(self) -> int:
+        """Distinct values added, by Ertl's improved estimator (arXiv:1702.01284).
+
+        Works from the histogram of register values and needs neither the
+        linear-counting switch nor bias tables of the classic estimator, whose
+        error bulges around 2.5 * 2**precision values.
+        """
+
+        q = 64 - self.precision
+        m = len(self.registers)
+        counts = np.bincount(np.frombuffer(self.registers, dtype=np.uint8), minlength=q + 2).tolist()
+        if counts[0] == m:
+            return 0
+        z = m * _tau(1 - counts[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + counts[k])
+        z += m * _sigma(counts[0] / m)
+        return round(m * m / (2 * math.log(2) * z))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+
+@dataclass
+class PendingViews:
+    views: int
+    sketch: HyperLogLog
+
+
+@contextmanager
+def _cache_lock(wait: float):
+    """Hold the views lock in the cache; yields False when not acquired within `wait` seconds."""
+
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    while not cache.add(LOCK_KEY, token, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            yield False
+            return
+        time.sleep(0.005)
+    try:
+        yield True
+    finally:
+        if cache.get(LOCK_KEY) == token:
+            cache.delete(LOCK_KEY)
+
+
+class ViewBuffer:
+    """This process's views since its last flush to the cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()
+        self._posts: dict[str, PendingViews] = {}
+        self._next_flush = time.monotonic() + settings.FORUM_VIEWS_FLUSH_SECONDS
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    def record(self, post_id: str, viewer: str) -> None:
+        hashed = HyperLogLog.hash(viewer)
+        if not self._add(post_id, hashed):
+            # Full: make room, then give up on this view if there still is none
+            self.flush()
+            if not self._add(post_id, hashed):
+                self.dropped += 1
+                logger.warning("View buffer full (%d posts); dropped a view of %s", len(self._posts), post_id)
+        if time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def _add(self, post_id: str, hashed: int) -> bool:
+        with self._lock:
+            pending = self._posts.get(post_id)
+            if pending is None:
+                if len(self._posts) >= settings.FORUM_VIEWS_BUFFER_POSTS:
+                    return False
+                pending = self._posts[post_id] = PendingViews(0, HyperLogLog(settings.FORUM_VIEWS_HLL_PRECISION))
+            pending.views += 1
+            pending.sketch.add_hash(hashed)
+        return True
+
+    def _restore(self, posts: dict[str, PendingViews]) -> None:
+        with self._lock:
+            for post_id, pending in posts.items():
+                current = self._posts.get(post_id)
+                if current is None:
+                    self._posts[post_id] = pending
+                else:
+                    current.views += pending.views
+                    current.sketch.merge(pending.sketch)
+
+    def flush(self) -> bool:
+        """Add the pending views to the cache; False when they were kept for later."""
+
+        if not self._flushing.acquire(blocking=False):
+            return False  # another thread of this process is flushing
+        try:
+            with self._lock:
+                posts, self._posts = self._posts, {}
+                self._next_flush = time.monotonic() + settings.FORUM_VIEWS_FLUSH_SECONDS
+            if not posts:
+                return True
+            try:
+                with _cache_lock(wait=0.05) as locked:
+                    if locked:
+                        _add_to_cache(posts)
+            except Exception:
+                logger.exception("Flushing post views to the cache failed")
+                locked = False
+            if not locked:
+                self._restore(posts)
+                return False
+        finally:
+            self._flushing.release()
+        return True
+
+
+def _add_to_cache(posts: dict[str, PendingViews]) -> None:
+    """Merge a buffer into the cache; the caller holds the views lock."""
+
+    precision = settings.FORUM_VIEWS_HLL_PRECISION
+    keys = [key for post_id in posts for key in (_sketch_key(post_id), _count_key(post_id))]
+    current = cache.get_many(keys)
+    updates = {}
+    for post_id, pending in posts.items():
+        sketch = HyperLogLog.from_bytes(current.get(_sketch_key(post_id)), precision)
+        sketch.merge(pending.sketch)
+        updates[_sketch_key(post_id)] = sketch.to_bytes()
+        updates[_count_key(post_id)] = current.get(_count_key(post_id), 0) + pending.views
+    # Dirty first: if the counts fail to land, the caller keeps them and an
+    # extra dirty id costs nothing
+    cache.set(DIRTY_KEY, sorted({*(cache.get(DIRTY_KEY) or ()), *posts}), CACHE_TTL)
+    cache.set_many(updates, CACHE_TTL)
+
+
+def persist(wait: float = 5.0) -> int | None:
+    """Write the views pending in the cache to the database.
+
+    Returns the number of posts updated, or None when the lock was busy for
+    `wait` seconds. The cache entries are only cleared once the transaction
+    has committed.
+    """
+
+    with _cache_lock(wait) as locked:
+        if not locked:
+            return None
+        post_ids = cache.get(DIRTY_KEY) or []
+        if not post_ids:
+            return 0
+        keys = [key for post_id in post_ids for key in (_sketch_key(post_id), _count_key(post_id))]
+        pending = cache.get_many(keys)
+        precision = settings.FORUM_VIEWS_HLL_PRECISION
+        now = timezone.now()
+        updated = 0
+        with transaction.atomic():
+            # Posts deleted since their views were recorded drop out here
+            stored = ForumPost.objects.filter(pk__in=post_ids).values_list("pk", "viewers__sketch")
+            sketches = []
+            for pk, data in stored:
+                sketch = HyperLogLog.from_bytes(bytes(data) if data is not None else None, precision)
+                sketch.merge(HyperLogLog.from_bytes(pending.get(_sketch_key(str(pk))), precision))
+                sketches.append(ForumPostViewers(post_id=pk, sketch=sketch.to_bytes(), updated_at=now))
+                updated += ForumPost.objects.filter(pk=pk).update(
+                    views_count=F("views_count") + pending.get(_count_key(str(pk)), 0),
+                    unique_viewers=sketch.estimate(),
+                )
+            ForumPostViewers.objects.bulk_create(
+                sketches, update_conflicts=True, unique_fields=["post"], update_fields=["sketch", "updated_at"]
+            )
+        cache.delete_many([*keys, DIRTY_KEY])
+    return updated
+
+
+_buffer: ViewBuffer | None = None
+_buffer_lock = threading.Lock()
+
+
+def buffer() -> ViewBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ViewBuffer()
+    return _buffer
+
+
+def viewer_key(request) -> str:
+    """Who is viewing: the user, or the client address for anonymous requests."""
+
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"ip:{BaseThrottle().get_ident(request)}"
+
+
+def record_view(post_id, request) -> None:
+    if settings.FORUM_VIEWS_ENABLED:
+        buffer().record(str(post_id), viewer_key(request))
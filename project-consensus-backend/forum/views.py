@@ -2,15 +2,68 @@ from __future__ import annotations
 
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.response import Response
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.request import Request
+from rest_framework.exceptions import ValidationError
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import Count
 from django.db import transaction
-from django.db.models import F
-from .models import ForumPost, ForumPostComment, ForumPostLike
-from .serializers import ForumPostSerializer, ForumPostCommentSerializer
+from django.utils import timezone
+from django.db.models import Exists, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from accounts.counters import bump
+from core.sparse import SparseFieldsetViewMixin
+from .models import VISIBLE_COMMENTS, ForumPost, ForumPostComment, ForumPostLike
+from .jobs import delete_post
+from .serializers import ForumPostCommentSerializer, ForumPostListSerializer, ForumPostSerializer
+from .live import publish_comment, publish_comments_deleted, publish_likes
+from .sync import collect_changes, parse_since, soft_delete_comment
+from .throttles import ForumWriteThrottle
+from .viewcounts import record_view
+
+
+def annotate_posts(qs, user, comments: bool = True, is_liked: bool = True):
+    """Add the `comments_count` / `is_liked` annotations read by the post serializers.
+
+    Per-row counters as subqueries instead of one query per serialized post.
+    Deleted comments (and threads under a deleted main comment) are not counted.
+    """
+
+    if comments:
+        # Live rows, minus the live replies under deleted main comments. Those
+        # are rare: an OR over a self-join would cost a join per comment
+        def count(rows):
+            rows = rows.filter(is_deleted=False).order_by().values("post").annotate(n=Count("*")).values("n")
+            return Coalesce(Subquery(rows), 0)
+
+        # Every deleted row of the post; only main comments match `main_comment__in`
+        deleted_mains = ForumPostComment.objects.filter(post=OuterRef(OuterRef("pk")), is_deleted=True).values("pk")
+        qs = qs.annotate(
+            comments_count=count(ForumPostComment.objects.filter(post=OuterRef("pk")))
+            - count(ForumPostComment.objects.filter(main_comment__in=deleted_mains))
+        )
+    if is_liked and user.is_authenticated:
+        qs = qs.annotate(is_liked=Exists(ForumPostLike.objects.filter(post=OuterRef("pk"), user=user)))
+    return qs
+
+
+def replies_count():
+    """`replies_count_main` annotation: live replies in a main comment's thread.
+
+    A subquery, not a JOIN + GROUP BY: the page is then read in index order
+    and cut at the page size without sorting every comment of the post.
+    """
+
+    rows = (
+        ForumPostComment.objects.filter(main_comment=OuterRef("pk"), is_deleted=False)
+        .order_by()
+        .values("main_comment")
+        .annotate(n=Count("*"))
+        .values("n")
+    )
+    return Coalesce(Subquery(rows), 0)
 
 
 class DefaultPageNumberPagination(PageNumberPagination):
@@ -19,30 +72,58 @@ class DefaultPageNumberPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class ForumPostViewSet(viewsets.ModelViewSet):
+class ForumPostViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """CRUD endpoints for posts.
 
-    - GET /api/forum/posts/          list
+    - GET /api/forum/posts/          list (excerpt instead of content)
     - POST /api/forum/posts/         create
     - GET /api/forum/posts/{id}/     retrieve
     - PATCH /api/forum/posts/{id}/   partial update
-    - DELETE /api/forum/posts/{id}/  delete
+    - DELETE /api/forum/posts/{id}/  queue the deletion (202; job "forum.delete_post")
+    - reads accept `?fields=id,title,...` (core/sparse.py)
+    - retrieve counts a view (forum/viewcounts.py; batched, no write per view)
     """
 
-    queryset = ForumPost.objects.select_related("author").prefetch_related("comments")
+    queryset = ForumPost.objects.select_related("author__profile")
     serializer_class = ForumPostSerializer
     # Read-only for anonymous, write requires auth
     def get_permissions(self):  # type: ignore[override]
         if self.action in ["list", "retrieve"]:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
+    def get_queryset(self):  # type: ignore[override]
+        # Only the columns/joins the rendered fields need; the list serializer
+        # has no `content`, so feed pages never load the HTML body
+        qs = self.prune_queryset(super().get_queryset())
+        return annotate_posts(qs, self.request.user, comments=self.wants("comments"), is_liked=self.wants("isLiked"))
+
+    def retrieve(self, request, *args, **kwargs):
+        post = self.get_object()
+        record_view(post.pk, request)
+        return Response(self.get_serializer(post).data)
+
+    def get_serializer_class(self):  # type: ignore[override]
+        if self.action == "list":
+            return ForumPostListSerializer
+        return super().get_serializer_class()
+
     def perform_create(self, serializer):  # type: ignore[override]
         # Force the author to the current user
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            serializer.save(author=self.request.user)
+            bump(self.request.user.pk, posts=1)
+
+    def destroy(self, request, *args, **kwargs):
+        # A big thread takes many statements to delete: the job does it in
+        # small transactions (forum/sync.py `delete_post`), off the request
+        post = self.get_object()
+        delete_post.enqueue(key=f"forum.delete_post:{post.pk}", post_id=str(post.pk))
+        return Response(status=status.HTTP_202_ACCEPTED)
 
     filter_backends = [filters.SearchFilter]
     search_fields = ["title", "content", "tags"]
     pagination_class = DefaultPageNumberPagination
+    throttle_classes = [ForumWriteThrottle]
 
     @action(detail=True, methods=["POST"], permission_classes=[permissions.IsAuthenticated])
     def like(self, request: Request, pk: str | None = None):
@@ -55,8 +136,13 @@ class ForumPostViewSet(viewsets.ModelViewSet):
                 created = False
                 like, created = ForumPostLike.objects.get_or_create(post=post, user=user)
                 if created:
-                    ForumPost.objects.filter(pk=post.pk).update(likes_count=F("likes_count") + 1)
+                    now = timezone.now()
+                    ForumPost.objects.filter(pk=post.pk).update(likes_count=F("likes_count") + 1, updated_at=now)
+                    bump(post.author_id, likes_received=1)
             post.refresh_from_db(fields=["likes_count"])
+            if created:
+                publish_likes(post.pk, post.likes_count, now)
+            post.is_liked = True
             serializer = self.get_serializer(post, context={"request": request})
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:  # pragma: no cover
@@ -72,24 +158,37 @@ class ForumPostViewSet(viewsets.ModelViewSet):
             with transaction.atomic():
                 deleted, _ = ForumPostLike.objects.filter(post=post, user=user).delete()
                 if deleted:
-                    ForumPost.objects.filter(pk=post.pk, likes_count__gt=0).update(likes_count=F("likes_count") - 1)
+                    now = timezone.now()
+                    ForumPost.objects.filter(pk=post.pk, likes_count__gt=0).update(
+                        likes_count=F("likes_count") - 1, updated_at=now
+                    )
+                    bump(post.author_id, likes_received=-1)
             post.refresh_from_db(fields=["likes_count"])
+            if deleted:
+                publish_likes(post.pk, post.likes_count, now)
+            post.is_liked = False
             serializer = self.get_serializer(post, context={"request": request})
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:  # pragma: no cover
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ForumPostCommentViewSet(viewsets.ModelViewSet):
+class ForumPostCommentViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """CRUD endpoints for comments (filter by postId/parentId/mainCommentId).
 
     - GET /api/forum/comments/?postId=<uuid>          filter by post
     - GET /api/forum/comments/?parentId=<uuid>        filter by parent comment
     - POST /api/forum/comments/                        create
+    - DELETE /api/forum/comments/{id}/                 soft delete (forum/sync.py)
+    - lists leave out deleted comments and the threads of deleted main comments;
+      retrieve still returns a deleted comment, with its content blanked
     - others same as standard REST actions
+    - reads accept `?fields=id,content,...` (core/sparse.py)
     """
 
-    queryset = ForumPostComment.objects.select_related("author", "post", "reply_to_user", "parent", "main_comment")
+    queryset = ForumPostComment.objects.select_related(
+        "author__profile", "post", "reply_to_user__profile", "parent", "main_comment"
+    )
     serializer_class = ForumPostCommentSerializer
     # Read-only for anonymous, write requires auth
     def get_permissions(self):  # type: ignore[override]
@@ -97,9 +196,15 @@ class ForumPostCommentViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
     pagination_class = DefaultPageNumberPagination
+    throttle_classes = [ForumWriteThrottle]
 
     def get_queryset(self):  # type: ignore[override]
-        qs = super().get_queryset()
+        qs = self.prune_queryset(super().get_queryset())
+        if self.action == "list":
+            qs = qs.filter(VISIBLE_COMMENTS)
+        elif self.action != "retrieve":
+            # Deleted comments cannot be edited, deleted again or liked
+            qs = qs.filter(is_deleted=False)
         post_id = self.request.query_params.get("postId")
         parent_id = self.request.query_params.get("parentId")
         main_comment_id = self.request.query_params.get("mainCommentId")
@@ -114,18 +219,90 @@ class ForumPostCommentViewSet(viewsets.ModelViewSet):
         if is_main in {"1", "true", "True"}:
             qs = qs.filter(parent__isnull=True)
         # Annotate total number of replies under the same main thread, only for main comments
-        qs = qs.annotate(
-            replies_count_main=Count("all_replies", distinct=True),
-        )
+        if self.wants("repliesCount"):
+            qs = qs.annotate(replies_count_main=replies_count())
         # Consistent ordering: latest first
         return qs.order_by("-created_at")
 
     def perform_create(self, serializer):  # type: ignore[override]
         # Always set the author to current user; derive reply_to_user and main from parent if provided
-        parent: ForumPostComment | None = serializer.validated_data.get("parent")
+        # `parentId` is declared with source="parent_id", so look the parent up here
+        parent_id = serializer.validated_data.get("parent_id")
+        parent: ForumPostComment | None = None
+        if parent_id:
+            parent = ForumPostComment.objects.select_related("author", "main_comment").filter(pk=parent_id).first()
+            if parent is not None and parent.is_deleted:
+                raise ValidationError({"parentId": ["Cannot reply to a deleted comment."]})
         reply_to_user = None
         main_comment = None
         if parent:
             reply_to_user = parent.author
             main_comment = parent if parent.parent_id is None else parent.main_comment
-        serializer.save(author=self.request.user, reply_to_user=reply_to_user, main_comment=main_comment)
+        with transaction.atomic():
+            serializer.save(author=self.request.user, reply_to_user=reply_to_user, main_comment=main_comment)
+            bump(self.request.user.pk, comments=1)
+        # `serializer.data` is cached and reused for the response: no extra queries
+        publish_comment(serializer.instance, serializer.data)
+
+    def perform_update(self, serializer):  # type: ignore[override]
+        serializer.save()
+        publish_comment(serializer.instance, serializer.data)
+
+    def perform_destroy(self, instance):  # type: ignore[override]
+        # A flag update: replies below stay put, so a big thread locks one row
+        with transaction.atomic():
+            deleted_at = soft_delete_comment(instance)
+            if deleted_at is not None:
+                bump(instance.author_id, comments=-1)
+        if deleted_at is not None:
+            publish_comments_deleted(instance.post_id, [instance.pk], deleted_at)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def post_stream(request: Request, pk):
+    """GET /api/forum/posts/{id}/stream/ reached Django, i.e. a WSGI server.
+
+    The SSE stream is served in front of Django by the ASGI app
+    (`forum.live.live_asgi`, config/asgi.py).
+    """
+
+    return Response(
+        {"detail": "Live streams need the ASGI application (config.asgi)."}, status=status.HTTP_501_NOT_IMPLEMENTED
+    )
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def changes(request: Request):
+    """Posts/comments changed or deleted after `?since=` (see forum/sync.py).
+
+    - GET /api/forum/changes/?since=<until from the previous poll>
+    - `&postId=<uuid>` limits the result to one thread
+    """
+
+    try:
+        since = parse_since(request.query_params.get("since"))
+    except ValueError:
+        return Response({"since": ["Expected an ISO 8601 timestamp."]}, status=status.HTTP_400_BAD_REQUEST)
+    post_id = request.query_params.get("postId") or None
+    posts = annotate_posts(ForumPost.objects.select_related("author__profile"), request.user)
+    # Deleted comments are read too: they are reported under `deleted`
+    comments = ForumPostComment.objects.select_related("author__profile", "reply_to_user__profile").annotate(
+        replies_count_main=replies_count()
+    )
+    try:
+        result = collect_changes(posts, comments, since, post_id=post_id)
+    except DjangoValidationError:
+        return Response({"postId": ["Expected a UUID."]}, status=status.HTTP_400_BAD_REQUEST)
+    # No request in the context: `?fields=` does not apply here
+    return Response(
+        {
+            "until": result.until.isoformat(),
+            "reset": result.reset,
+            "hasMore": result.has_more,
+            "posts": ForumPostListSerializer(result.posts, many=True).data,
+            "comments": ForumPostCommentSerializer(result.comments, many=True).data,
+            "deleted": {"posts": result.deleted_posts, "comments": result.deleted_comments},
+        }
+    )
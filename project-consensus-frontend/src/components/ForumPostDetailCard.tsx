@@ -94,7 +94,7 @@ export function ForumPostDetailCard({
     e.preventDefault();
     e.stopPropagation();
     try {
-      const textToCopy = `${post.title}\n\n${post.content}\n\n- ${post.author.name}`;
+      const textToCopy = `${post.title}\n\n${post.content ?? ""}\n\n- ${post.author.name}`;
       await navigator.clipboard.writeText(textToCopy);
       setIsCopySuccess(true);
       setIsDropdownOpen(false); // Close dropdown after copying
@@ -170,7 +170,7 @@ export function ForumPostDetailCard({
           dangerouslySetInnerHTML={{
             __html: isTranslated
               ? t('post.translateUnavailable')
-              : sanitizeHtml(post.content)
+              : sanitizeHtml(post.content ?? "")
           }}
         />
 
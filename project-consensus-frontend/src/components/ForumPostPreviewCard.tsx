@@ -96,7 +96,8 @@ export function ForumPostPreviewCard({
     e.preventDefault();
     e.stopPropagation();
     try {
-      const plainTextContent = stripHtmlTags(post.content);
+      // 列表接口只返回摘要 / The list endpoint only returns the excerpt
+      const plainTextContent = post.excerpt ?? stripHtmlTags(post.content ?? "");
       const textToCopy = `${post.title}\n\n${plainTextContent}\n\n- ${post.author.name}`;
       await navigator.clipboard.writeText(textToCopy);
       setIsCopySuccess(true);
@@ -178,7 +179,7 @@ export function ForumPostPreviewCard({
             </span>
           </div>
           <p className="text-muted-foreground text-sm leading-relaxed mb-1 break-words overflow-wrap-anywhere line-clamp-2 min-h-[3.25em]">
-            {isTranslated ? t('post.translateUnavailable') : truncateHtmlContent(post.content)}
+            {isTranslated ? t('post.translateUnavailable') : (post.excerpt ?? truncateHtmlContent(post.content ?? ""))}
           </p>
 
           {post.tags.length > 0 && (
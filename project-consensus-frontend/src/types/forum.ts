@@ -10,7 +10,9 @@ import { Author } from './user';
 export interface ForumPost {
   id: string; // 帖子唯一标识符 / Post unique identifier
   title: string; // 帖子标题 / Post title
-  content: string; // 帖子内容 / Post content
+  content?: string; // 帖子内容（HTML，仅详情接口返回） / Post content (HTML, detail endpoint only)
+  excerpt?: string; // 纯文本摘要（仅列表接口返回） / Plain-text excerpt (list endpoint only)
+  contentLength?: number; // 正文纯文本长度（仅列表接口返回） / Plain-text body length (list endpoint only)
   author: Author; // 帖子作者 / Post author
   createdAt: string; // 创建时间 / Creation time
   tags: string[]; // 标签列表 / Tags list